@@ -1,8 +1,8 @@
 import streamlit as st
-from content_generation_crew import ContentGenerationCrew
+from job_queue import JobQueue, QUEUED, RUNNING, FAILED
+from pipeline_profiles import PROFILES
 import time
 from datetime import datetime
-import markdown
 
 st.set_page_config(
     page_title="AI Content Generation Pipeline",
@@ -90,10 +90,142 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Initialize crew
+# Job queue shared by the UI and the worker processes
 @st.cache_resource
-def get_crew():
-    return ContentGenerationCrew()
+def get_job_queue():
+    return JobQueue()
+
+def job_duration(job) -> float:
+    started = datetime.fromisoformat(job["started_at"])
+    finished = datetime.fromisoformat(job["finished_at"])
+    return (finished - started).total_seconds()
+
+STAGE_ICONS = {"pending": "⏳", "running": "🔄", "done": "✅", "reused": "♻️"}
+
+def render_progress(progress):
+    """Per-stage status and elapsed time, plus the draft of the most recent stage"""
+    for stage, info in progress["stages"].items():
+        duration = f" — {info['duration']:.0f}s" if info["duration"] is not None else ""
+        st.write(f"{STAGE_ICONS.get(info['status'], '•')} **{stage}** ({info['agent']}){duration}")
+    if progress["draft"]:
+        st.markdown(f"##### ✍️ Live output: {progress['draft_stage']}")
+        quality = progress.get("draft_quality")
+        if quality:
+            st.caption(f"Live quality: {quality['overall_score']}/100 (grade {quality['grade']}) — "
+                       + ", ".join(f"{name} {score}" for name, score in quality["scores"].items()))
+        st.markdown(progress["draft"])
+
+def render_history(vc, topic):
+    """Version history of the topic, or full-text search results, one page at a time"""
+    query = st.text_input("🔎 Search stored versions", key="history_query", placeholder="Words to find")
+    scope = st.radio("Search in", ["This topic", "All topics"], horizontal=True, key="history_scope") if query else None
+    # Cursors of the pages shown so far; a new topic, query or scope starts over
+    view = (topic, query, scope)
+    if st.session_state.get("history_view") != view:
+        st.session_state["history_view"] = view
+        st.session_state["history_cursors"] = [None]
+    cursors = st.session_state["history_cursors"]
+    if query:
+        page = vc.search(query, content_id=topic if scope == "This topic" else None, cursor=cursors[-1])
+        if not page["items"]:
+            st.info("No stored version matches.")
+        for hit in page["items"]:
+            st.markdown(f"**{hit['content_id']}** · v{hit['version']} · {hit['date']} · {hit['words']} words")
+            st.caption(hit["snippet"])
+    else:
+        page = vc.get_history_page(topic, cursor=cursors[-1])
+        st.table(page["items"])
+    previous_col, next_col = st.columns(2)
+    if len(cursors) > 1 and previous_col.button("← Previous", key="history_previous"):
+        cursors.pop()
+        st.rerun()
+    if page["next_cursor"] and next_col.button("Next →", key="history_next"):
+        cursors.append(page["next_cursor"])
+        st.rerun()
+
+def render_result(result, topic, elapsed):
+    """Display a finished generation: content, stats, quality score and history"""
+    
+    # Results Display
+    st.success(f"Generated successfully in {elapsed:.1f} seconds!")
+    
+    # The worker has already saved this version; its score is computed once and stored
+    from content_versioning import ContentVersionControl
+    from rescore_archive import score_version
+    vc = ContentVersionControl()
+    quality_results = score_version(vc, topic, result["version"]) if result.get("version") else None
+    if quality_results is None:
+        from quality_scorer import ContentQualityScorer
+        quality_results = ContentQualityScorer().score_content(result["final_content"], topic)
+    
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📄 Content View", "🛠️ Raw Markdown", "📊 Stats", "⭐ Quality Score", "📜 History"])
+    
+    with tab1:
+        st.markdown(result["final_content"])
+        
+    with tab2:
+        st.code(result["final_content"], language="markdown")
+        
+    with tab3:
+        cols = st.columns(3)
+        cols[0].metric("Agents Involved", result["agents_used"])
+        cols[1].metric("Tasks Completed", result["tasks_completed"])
+        cols[2].metric("Words approx", len(result["final_content"].split()))
+        
+        if result.get("metrics"):
+            totals = result["metrics"]["totals"]
+            cols = st.columns(3)
+            cols[0].metric("LLM Calls", totals["llm_calls"])
+            cols[1].metric("Tokens", totals["prompt_tokens"] + totals["completion_tokens"])
+            cols[2].metric("Estimated Cost", f"${totals['cost_usd']:.4f}")
+            st.markdown("#### Per-Stage Breakdown")
+            st.table([
+                {"stage": stage, "seconds": m["wall_time"], "llm calls": m["llm_calls"],
+                 "prompt tokens": m["prompt_tokens"], "completion tokens": m["completion_tokens"],
+                 "cost ($)": m["cost_usd"]}
+                for stage, m in result["metrics"]["stages"].items()
+            ])
+        
+        if result.get("agent_latency"):
+            st.markdown("#### Per-Agent Latency")
+            st.table([
+                {"agent": agent, "model": a["model"], "variant": a["variant"], "max tokens": a["max_tokens"],
+                 "seconds": a["wall_time"], "llm seconds": a["llm_seconds"], "llm calls": a["llm_calls"]}
+                for agent, a in result["agent_latency"].items()
+            ])
+    
+    with tab4:
+        st.markdown(f"### Overall Grade: **{quality_results['grade']}**")
+        st.progress(quality_results['overall_score'] / 100)
+        st.metric("Quality Score", f"{quality_results['overall_score']}/100")
+        
+        st.markdown("#### Detailed Scores")
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Readability", quality_results['scores']['readability'])
+        c2.metric("Structure", quality_results['scores']['structure'])
+        c3.metric("Engagement", quality_results['scores']['engagement'])
+        
+        indices = quality_results['readability_metrics']
+        r1, r2, r3 = st.columns(3)
+        r1.metric("Flesch Reading Ease", indices['flesch_reading_ease'])
+        r2.metric("Flesch-Kincaid Grade", indices['flesch_kincaid_grade'])
+        r3.metric("Gunning Fog", indices['gunning_fog'])
+        
+        st.markdown("#### Recommendations")
+        for rec in quality_results['recommendations']:
+            st.info(rec)
+    
+    with tab5:
+        st.markdown("### Version History")
+        render_history(vc, topic)
+        
+    # Download
+    st.download_button(
+        label="📥 Download Markdown",
+        data=result["final_content"],
+        file_name=f"content_{datetime.now().strftime('%Y%m%d')}.md",
+        mime="text/markdown"
+    )
 
 # Header
 st.markdown('<p class="main-header">✍️ AI Content Pipeline</p>', unsafe_allow_html=True)
@@ -124,79 +256,61 @@ topic = st.text_input("What is the topic of your content?", placeholder="e.g., T
 content_type = st.selectbox("Select Content Type", 
                           ["Blog Post", "Research Report", "Technical Article", "Newsletter"])
 
+profile = st.selectbox("Pipeline profile", ["auto"] + list(PROFILES),
+                       format_func=lambda name: "Auto (by content type)" if name == "auto" else PROFILES[name]["label"],
+                       help="Lite merges outline+writing and editing+SEO and skips fact-checking for faster results")
+
+refresh = st.checkbox("♻️ Reuse recent research for this topic",
+                      help="Skips research (and the outline) if a previous version has fresh results")
+
+latency_budget = st.number_input("⏱️ Latency budget in seconds (0 = none)", min_value=0, value=0, step=60,
+                                 help="Agents switch to faster, shorter-output LLM settings if the run would take longer")
+
+queue = get_job_queue()
+
 if st.button("🚀 Generate High-Quality Content"):
     if not topic:
         st.error("Please enter a topic.")
+    else:
+        options = {"refresh": refresh}
+        if profile != "auto":
+            options["profile"] = profile
+        if latency_budget:
+            options["latency_budget"] = latency_budget
+        job_id = queue.enqueue(topic, content_type, **options)
+        # Keep the job id in the URL so a reload or reconnect picks the job back up
+        st.query_params["job"] = str(job_id)
+
+job_id = st.query_params.get("job")
+if job_id and not (job_id.isascii() and job_id.isdigit()):
+    # A mangled or hand-edited URL; drop it instead of failing the page
+    st.warning(f"Ignoring invalid job id in the URL: {job_id!r}")
+    del st.query_params["job"]
+    job_id = None
+if job_id:
+    job = queue.get(int(job_id))
+    if job is None:
+        st.error(f"Job {job_id} not found.")
+        del st.query_params["job"]
+    elif job["status"] in (QUEUED, RUNNING):
+        progress = job["progress"]
+        label = f"🎬 Job #{job['id']}: {job['topic']}"
+        if progress and progress["active_agents"]:
+            label = f"🎬 {', '.join(progress['active_agents'])} working... ({progress['elapsed']:.0f}s)"
+        with st.status(label, expanded=True):
+            if job["status"] == QUEUED:
+                st.write("⏳ Waiting for a worker to pick up the job...")
+            elif not progress:
+                st.write("🔍 The crew is starting the process...")
+            else:
+                render_progress(progress)
+        time.sleep(1)
+        st.rerun()
+    elif job["status"] == FAILED:
+        st.error(f"An error occurred: {job['error']}")
     else:
         try:
-            crew = get_crew()
-            
-            with st.status("🎬 Crew is starting the process...", expanded=True) as status:
-                st.write("🔍 Researcher is gathering data...")
-                # In a real app, you'd hook into CrewAI's verbose output or callbacks
-                # For now, we'll simulate steps or just call kickoff
-                
-                start_time = time.time()
-                result = crew.generate_content(topic, content_type)
-                end_time = time.time()
-                
-                status.update(label="✅ Content Generation Complete!", state="complete", expanded=False)
-            
-            # Results Display
-            st.success(f"Generated successfully in {end_time - start_time:.1f} seconds!")
-            
-            # Score the content
-            from quality_scorer import ContentQualityScorer
-            scorer = ContentQualityScorer()
-            quality_results = scorer.score_content(result["final_content"], topic)
-            
-            # Save Version
-            from content_versioning import ContentVersionControl
-            vc = ContentVersionControl()
-            version_id = vc.save_version(topic, result["final_content"])
-            
-            tab1, tab2, tab3, tab4, tab5 = st.tabs(["📄 Content View", "🛠️ Raw Markdown", "📊 Stats", "⭐ Quality Score", "📜 History"])
-            
-            with tab1:
-                st.markdown(result["final_content"])
-                
-            with tab2:
-                st.code(result["final_content"], language="markdown")
-                
-            with tab3:
-                cols = st.columns(3)
-                cols[0].metric("Agents Involved", result["agents_used"])
-                cols[1].metric("Tasks Completed", result["tasks_completed"])
-                cols[2].metric("Words approx", len(result["final_content"].split()))
-            
-            with tab4:
-                st.markdown(f"### Overall Grade: **{quality_results['grade']}**")
-                st.progress(quality_results['overall_score'] / 100)
-                st.metric("Quality Score", f"{quality_results['overall_score']}/100")
-                
-                st.markdown("#### Detailed Scores")
-                c1, c2, c3 = st.columns(3)
-                c1.metric("Readability", quality_results['scores']['readability'])
-                c2.metric("Structure", quality_results['scores']['structure'])
-                c3.metric("Engagement", quality_results['scores']['engagement'])
-                
-                st.markdown("#### Recommendations")
-                for rec in quality_results['recommendations']:
-                    st.info(rec)
-            
-            with tab5:
-                st.markdown("### Version History")
-                history = vc.get_history(topic)
-                st.table(history)
-                
-            # Download
-            st.download_button(
-                label="📥 Download Markdown",
-                data=result["final_content"],
-                file_name=f"content_{datetime.now().strftime('%Y%m%d')}.md",
-                mime="text/markdown"
-            )
-            
+            render_result(job["result"], job["topic"], job_duration(job))
         except Exception as e:
             st.error(f"An error occurred: {str(e)}")
             st.exception(e)
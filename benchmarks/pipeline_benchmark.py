@@ -0,0 +1,180 @@
+"""
+Offline end-to-end benchmark of `ContentGenerationCrew.generate_content`.
+
+The DeepSeek LLM and the DuckDuckGo client are replaced by the deterministic
+stubs in `benchmarks/stubs.py`, so the numbers reflect orchestration cost
+(CrewAI, scheduling, checkpoints, metrics, progress) plus the configured stub
+latency, and nothing is sent over the network. Run from the repository root:
+
+    python -m benchmarks.pipeline_benchmark --runs 3 --concurrency 1,2,4 --json pipeline.jsonl
+
+Reported:
+- throughput: sequential runs per minute and seconds per run
+- per-stage overhead: stage wall time not spent in LLM calls or tools
+- memory: tracemalloc peak for one run and the process max RSS
+- concurrency scaling: `generate_batch` throughput, speedup and efficiency
+  at each concurrency level
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List
+
+from benchmarks.stubs import StubChatModel, StubSearch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def configure(args, workdir: str):
+    """A crew wired to the stubs, with all state files in `workdir`"""
+    os.environ.setdefault("DEEPSEEK_API_KEY", "sk-benchmark")
+    os.environ["CHECKPOINT_DB"] = os.path.join(workdir, "checkpoints.db")
+    os.environ["CONTENT_VERSIONS_DB"] = os.path.join(workdir, "content_versions.db")
+    os.environ["METRICS_FILE"] = os.path.join(workdir, "metrics.jsonl")
+
+    import custom_tools
+    from content_generation_crew import ContentGenerationCrew
+    from progress import LLMStreamRelay
+    from metrics import LLMMetricsRelay
+
+    search = StubSearch(latency=args.search_latency, result_words=args.search_words)
+    custom_tools.search_service = custom_tools.SearchService(runner=search)
+    llm = StubChatModel(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        response_words=args.response_words,
+        callbacks=[LLMStreamRelay(), LLMMetricsRelay()]
+    )
+    return ContentGenerationCrew(cached_agents=[], llm=llm)
+
+
+def stage_overhead(metrics: Dict) -> Dict[str, float]:
+    """Seconds of each stage's wall time not spent waiting on the LLM or tools"""
+    overhead = {}
+    for stage, entry in metrics["stages"].items():
+        tool_seconds = sum(call["seconds"] for call in entry["tool_calls"].values())
+        overhead[stage] = round(entry["wall_time"] - entry["llm_seconds"] - tool_seconds, 4)
+    return overhead
+
+
+def run_end_to_end(crew, runs: int, content_type: str, parallel: bool, profile: str = None) -> Dict:
+    durations = []
+    overheads: Dict[str, List[float]] = {}
+    llm_seconds = []
+    for i in range(runs):
+        started = time.perf_counter()
+        result = crew.generate_content(f"Benchmark topic {i}", content_type, parallel=parallel, profile=profile)
+        durations.append(time.perf_counter() - started)
+        llm_seconds.append(sum(s["llm_seconds"] for s in result["metrics"]["stages"].values()))
+        for stage, seconds in stage_overhead(result["metrics"]).items():
+            overheads.setdefault(stage, []).append(seconds)
+
+    median_run = statistics.median(durations)
+    return {
+        "runs": runs,
+        "median_seconds_per_run": round(median_run, 3),
+        "runs_per_minute": round(60 / median_run, 2),
+        "median_llm_seconds_per_run": round(statistics.median(llm_seconds), 3),
+        "stage_overhead_seconds": {stage: round(statistics.median(values), 4) for stage, values in overheads.items()},
+        "total_overhead_seconds": round(median_run - statistics.median(llm_seconds), 3)
+    }
+
+
+def measure_memory(crew, content_type: str, parallel: bool, profile: str = None) -> Dict:
+    tracemalloc.start()
+    try:
+        crew.generate_content("Benchmark memory topic", content_type, parallel=parallel, profile=profile)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    memory = {"tracemalloc_peak_mb": round(peak / 2**20, 2)}
+    try:
+        import resource
+        # ru_maxrss is in kilobytes on Linux
+        memory["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    except ImportError:
+        pass
+    return memory
+
+
+def run_concurrency_scaling(crew, levels: List[int], jobs_per_worker: int, content_type: str, parallel: bool) -> Dict:
+    results = {}
+    baseline = None
+    for level in levels:
+        jobs = [(f"Scaling topic {level}-{i}", content_type) for i in range(level * jobs_per_worker)]
+        started = time.perf_counter()
+        outcomes = list(crew.generate_batch(jobs, max_concurrency=level, parallel=parallel))
+        elapsed = time.perf_counter() - started
+        throughput = len(jobs) / elapsed
+        baseline = baseline or throughput
+        results[str(level)] = {
+            "jobs": len(jobs),
+            "failed": sum(1 for outcome in outcomes if "error" in outcome),
+            "seconds": round(elapsed, 3),
+            "jobs_per_minute": round(throughput * 60, 2),
+            "speedup": round(throughput / baseline, 2),
+            "efficiency": round(throughput / baseline / (level / levels[0]), 2)
+        }
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmark with stub LLM and search")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--content-type", default="Blog Post")
+    parser.add_argument("--profile", default=None, help="Pipeline profile, e.g. full or lite")
+    parser.add_argument("--parallel", action="store_true", help="Use the task-graph scheduler")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub LLM seconds per call")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Stub streaming rate (0: instant)")
+    parser.add_argument("--response-words", type=int, default=400)
+    parser.add_argument("--search-latency", type=float, default=0.05)
+    parser.add_argument("--search-words", type=int, default=200)
+    parser.add_argument("--concurrency", default="1,2,4", help="Comma-separated batch concurrency levels")
+    parser.add_argument("--jobs-per-worker", type=int, default=2)
+    parser.add_argument("--json", metavar="PATH", help="Append the results to a JSONL file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        crew = configure(args, workdir)
+        levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+        record = {
+            "benchmark": "pipeline",
+            "commit": _git_commit(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "config": {key: value for key, value in vars(args).items() if key != "json"},
+            "end_to_end": run_end_to_end(crew, args.runs, args.content_type, args.parallel, args.profile),
+            "memory": measure_memory(crew, args.content_type, args.parallel, args.profile),
+            "concurrency": run_concurrency_scaling(crew, levels, args.jobs_per_worker, args.content_type, args.parallel)
+        }
+
+    e2e = record["end_to_end"]
+    print(f"End to end: {e2e['median_seconds_per_run']:.3f}s per run ({e2e['runs_per_minute']} runs/min), "
+          f"{e2e['total_overhead_seconds']:.3f}s outside LLM calls")
+    for stage, seconds in e2e["stage_overhead_seconds"].items():
+        print(f"  {stage:<14} overhead {seconds:.4f}s")
+    print(f"Memory: {record['memory']}")
+    for level, result in record["concurrency"].items():
+        print(f"Concurrency {level:>2}: {result['jobs_per_minute']} jobs/min, "
+              f"speedup {result['speedup']}x, efficiency {result['efficiency']}")
+
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Micro-benchmark of quality scoring on 2,000-word markdown articles.
+
+Articles are generated deterministically from a vocabulary of `--vocabulary`
+made-up words, with headings, lists, code blocks, URLs and decimals, so the
+syllable memo sees a realistic number of distinct words. Run from the
+repository root:
+
+    python -m benchmarks.scorer_benchmark --docs 200 --words 2000 --json scorer.jsonl
+
+Reported, in milliseconds per document (median over `--repeat` passes):
+- readability_cold: readability indices with an empty syllable cache
+- readability: readability indices with the cache warm
+- score_content: full score, one document at a time
+- score_batch: full score of all documents in one call, per document
+"""
+import os
+import json
+import time
+import random
+import argparse
+import statistics
+import subprocess
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from quality_scorer import ContentQualityScorer
+from readability import count_syllables, readability_metrics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SYLLABLES = ["ka", "lo", "mi", "ter", "stra", "ple", "ven", "dor", "qui", "an", "sen", "tion", "ble", "ex"]
+
+
+def vocabulary(size: int, rng: random.Random) -> List[str]:
+    return ["".join(rng.choice(_SYLLABLES) for _ in range(rng.choice([1, 1, 2, 2, 3, 4]))) for _ in range(size)]
+
+
+def article(words: int, vocab: List[str], rng: random.Random) -> str:
+    """About `words` words of markdown with the constructs the segmenter skips"""
+    parts = ["# " + " ".join(rng.sample(vocab, 4)).title(), ""]
+    written = 0
+    while written < words:
+        roll = rng.random()
+        if roll < 0.05:
+            parts += ["", "## " + " ".join(rng.sample(vocab, 3)).title(), ""]
+        elif roll < 0.10:
+            parts += [f"- {' '.join(rng.sample(vocab, 6))}" for _ in range(3)]
+            written += 18
+        elif roll < 0.12:
+            parts += ["```python", "value = compute(3.5)  # not prose. at all", "```"]
+        else:
+            length = rng.randint(8, 28)
+            sentence = " ".join(rng.choice(vocab) for _ in range(length)).capitalize()
+            if roll < 0.2:
+                sentence += f" at {rng.randint(1, 99)}.{rng.randint(0, 9)} percent per https://example.com/{length}"
+            parts.append(sentence + rng.choice([".", ".", ".", "?", "!"]))
+            written += length
+    return "\n".join(parts)
+
+
+def per_document_ms(fn: Callable[[], None], documents: int, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) / documents * 1000, 4)
+
+
+def run(docs: List[str], repeat: int) -> Dict:
+    scorer = ContentQualityScorer()
+
+    def cold():
+        count_syllables.cache_clear()
+        for doc in docs:
+            readability_metrics(doc)
+
+    results = {
+        "readability_cold": per_document_ms(cold, len(docs), repeat),
+        "readability": per_document_ms(lambda: [readability_metrics(doc) for doc in docs], len(docs), repeat),
+        "score_content": per_document_ms(lambda: [scorer.score_content(doc, "example") for doc in docs],
+                                         len(docs), repeat),
+        "score_batch": per_document_ms(lambda: scorer.score_batch(docs, "example"), len(docs), repeat)
+    }
+    info = count_syllables.cache_info()
+    results["syllable_cache"] = {"size": info.currsize, "hits": info.hits, "misses": info.misses}
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quality scorer micro-benchmark")
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--words", type=int, default=2000)
+    parser.add_argument("--vocabulary", type=int, default=5000, help="Distinct words across all articles")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="Append the results to a JSONL file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocab = vocabulary(args.vocabulary, rng)
+    docs = [article(args.words, vocab, rng) for _ in range(args.docs)]
+    record = {
+        "benchmark": "scorer",
+        "commit": _git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "config": {key: value for key, value in vars(args).items() if key != "json"},
+        "ms_per_document": run(docs, args.repeat)
+    }
+
+    for name, value in record["ms_per_document"].items():
+        print(f"{name:<18} {value if isinstance(value, dict) else f'{value:.3f} ms/doc'}")
+
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Cold-start benchmark: module import times and time to the first rendered page.
+
+Every measurement runs in a fresh interpreter so nothing is already imported.
+Run from the repository root:
+
+    python benchmarks/startup_benchmark.py --repeat 5 --json startup.jsonl
+
+`--json` appends one record per run (with the git commit) so results can be
+tracked across commits. The Streamlit page is rendered with
+`streamlit.testing.v1.AppTest`, i.e. without a browser or server.
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ["content_generation_crew", "worker", "job_queue", "auth"]
+
+# Importing any of these at startup is a regression
+HEAVY_MODULES = ["crewai", "langchain_openai", "langchain_community", "custom_tools"]
+
+_IMPORT_SNIPPET = """
+import sys, time, json
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+_PAGE_SNIPPET = """
+import time, json
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({app!r}, default_timeout=120).run()
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "error": app.exception[0].message if app.exception else None}}))
+"""
+
+
+def _run(snippet: str, cwd: str, env: Dict[str, str]) -> Dict:
+    result = subprocess.run(
+        [sys.executable, "-c", snippet], cwd=cwd, env=env,
+        capture_output=True, text=True, check=True
+    )
+    # The measurement is the last line; logging may print before it
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _env(**overrides) -> Dict[str, str]:
+    env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    env.setdefault("DEEPSEEK_API_KEY", "sk-benchmark")
+    env.update(overrides)
+    return env
+
+
+def measure_import(module: str, repeat: int = 3) -> Dict:
+    """Median cold import time of `module`, and any heavy modules it pulled in"""
+    with tempfile.TemporaryDirectory() as workdir:
+        runs = [_run(_IMPORT_SNIPPET.format(module=module, heavy=HEAVY_MODULES), workdir, _env())
+                for _ in range(repeat)]
+    return {
+        "median_seconds": round(statistics.median(r["seconds"] for r in runs), 3),
+        "heavy_imports": runs[0]["heavy"]
+    }
+
+
+def measure_first_page(repeat: int = 3, auth: bool = True) -> Dict:
+    """Median time from a cold interpreter to the first rendered page (the login form with auth on)"""
+    overrides = {} if auth else {"ENABLE_AUTH": "false"}
+    runs = []
+    for _ in range(repeat):
+        # A fresh directory each time so auth config and databases are created from scratch
+        with tempfile.TemporaryDirectory() as workdir:
+            runs.append(_run(_PAGE_SNIPPET.format(app=os.path.join(ROOT, "app.py")), workdir, _env(**overrides)))
+    return {
+        "median_seconds": round(statistics.median(r["seconds"] for r in runs), 3),
+        "error": runs[0]["error"]
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def run_benchmark(repeat: int = 3, modules: List[str] = None, auth: bool = True) -> Dict:
+    return {
+        "benchmark": "startup",
+        "commit": _git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "imports": {module: measure_import(module, repeat) for module in modules or MODULES},
+        "first_page": measure_first_page(repeat, auth=auth)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and time to the first page")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-auth", action="store_true", help="Render the main page instead of the login form")
+    parser.add_argument("--json", metavar="PATH", help="Append the results to a JSONL file")
+    args = parser.parse_args()
+
+    record = run_benchmark(args.repeat, auth=not args.no_auth)
+    for module, result in record["imports"].items():
+        heavy = f"  (pulls in: {', '.join(result['heavy_imports'])})" if result["heavy_imports"] else ""
+        print(f"import {module:<26} {result['median_seconds']:>7.3f}s{heavy}")
+    page = record["first_page"]
+    print(f"{'first page':<33} {page['median_seconds']:>7.3f}s" + (f"  (error: {page['error']})" if page["error"] else ""))
+
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Disk use and read latency of delta-compressed version storage.
+
+Simulates `--topics` topics regenerated `--versions` times each, every
+regeneration rewriting `--changed` paragraphs of a ~`--words`-word article,
+and stores them with `ContentVersionControl` and in the previous full-copy
+layout (plain text per row, same unique index). Run from the repository root:
+
+    python -m benchmarks.storage_benchmark --topics 50 --versions 20 --json storage.jsonl
+
+Reported: database size per layout, and `get_version` latency for random
+versions with an empty cache (the whole chain decoded) and with the LRU
+cache in use, next to a plain row read in the full-copy layout; and
+`save_version` latency for a text already in the archive (a pointer to its
+blob) and for a new one, and the `has_content` lookup.
+"""
+import os
+import json
+import itertools
+import time
+import random
+import sqlite3
+import argparse
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import content_versioning
+from content_versioning import ContentVersionControl
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_WORDS = ("solar grid storage policy market growth capacity research data analysis trend adoption cost "
+          "efficiency innovation industry report customers strategy impact future technology").split()
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def paragraph(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def regenerations(rng: random.Random, versions: int, words: int, changed: int) -> List[str]:
+    """Successive versions of one article, each rewriting `changed` paragraphs of the last"""
+    paragraphs = [f"## Section {i}\n\n{paragraph(rng, 60)}" for i in range(max(1, words // 60))]
+    texts = []
+    for _ in range(versions):
+        texts.append("# Article\n\n" + "\n\n".join(paragraphs))
+        for index in rng.sample(range(len(paragraphs)), min(changed, len(paragraphs))):
+            paragraphs[index] = f"## Section {index}\n\n{paragraph(rng, 60)}"
+    return texts
+
+
+def db_size_mb(db_path: str) -> float:
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("VACUUM")
+    return round(os.path.getsize(db_path) / 2**20, 2)
+
+
+def full_copy_layout(db_path: str, archive: Dict[str, List[str]]) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+    CREATE TABLE content_versions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, content_id TEXT NOT NULL, version INTEGER NOT NULL,
+        content TEXT NOT NULL, content_hash TEXT NOT NULL, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        word_count INTEGER
+    )
+    """)
+    conn.execute("CREATE UNIQUE INDEX idx_versions_content ON content_versions (content_id, version)")
+    conn.executemany(
+        "INSERT INTO content_versions (content_id, version, content, content_hash, word_count) VALUES (?, ?, ?, '', ?)",
+        [(topic, n + 1, text, len(text.split())) for topic, texts in archive.items() for n, text in enumerate(texts)]
+    )
+    conn.commit()
+    return conn
+
+
+def latency(fn: Callable[[str, int], None], keys: List[tuple], before: Callable[[], None] = None) -> Dict[str, float]:
+    timings = []
+    for topic, version in keys:
+        if before:
+            before()
+        started = time.perf_counter()
+        fn(topic, version)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {"median_ms": round(statistics.median(timings), 3), "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delta-compressed version storage benchmark")
+    parser.add_argument("--topics", type=int, default=50)
+    parser.add_argument("--versions", type=int, default=20, help="Regenerations per topic")
+    parser.add_argument("--words", type=int, default=1500)
+    parser.add_argument("--changed", type=int, default=3, help="Paragraphs rewritten per regeneration")
+    parser.add_argument("--max-chain", type=int, default=10)
+    parser.add_argument("--samples", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="Append the results to a JSONL file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    archive = {f"Topic {i}": regenerations(rng, args.versions, args.words, args.changed) for i in range(args.topics)}
+    text_mb = round(sum(len(text.encode("utf-8")) for texts in archive.values() for text in texts) / 2**20, 2)
+    keys = [(rng.choice(list(archive)), rng.randint(1, args.versions)) for _ in range(args.samples)]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        vc = ContentVersionControl(os.path.join(workdir, "delta.db"), max_chain=args.max_chain)
+        started = time.perf_counter()
+        for topic, texts in archive.items():
+            vc.save_versions([{"content_id": topic, "content": text} for text in texts])
+        save_seconds = time.perf_counter() - started
+
+        edits = (f"\n\nEdit {n}." for n in itertools.count())
+        full = full_copy_layout(os.path.join(workdir, "full.db"), archive)
+
+        def read_full(topic: str, version: int):
+            full.execute("SELECT content FROM content_versions WHERE content_id = ? AND version = ?",
+                         (topic, version)).fetchone()
+
+        record = {
+            "benchmark": "storage",
+            "commit": _git_commit(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "config": {key: value for key, value in vars(args).items() if key != "json"},
+            "text_mb": text_mb,
+            "delta": {
+                "db_mb": db_size_mb(vc.db_path),
+                "storage": vc.storage_stats(),
+                "save_ms_per_version": round(save_seconds / (args.topics * args.versions) * 1000, 3),
+                "get_version_cold": latency(vc.get_version, keys, before=content_versioning._texts.clear),
+                "get_version_cached": latency(vc.get_version, keys),
+                "save_duplicate": latency(lambda topic, version: vc.save_version(topic, archive[topic][version - 1]), keys),
+                "save_new": latency(lambda topic, version: vc.save_version(topic, archive[topic][version - 1] + next(edits)),
+                                    keys),
+                "has_content": latency(lambda topic, version: vc.has_content(archive[topic][version - 1]), keys)
+            },
+            "full_copy": {
+                "db_mb": db_size_mb(os.path.join(workdir, "full.db")),
+                "read": latency(read_full, keys)
+            }
+        }
+        full.close()
+        vc.pool.close()
+
+    delta, full_copy = record["delta"], record["full_copy"]
+    print(f"Article text: {text_mb} MB in {args.topics * args.versions} versions")
+    print(f"Delta layout: {delta['db_mb']} MB ({delta['storage']['keyframes']} keyframes, "
+          f"{delta['storage']['deltas']} deltas); full copies: {full_copy['db_mb']} MB")
+    print(f"Read: cold {delta['get_version_cold']['median_ms']:.3f} ms, cached {delta['get_version_cached']['median_ms']:.3f} ms, "
+          f"full copy {full_copy['read']['median_ms']:.3f} ms (median)")
+    print(f"Save: duplicate {delta['save_duplicate']['median_ms']:.3f} ms, new {delta['save_new']['median_ms']:.3f} ms; "
+          f"has_content {delta['has_content']['median_ms']:.3f} ms (median)")
+
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
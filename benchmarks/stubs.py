@@ -0,0 +1,129 @@
+"""
+Deterministic local stand-ins for the DeepSeek LLM and the web search client.
+
+Both have configurable latency and response size, so the pipeline can be
+benchmarked without network access or API credits. Output depends only on
+the prompt, which keeps runs comparable across commits.
+"""
+import re
+import time
+import hashlib
+from typing import Any, Dict, Iterator, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_WORDS = (
+    "energy solar grid storage policy market growth capacity research data analysis "
+    "trend adoption cost efficiency innovation industry report customers strategy "
+    "impact future technology investment demand supply network regional global"
+).split()
+
+
+def _seed(text: str) -> int:
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def lorem(words: int, seed: int = 0) -> str:
+    """`words` words of deterministic markdown prose, with a heading every ~120 words"""
+    lines = []
+    sentence = []
+    for i in range(words):
+        if i % 120 == 0:
+            if sentence:
+                lines.append(" ".join(sentence) + ".")
+                sentence = []
+            lines.append(f"\n## Section {i // 120 + 1}\n")
+        sentence.append(_WORDS[(seed + i * 7) % len(_WORDS)])
+        if len(sentence) == 15:
+            lines.append(" ".join(sentence).capitalize() + ".")
+            sentence = []
+    if sentence:
+        lines.append(" ".join(sentence).capitalize() + ".")
+    return "\n".join(lines).strip()
+
+
+class StubChatModel(BaseChatModel):
+    """
+    Chat model that answers after `latency` seconds with `response_words` words.
+
+    With `tokens_per_second` set, the answer is streamed word by word at that
+    rate. When the prompt offers `search_tool`, the first `search_calls`
+    replies ask for a search in CrewAI's ReAct format so tool dispatch is
+    exercised as well.
+    """
+
+    latency: float = 0.0
+    tokens_per_second: float = 0.0
+    response_words: int = 400
+    search_calls: int = 1
+    streaming: bool = True
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-chat"
+
+    def _reply(self, messages: List[BaseMessage]) -> str:
+        prompt = "\n".join(str(m.content) for m in messages)
+        if "search_tool" in prompt and prompt.count("Observation:") < self.search_calls:
+            topic = re.search(r'topic: "?([^"\n]+)', prompt, re.IGNORECASE)
+            query = topic.group(1).strip() if topic else "latest developments"
+            return ("Thought: I should look this up.\nAction: search_tool\n"
+                    f'Action Input: {{"query": "{query} {prompt.count("Observation:") + 1}"}}')
+        return "Thought: I now know the final answer\nFinal Answer: " + lorem(self.response_words, _seed(prompt))
+
+    def _usage(self, messages: List[BaseMessage], text: str) -> Dict[str, int]:
+        prompt_tokens = sum(len(str(m.content)) for m in messages) // 4
+        completion_tokens = len(text) // 4
+        return {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        text = self._reply(messages)
+        time.sleep(self.latency)
+        if self.tokens_per_second:
+            time.sleep(len(text.split()) / self.tokens_per_second)
+        usage = self._usage(messages, text)
+        message = AIMessage(content=text, usage_metadata=usage)
+        return ChatResult(
+            generations=[ChatGeneration(message=message)],
+            llm_output={
+                "model_name": "stub",
+                "token_usage": {"prompt_tokens": usage["input_tokens"], "completion_tokens": usage["output_tokens"]}
+            }
+        )
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        text = self._reply(messages)
+        time.sleep(self.latency)
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            if self.tokens_per_second:
+                time.sleep(1 / self.tokens_per_second)
+            token = word if i == 0 else " " + word
+            last = i == len(words) - 1
+            chunk = ChatGenerationChunk(message=AIMessageChunk(
+                content=token, usage_metadata=self._usage(messages, text) if last else None
+            ))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+class StubSearch:
+    """Search client (`run(query)`) returning `result_words` words after `latency` seconds"""
+
+    def __init__(self, latency: float = 0.0, result_words: int = 200):
+        self.latency = latency
+        self.result_words = result_words
+        self.calls = 0
+
+    def run(self, query: str) -> str:
+        self.calls += 1
+        time.sleep(self.latency)
+        return f"Results for {query}:\n" + lorem(self.result_words, _seed(query))
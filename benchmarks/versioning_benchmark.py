@@ -0,0 +1,154 @@
+"""
+Latency of saving versions and reading history in a large `content_versions` table.
+
+The database is filled with `--rows` versions spread over `--topics` topics
+using `save_versions`, then single `save_version` and `get_history` calls are
+timed on random topics. The same calls are timed on a copy of the database
+in the previous layout: no index on (content_id, version), rollback journal,
+and a new connection per call. `get_history_page` and full-text `search`
+are timed for the first page: searches for a word found in one version
+(selective), for a word found in every version plus a topic (broad) and
+for a word found in every version within one topic (topic). Run from the repository root:
+
+    python -m benchmarks.versioning_benchmark --rows 100000 --json versioning.jsonl
+"""
+import os
+import json
+import time
+import random
+import shutil
+import sqlite3
+import hashlib
+import argparse
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from content_versioning import ContentVersionControl
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def latency(fn: Callable[[str], None], topics: List[str], samples: int, rng: random.Random) -> Dict[str, float]:
+    timings = []
+    for _ in range(samples):
+        topic = rng.choice(topics)
+        started = time.perf_counter()
+        fn(topic)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3)
+    }
+
+
+def populate(vc: ContentVersionControl, rows: int, topics: List[str], words: int, batch: int,
+             rng: random.Random) -> float:
+    """Insert `rows` versions with `save_versions` and return rows per second"""
+    text = " ".join(["lorem"] * words)
+    started = time.perf_counter()
+    for offset in range(0, rows, batch):
+        vc.save_versions([
+            {"content_id": rng.choice(topics), "content": f"{i} {text}"}
+            for i in range(offset, min(rows, offset + batch))
+        ])
+    return round(rows / (time.perf_counter() - started), 1)
+
+
+def legacy_layout(db_path: str) -> str:
+    """Copy of the database without the unique index, in rollback-journal mode"""
+    legacy = db_path.replace(".db", "-legacy.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    shutil.copy(db_path, legacy)
+    with sqlite3.connect(legacy) as conn:
+        conn.execute("DROP INDEX idx_versions_content")
+        conn.execute("PRAGMA journal_mode=DELETE")
+    return legacy
+
+
+def legacy_save(db_path: str, content_id: str, content: str):
+    with sqlite3.connect(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT MAX(version) FROM content_versions WHERE content_id = ?", (content_id,))
+        new_version = (cursor.fetchone()[0] or 0) + 1
+        cursor.execute("""
+        INSERT INTO content_versions (content_id, version, content, content_hash, word_count)
+        VALUES (?, ?, ?, ?, ?)
+        """, (content_id, new_version, content, hashlib.md5(content.encode()).hexdigest(), len(content.split())))
+        conn.commit()
+
+
+def legacy_history(db_path: str, content_id: str) -> List[Dict]:
+    with sqlite3.connect(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT version, created_at, word_count FROM content_versions "
+                       "WHERE content_id = ? ORDER BY version DESC", (content_id,))
+        return [{"version": r[0], "date": r[1], "words": r[2]} for r in cursor.fetchall()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Version storage latency at scale")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--topics", type=int, default=1000)
+    parser.add_argument("--words", type=int, default=200, help="Words per stored version")
+    parser.add_argument("--batch", type=int, default=1000, help="Versions per save_versions call while filling")
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="Append the results to a JSONL file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    topics = [f"Topic {i}" for i in range(args.topics)]
+    text = " ".join(["lorem"] * args.words)
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, "content_versions.db")
+        vc = ContentVersionControl(db_path)
+        fill_rate = populate(vc, args.rows, topics, args.words, args.batch, rng)
+        legacy = legacy_layout(db_path)
+        record = {
+            "benchmark": "versioning",
+            "commit": _git_commit(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "config": {key: value for key, value in vars(args).items() if key != "json"},
+            "bulk_insert_rows_per_second": fill_rate,
+            "pooled": {
+                "save_version": latency(lambda topic: vc.save_version(topic, text), topics, args.samples, rng),
+                "get_history": latency(vc.get_history, topics, args.samples, rng),
+                "get_history_page": latency(vc.get_history_page, topics, args.samples, rng),
+                "search_selective": latency(lambda topic: vc.search(str(rng.randrange(args.rows))), topics,
+                                            args.samples, rng),
+                "search_broad": latency(lambda topic: vc.search(f"lorem {topic}"), topics, args.samples, rng),
+                "search_topic": latency(lambda topic: vc.search("lorem", content_id=topic), topics, args.samples, rng)
+            },
+            "legacy": {
+                "save_version": latency(lambda topic: legacy_save(legacy, topic, text), topics, args.samples, rng),
+                "get_history": latency(lambda topic: legacy_history(legacy, topic), topics, args.samples, rng)
+            },
+            "db_mb": round(os.path.getsize(db_path) / 2**20, 1)
+        }
+        vc.pool.close()
+
+    print(f"Filled {args.rows} rows at {fill_rate} rows/s ({record['db_mb']} MB)")
+    for layout in ("pooled", "legacy"):
+        for call, result in record[layout].items():
+            print(f"{layout:<7} {call:<16} median {result['median_ms']:.3f} ms, p95 {result['p95_ms']:.3f} ms")
+
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import os
+import json
+import uuid
+import hashlib
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict
+
+
+class CheckpointStore:
+    """
+    Persist each pipeline stage's output as it completes, keyed by run id.
+
+    Outputs are tagged with a fingerprint of the run's topic, content type and
+    profile, and only load for a run with the same fingerprint, so a reused
+    run id never feeds stages from an unrelated run.
+    """
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or os.getenv("CHECKPOINT_DB", "checkpoints.db")
+        self._create_tables()
+
+    def _create_tables(self):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS stage_checkpoints (
+                run_id TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                output TEXT NOT NULL,
+                fingerprint TEXT NOT NULL DEFAULT '',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (run_id, stage)
+            )
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(stage_checkpoints)")}
+            if "fingerprint" not in columns:
+                conn.execute("ALTER TABLE stage_checkpoints ADD COLUMN fingerprint TEXT NOT NULL DEFAULT ''")
+            conn.commit()
+
+    @staticmethod
+    def new_run_id() -> str:
+        return uuid.uuid4().hex
+
+    @staticmethod
+    def fingerprint(topic: str, content_type: str, profile: str) -> str:
+        return hashlib.sha256(json.dumps([topic, content_type, profile]).encode("utf-8")).hexdigest()
+
+    def save(self, run_id: str, stage: str, output: str, fingerprint: str = ""):
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO stage_checkpoints (run_id, stage, output, fingerprint) VALUES (?, ?, ?, ?)",
+                (run_id, stage, output, fingerprint)
+            )
+            conn.commit()
+
+    def load(self, run_id: str, fingerprint: str = "") -> Dict[str, str]:
+        """Return {stage: output} for every stage completed in a run with this fingerprint"""
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            rows = conn.execute("SELECT stage, output FROM stage_checkpoints WHERE run_id = ? AND fingerprint = ?",
+                                (run_id, fingerprint))
+            return {stage: output for stage, output in rows}
+
+    def delete(self, run_id: str):
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            conn.execute("DELETE FROM stage_checkpoints WHERE run_id = ?", (run_id,))
+            conn.commit()
+
+    def purge(self, older_than: timedelta = timedelta(days=7)) -> int:
+        cutoff = (datetime.utcnow() - older_than).strftime("%Y-%m-%d %H:%M:%S")
+        with sqlite3.connect(self.db_path, timeout=30) as conn:
+            cursor = conn.execute("DELETE FROM stage_checkpoints WHERE created_at < ?", (cutoff,))
+            conn.commit()
+            return cursor.rowcount
@@ -1,10 +1,27 @@
 import os
-from typing import List, Dict
-from crewai import Agent, Task, Crew, Process
-from langchain_openai import ChatOpenAI
-from custom_tools import search_tool
+import threading
+import contextvars
+from contextlib import nullcontext
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Any, List, Dict, Callable, Iterable, Iterator, Optional, Tuple
 from dotenv import load_dotenv
 from logger import log_progress
+from task_scheduler import TaskGraphScheduler, CONTEXT_DIVIDER
+from context_compactor import ContextCompactor
+from pipeline_profiles import get_profile, plan_stages
+from model_routing import DEFAULT, ModelRouter, load_agent_llm_config, resolve
+from checkpoints import CheckpointStore
+from content_versioning import ContentVersionControl, REUSABLE_STAGES
+from progress import ProgressReporter, LLMStreamRelay, relay_step
+from hedging import get_hedge_policy
+from metrics import RunMetrics, LLMMetricsRelay, registry, write_run_metrics
+
+# crewai, langchain_openai and the search tool are slow to import, so they are
+# imported where first needed rather than at module import time
+if TYPE_CHECKING:
+    from crewai import Agent, Task
+    from langchain_openai import ChatOpenAI
 
 # Load environment variables
 load_dotenv()
@@ -17,27 +34,120 @@ if api_key:
 else:
     log_progress("WARNING: DEEPSEEK_API_KEY not found in .env")
 
-# Configure DeepSeek LLM
-deepseek_llm = ChatOpenAI(
-    model="deepseek-chat",
-    openai_api_key=api_key,
-    openai_api_base="https://api.deepseek.com/v1",
-    temperature=0.7,
-    max_tokens=4000
-)
+_llms: Dict[Tuple, "ChatOpenAI"] = {}
+_llm_lock = threading.Lock()
+
+
+def get_llm(
+    model: str = "deepseek-chat",
+    temperature: float = 0.7,
+    max_tokens: int = 4000,
+    timeout: Optional[float] = None
+) -> "ChatOpenAI":
+    """The shared DeepSeek LLM client for these settings, configured on first use"""
+    key = (model, temperature, max_tokens, timeout)
+    with _llm_lock:
+        if key not in _llms:
+            from rate_limiter import RateLimitedChatOpenAI
+            # Calls are throttled, retried and concurrency-limited by the shared rate limiter
+            _llms[key] = RateLimitedChatOpenAI(
+                model=model,
+                openai_api_key=api_key,
+                # Point at a local replay server (replay_server.py) for load tests
+                openai_api_base=os.getenv("DEEPSEEK_API_BASE", "https://api.deepseek.com/v1"),
+                temperature=temperature,
+                max_tokens=max_tokens,
+                timeout=timeout,
+                max_retries=0,
+                # Tokens are streamed so the UI can show the draft as it is written
+                streaming=True,
+                stream_usage=True,
+                callbacks=[LLMStreamRelay(), LLMMetricsRelay()]
+            )
+        return _llms[key]
+
+
+def __getattr__(name: str):
+    # `deepseek_llm` used to be created at import time; keep it importable
+    if name == "deepseek_llm":
+        return get_llm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 class ContentGenerationCrew:
     """Multi-agent content generation system"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        cached_agents: Optional[Iterable[str]] = None,
+        llm: Optional["ChatOpenAI"] = None,
+        agent_llm_config: Optional[Dict[str, Dict]] = None
+    ):
+        """
+        `cached_agents` lists the agents (e.g. "researcher", "seo_specialist") whose
+        LLM calls go through the on-disk response cache. Defaults to the
+        comma-separated LLM_CACHE_AGENTS environment variable; empty disables caching.
+
+        `llm` replaces the shared DeepSeek client for this crew, e.g. with a local
+        stub for benchmarks.
+
+        `agent_llm_config` overrides the per-agent model, temperature, max_tokens
+        and timeout (and their "fast" variants) from `model_routing.AGENT_LLM_CONFIG`.
+        """
         log_progress("Initializing ContentGenerationCrew...")
-        self.llm = deepseek_llm
-        self.agents = self._create_agents()
+        self._llm = llm
+        if cached_agents is None:
+            cached_agents = [a.strip() for a in os.getenv("LLM_CACHE_AGENTS", "").split(",") if a.strip()]
+        self.cached_agents = set(cached_agents)
+        self.response_cache = None
+        if self.cached_agents:
+            from llm_cache import get_response_cache
+            self.response_cache = get_response_cache()
+        self._cached_llms: Dict[int, "ChatOpenAI"] = {}
+        self.agent_llm_config = load_agent_llm_config(agent_llm_config)
+        self.router = ModelRouter(self.agent_llm_config)
+        # Agents (and the LLM clients) are created on first use, keeping startup fast
+        self._agent_sets: Dict[Tuple, Dict[str, "Agent"]] = {}
+        self._agents_lock = threading.Lock()
+        self.checkpoints = CheckpointStore()
+        self._worker_state = threading.local()
         log_progress("ContentGenerationCrew initialized.")
         
-    def _create_agents(self) -> Dict[str, Agent]:
+    @property
+    def llm(self) -> "ChatOpenAI":
+        return self._llm or get_llm()
+    
+    @property
+    def agents(self) -> Dict[str, "Agent"]:
+        """The crew's agents with their default LLM settings, created on first access"""
+        return self._agents_for()
+    
+    def _agents_for(self, variants: Optional[Dict[str, str]] = None) -> Dict[str, "Agent"]:
+        """Agents using the given LLM variant per agent ("default" or "fast")"""
+        key = tuple(sorted((agent, v) for agent, v in (variants or {}).items() if v != DEFAULT))
+        with self._agents_lock:
+            if key not in self._agent_sets:
+                self._agent_sets[key] = self._create_agents(dict(key)) if key else self._create_agents()
+            return self._agent_sets[key]
+    
+    def _llm_for(self, agent_name: str, variant: str = DEFAULT) -> "ChatOpenAI":
+        """LLM for an agent: its configured client, through the response cache if the agent opted in"""
+        if self._llm is not None:
+            llm = self._llm
+        else:
+            llm = get_llm(**resolve(self.agent_llm_config[agent_name], variant))
+        if agent_name in self.cached_agents:
+            if id(llm) not in self._cached_llms:
+                self._cached_llms[id(llm)] = llm.model_copy(update={"cache": self.response_cache})
+            return self._cached_llms[id(llm)]
+        return llm
+    
+    def _create_agents(self, variants: Optional[Dict[str, str]] = None) -> Dict[str, "Agent"]:
         """Create specialized content agents"""
+        from crewai import Agent
+        from custom_tools import search_tool
         
+        variants = variants or {}
         log_progress("Creating agents...")
         # 1. Research Analyst
         researcher = Agent(
@@ -49,7 +159,7 @@ class ContentGenerationCrew:
             synthesizing complex data into clear insights. You never cite unverified 
             information and always provide source URLs.""",
             tools=[search_tool],
-            llm=self.llm,
+            llm=self._llm_for('researcher', variants.get('researcher', DEFAULT)),
             verbose=True,
             allow_delegation=False,
             memory=False
@@ -65,7 +175,7 @@ class ContentGenerationCrew:
             accessible. You excel at storytelling, using compelling hooks, and maintaining 
             reader interest throughout. You always write in active voice and use concrete 
             examples.""",
-            llm=self.llm,
+            llm=self._llm_for('writer', variants.get('writer', DEFAULT)),
             verbose=True,
             allow_delegation=False,
             memory=False
@@ -80,7 +190,7 @@ class ContentGenerationCrew:
             for clarity, flow, and impact. You improve structure, enhance readability, 
             eliminate redundancy, and ensure every sentence adds value. You catch 
             grammatical errors, awkward phrasing, and logical inconsistencies.""",
-            llm=self.llm,
+            llm=self._llm_for('editor', variants.get('editor', DEFAULT)),
             verbose=True,
             allow_delegation=False,
             memory=False
@@ -96,7 +206,7 @@ class ContentGenerationCrew:
             and flag anything that seems questionable. You provide corrections with 
             proper citations.""",
             tools=[search_tool],
-            llm=self.llm,
+            llm=self._llm_for('fact_checker', variants.get('fact_checker', DEFAULT)),
             verbose=True,
             allow_delegation=False,
             memory=False
@@ -111,7 +221,7 @@ class ContentGenerationCrew:
             of websites rank #1 for competitive keywords. You optimize headlines, meta 
             descriptions, keyword placement, and content structure. You balance SEO best 
             practices with user experience.""",
-            llm=self.llm,
+            llm=self._llm_for('seo_specialist', variants.get('seo_specialist', DEFAULT)),
             verbose=True,
             allow_delegation=False,
             memory=False
@@ -126,13 +236,62 @@ class ContentGenerationCrew:
             'seo_specialist': seo_specialist
         }
     
-    def _create_tasks(self, topic: str, content_type: str = "blog_post") -> List[Task]:
-        """Create content generation tasks"""
+    def _create_tasks(
+        self,
+        topic: str,
+        content_type: str = "blog_post",
+        parallel: bool = False,
+        agents: Optional[Dict[str, "Agent"]] = None,
+        profile: Optional[str] = None
+    ) -> List["Task"]:
+        """
+        Create content generation tasks for the content type's pipeline profile.
+
+        The profile decides which stages run, which are merged into a single
+        task, their order and the length target. With `parallel=True` the SEO
+        stage is split so that keyword and metadata research runs alongside
+        fact-checking instead of waiting for it.
+        """
+        
+        from crewai import Task
+        
+        agents = agents or self.agents
+        _, pipeline = get_profile(content_type, profile)
+        specs = self._stage_specs(topic, content_type, pipeline["length"])
+        
+        tasks: Dict[str, "Task"] = {}
+        for stage in plan_stages(pipeline, parallel=parallel):
+            members = [specs[member] for member in stage["members"]]
+            if len(members) == 1:
+                description = members[0]["description"]
+            else:
+                description = "Complete all of the following steps in a single response.\n" + "\n".join(
+                    f"\nStep {i} ({member}):\n{spec['description']}"
+                    for i, (member, spec) in enumerate(zip(stage["members"], members), 1)
+                )
+            tasks[stage["name"]] = Task(
+                name=stage["name"],
+                description=description,
+                # A merged task delivers what its last step delivers
+                expected_output=members[-1]["expected_output"],
+                agent=agents[stage["agent"]],
+                context=[tasks[name] for name in stage["context"]]
+            )
+        return list(tasks.values())
+    
+    def _stage_specs(
+        self,
+        topic: str,
+        content_type: str,
+        length: Tuple[int, int]
+    ) -> Dict[str, Dict]:
+        """Description and expected output for every base stage"""
         
-        agents = self.agents
+        min_words, max_words = length
+        specs = {}
         
         # Task 1: Research
-        research_task = Task(
+        specs["research"] = dict(
             description=f"""
             Conduct comprehensive research on the topic: "{topic}"
             
@@ -180,12 +339,11 @@ class ContentGenerationCrew:
             1. [Full source citation with URL]
             2. [Full source citation with URL]
             ... (All sources used)
-            """,
-            agent=agents['researcher']
+            """
         )
         
         # Task 2: Content Outlining
-        outline_task = Task(
+        specs["outline"] = dict(
             description=f"""
             Based on the research findings, create a detailed content outline.
             
@@ -204,96 +362,392 @@ class ContentGenerationCrew:
             
             # Content Outline: [Title]
             ...
-            """,
-            agent=agents['writer'],
-            context=[research_task]
+            """
         )
         
         # Task 3: Content Writing
-        write_task = Task(
+        specs["write"] = dict(
             description=f"""
             Write a complete, engaging {content_type} based on the outline and research.
             
-            Length: Aim for 1500-2000 words
+            Length: Aim for {min_words}-{max_words} words
             Format: Markdown with proper headers, lists, and emphasis
             """,
             expected_output="""
             A complete, polished article in markdown format.
-            """,
-            agent=agents['writer'],
-            context=[research_task, outline_task]
+            """
         )
         
         # Task 4: Editing
-        edit_task = Task(
+        specs["edit"] = dict(
             description="""
             Edit the content to perfection. Focus on Structure, Clarity, Engagement, and Technical correctness.
             """,
             expected_output="""
             Edited article with editorial notes.
-            """,
-            agent=agents['editor'],
-            context=[write_task]
+            """
         )
         
         # Task 5: Fact Checking
-        fact_check_task = Task(
+        specs["fact_check"] = dict(
             description="""
             Thoroughly fact-check all claims in the content.
             """,
             expected_output="""
             Detailed Fact-Check Report.
-            """,
-            agent=agents['fact_checker'],
-            context=[edit_task]
+            """
         )
         
-        # Task 6: SEO Optimization
-        seo_task = Task(
+        # Task 6: SEO Optimization (keyword research is split out when running in parallel)
+        specs["seo_keywords"] = dict(
+            description=f"""
+            Research the primary and secondary keywords for the edited content.
+            Draft the SEO title, meta description and URL slug.
+            Topic: {topic}
+            """,
+            expected_output="""
+            Keyword list with search intent, SEO title, meta description and URL slug.
+            """
+        )
+        specs["seo"] = dict(
             description=f"""
             Optimize the content for search engines while maintaining quality.
             Topic: {topic}
             """,
             expected_output="""
             SEO Optimization Report and the Final Optimized Content.
-            """,
-            agent=agents['seo_specialist'],
-            context=[edit_task, fact_check_task]
+            """
         )
         
-        return [
-            research_task,
-            outline_task,
-            write_task,
-            edit_task,
-            fact_check_task,
-            seo_task
-        ]
+        return specs
     
     def generate_content(
         self,
         topic: str,
-        content_type: str = "blog_post"
+        content_type: str = "blog_post",
+        parallel: bool = False,
+        max_workers: Optional[int] = None,
+        use_cache: bool = True,
+        run_id: Optional[str] = None,
+        resume: bool = False,
+        refresh: bool = False,
+        research_max_age_hours: Optional[float] = None,
+        progress_callback: Optional[Callable[[Dict, Dict], None]] = None,
+        context_budgets: Optional[Dict[str, int]] = None,
+        profile: Optional[str] = None,
+        latency_budget: Optional[float] = None
     ) -> Dict:
         """
-        Generate content using the multi-agent crew
+        Generate content using the multi-agent crew.
+
+        With `parallel=True` the tasks are run by the dependency-graph scheduler
+        instead of `Process.sequential`, on up to `max_workers` threads (default:
+        PIPELINE_MAX_WORKERS or 4), and per-task timings are reported.
+        `use_cache=False` bypasses the LLM response cache for this run only.
+
+        Every stage output is checkpointed under `run_id` (generated if not
+        given and returned in the result). Calling again with the same `run_id`,
+        topic, content type and profile and `resume=True` skips the stages that
+        already completed and feeds their stored outputs to the remaining ones
+        as context. Without `resume` earlier checkpoints of the run id are
+        discarded. Delete them with `checkpoints.delete(run_id)` once the result
+        is stored.
+
+        With `refresh=True` research (and the outline, for the same content type)
+        saved with an earlier version of this topic is reused if it is younger
+        than `research_max_age_hours` (default: RESEARCH_MAX_AGE_HOURS or 72), so
+        only the writing, editing, fact-check and SEO stages run again. Reused
+        stages are listed under `reused_stages` and left out of `artifacts`, so
+        they still expire at the original artifact's age.
+
+        `progress_callback(event, snapshot)` is called as stages start and finish,
+        on agent steps and for every streamed LLM token; see `ProgressReporter`.
+
+        `context_budgets` maps stage names to a token budget for the upstream
+        context they receive (default: CONTEXT_TOKEN_BUDGETS, e.g. "seo=3000").
+        Oversized context is compacted and the savings are reported under
+        `compaction`; stages without a budget get the full context.
+
+        `profile` selects the pipeline profile by name (see `pipeline_profiles`);
+        by default it follows the content type, e.g. newsletters use the "lite"
+        stages that merge outline+write and edit+SEO and skip fact-checking.
+
+        `latency_budget` (seconds) lets the model router switch agents to their
+        "fast" LLM settings when the run is expected to exceed it. The chosen
+        variants are reported under `routing` and measured per-agent latency
+        under `agent_latency`.
+        """
+        from custom_tools import search_stats
+        
+        max_workers = max_workers or int(os.getenv("PIPELINE_MAX_WORKERS") or 4)
+        reuse = self._fresh_artifacts(topic, content_type, research_max_age_hours) if refresh else {}
+        _, pipeline = get_profile(content_type, profile)
+        stage_agents = {stage["name"]: stage["agent"] for stage in plan_stages(pipeline, parallel=parallel)}
+        routing = self.router.route(
+            [agent for stage, agent in stage_agents.items() if stage not in reuse], latency_budget
+        )
+        if any(variant != DEFAULT for variant in routing["variants"].values()):
+            log_progress(f"Latency budget {latency_budget}s: routing {routing['variants']}")
+        
+        # Batch worker threads run on their own copies of the agents
+        in_batch = getattr(self._worker_state, "in_batch", False)
+        agents = self._worker_agents(routing["variants"]) if in_batch else self._agents_for(routing["variants"])
+        bypass = self.response_cache.bypassed() if self.response_cache and not use_cache else nullcontext()
+        with bypass:
+            result = self._generate(
+                topic, content_type, agents, parallel, max_workers, run_id,
+                resume, reuse, progress_callback, context_budgets, profile
+            )
+        result["routing"] = routing
+        result["agent_latency"] = self._agent_latency(result["metrics"], stage_agents, routing["variants"])
+        if self.response_cache:
+            result["llm_cache"] = self.response_cache.stats()
+        hedge = get_hedge_policy()
+        if hedge is not None:
+            result["hedging"] = hedge.stats()
+        result["search"] = search_stats()
+        return result
+    
+    def _agent_latency(self, metrics: Dict, stage_agents: Dict[str, str], variants: Dict[str, str]) -> Dict:
+        """Per-agent LLM latency for a run; also feeds the router's latency estimates"""
+        latency = {}
+        for stage, agent in stage_agents.items():
+            entry = metrics["stages"].get(stage)
+            if not entry or not entry["llm_calls"]:
+                # Reused, resumed or fully cached stages say nothing about latency
+                continue
+            variant = variants.get(agent, DEFAULT)
+            # Tool and search time doesn't change with the LLM variant, so only LLM time is modelled
+            self.router.observe(agent, variant, entry["llm_seconds"])
+            settings = resolve(self.agent_llm_config[agent], variant)
+            registry.inc("content_agent_seconds_total", entry["wall_time"], agent=agent, model=settings["model"])
+            summary = latency.setdefault(agent, {
+                "variant": variant, "model": settings["model"], "max_tokens": settings.get("max_tokens"),
+                "stages": 0, "llm_calls": 0, "llm_seconds": 0.0, "wall_time": 0.0
+            })
+            summary["stages"] += 1
+            summary["llm_calls"] += entry["llm_calls"]
+            summary["llm_seconds"] = round(summary["llm_seconds"] + entry["llm_seconds"], 3)
+            summary["wall_time"] = round(summary["wall_time"] + entry["wall_time"], 3)
+        return latency
+    
+    def _fresh_artifacts(self, topic: str, content_type: str, max_age_hours: Optional[float]) -> Dict[str, str]:
+        if max_age_hours is None:
+            max_age_hours = float(os.getenv("RESEARCH_MAX_AGE_HOURS", "72"))
+        artifacts = ContentVersionControl().get_fresh_artifacts(topic, timedelta(hours=max_age_hours), content_type)
+        if artifacts:
+            log_progress(f"♻️ Reusing stored {', '.join(sorted(artifacts))} for: {topic}")
+        else:
+            log_progress(f"No research younger than {max_age_hours}h for: {topic}; running a full generation")
+        return artifacts
+    
+    def generate_batch(
+        self,
+        jobs: Iterable[Tuple[str, str]],
+        max_concurrency: int = 4,
+        parallel: bool = False,
+        max_workers: Optional[int] = None,
+        **options: Any
+    ) -> Iterator[Dict]:
+        """
+        Generate content for many (topic, content_type) jobs concurrently.
+
+        Each job runs `generate_content` with `parallel`, `max_workers` and
+        `options` (e.g. `profile`, `latency_budget`, `refresh`, `use_cache`), so
+        profiles and latency routing apply as in single runs.
+
+        Results are yielded as each job completes, not in submission order;
+        `job_index` identifies the originating job. A failed job yields a dict
+        with an `error` key instead of stopping the batch.
         """
         
-        log_progress(f"🚀 Starting content generation for: {topic}")
+        jobs = list(jobs)
+        log_progress(f"📦 Starting batch of {len(jobs)} jobs (concurrency: {max_concurrency})")
+        
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+            futures = {
+                pool.submit(contextvars.copy_context().run, self._generate_batch_job, topic, content_type,
+                            parallel, max_workers, options):
+                    (index, topic, content_type)
+                for index, (topic, content_type) in enumerate(jobs)
+            }
+            for future in as_completed(futures):
+                index, topic, content_type = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    log_progress(f"❌ Batch job {index} ({topic}) failed: {e}")
+                    result = {"topic": topic, "content_type": content_type, "error": str(e)}
+                result["job_index"] = index
+                yield result
+    
+    def _generate_batch_job(self, topic: str, content_type: str, parallel: bool, max_workers: Optional[int],
+                            options: Dict) -> Dict:
+        self._worker_state.in_batch = True
+        return self.generate_content(topic, content_type, parallel=parallel, max_workers=max_workers, **options)
+    
+    def _worker_agents(self, variants: Optional[Dict[str, str]] = None) -> Dict[str, "Agent"]:
+        """
+        Agents for the current batch worker thread.
+
+        CrewAI agents keep per-execution state, so each worker thread gets its own
+        copy of the agents `_agents_for(variants)` builds, made once per variant
+        set and reused for every job that thread runs. The LLM clients are shared.
+        """
+        key = tuple(sorted((agent, v) for agent, v in (variants or {}).items() if v != DEFAULT))
+        agent_sets = getattr(self._worker_state, "agent_sets", None)
+        if agent_sets is None:
+            agent_sets = self._worker_state.agent_sets = {}
+        if key not in agent_sets:
+            agent_sets[key] = {name: agent.copy() for name, agent in self._agents_for(variants).items()}
+        return agent_sets[key]
+    
+    def _generate(
+        self,
+        topic: str,
+        content_type: str,
+        agents: Dict[str, "Agent"],
+        parallel: bool,
+        max_workers: int,
+        run_id: Optional[str] = None,
+        resume: bool = False,
+        reuse: Optional[Dict[str, str]] = None,
+        progress_callback: Optional[Callable[[Dict, Dict], None]] = None,
+        context_budgets: Optional[Dict[str, int]] = None,
+        profile: Optional[str] = None
+    ) -> Dict:
+        run_id = run_id or self.checkpoints.new_run_id()
+        log_progress(f"🚀 Starting content generation for: {topic} (run {run_id})")
         
         # Create tasks
-        tasks = self._create_tasks(topic, content_type)
-        log_progress(f"Tasks created. Number of tasks: {len(tasks)}")
+        profile, _ = get_profile(content_type, profile)
+        tasks = self._create_tasks(topic, content_type, parallel=parallel, agents=agents, profile=profile)
+        log_progress(f"Tasks created ({profile} profile). Number of tasks: {len(tasks)}")
+        
+        # Checkpoints of this run id only count for the same topic, content type and profile
+        fingerprint = self.checkpoints.fingerprint(topic, content_type, profile)
+        if not resume:
+            self.checkpoints.delete(run_id)
+        
+        # Reused artifacts only apply to stages this profile actually runs. They are
+        # not checkpointed, so they never come back as artifacts of this run
+        stage_names = {task.name for task in tasks}
+        completed = self.checkpoints.load(run_id, fingerprint) if resume else {}
+        reused = {stage: output for stage, output in (reuse or {}).items()
+                  if stage in stage_names and stage not in completed}
+        completed.update(reused)
+        if completed:
+            log_progress(f"Run {run_id} reusing stages: {', '.join(sorted(completed))}")
+        
+        reporter = None
+        if progress_callback:
+            reporter = ProgressReporter(
+                progress_callback,
+                stages=[task.name for task in tasks],
+                agents={task.name: task.agent.role for task in tasks},
+                keyword=topic
+            )
+            for stage in completed:
+                if stage in reporter.stages:
+                    reporter.stage_reused(stage)
+        
+        metrics = RunMetrics()
+        compactor = ContextCompactor(context_budgets)
+        
+        def stage_started(stage: str):
+            metrics.stage_started(stage)
+            if reporter:
+                reporter.stage_started(stage)
+        
+        def stage_finished(stage: str, output: str):
+            self.checkpoints.save(run_id, stage, output, fingerprint)
+            metrics.stage_finished(stage)
+            if reporter:
+                reporter.stage_finished(stage, output)
+        
+        # Steps go to the reporter active in the executing context, so agents shared
+        # between runs carry the same callback on the sequential and scheduler paths
+        for task in tasks:
+            task.agent.step_callback = relay_step
+        
+        metrics_token = metrics.activate()
+        try:
+            with reporter.activate() if reporter else nullcontext():
+                # Reusing stages and compacting context both need per-task control
+                if parallel or completed or compactor.budgets:
+                    result = self._generate_with_scheduler(
+                        topic, content_type, tasks, max_workers if parallel else 1, completed,
+                        stage_started, stage_finished, compactor
+                    )
+                else:
+                    result = self._generate_sequential(
+                        topic, content_type, tasks, agents, stage_started, stage_finished
+                    )
+        except Exception:
+            log_progress(f"Generation failed. Completed stages are checkpointed; "
+                         f"retry with run_id='{run_id}', resume=True")
+            self._record_metrics(metrics, topic, content_type, run_id, status="failed")
+            raise
+        finally:
+            metrics.deactivate(metrics_token)
+        
+        result["run_id"] = run_id
+        result["profile"] = profile
+        result["metrics"] = self._record_metrics(metrics, topic, content_type, run_id, status="succeeded")
+        if compactor.budgets:
+            result["compaction"] = compactor.summary()
+        result["reused_stages"] = sorted(reused)
+        # Only stages generated by this run; storing reused ones again would reset their age
+        stage_outputs = self.checkpoints.load(run_id, fingerprint)
+        result["artifacts"] = {stage: stage_outputs[stage] for stage in REUSABLE_STAGES if stage in stage_outputs}
+        return result
+    
+    def _record_metrics(self, metrics: RunMetrics, topic: str, content_type: str, run_id: str, status: str) -> Dict:
+        """Publish a run's metrics to the Prometheus registry and the JSONL metrics file"""
+        summary = metrics.summary()
+        registry.record_run(summary, status)
+        totals = summary["totals"]
+        log_progress(f"📊 Run {run_id}: {totals['llm_calls']} LLM calls, "
+                     f"{totals['prompt_tokens']}+{totals['completion_tokens']} tokens, "
+                     f"${totals['cost_usd']:.4f}, {totals['wall_time']:.1f}s")
+        try:
+            write_run_metrics({"run_id": run_id, "topic": topic, "content_type": content_type,
+                               "status": status, **summary})
+        except OSError as e:
+            log_progress(f"WARNING: could not write metrics file: {e}")
+        return summary
+    
+    def _generate_sequential(
+        self,
+        topic: str,
+        content_type: str,
+        tasks: List["Task"],
+        agents: Dict[str, "Agent"],
+        on_start: Callable[[str], None],
+        on_complete: Callable[[str, str], None]
+    ) -> Dict:
+        """Run the tasks one at a time with `Process.sequential`"""
+        from crewai import Crew, Process
+        
+        def on_task_done(output, index: int):
+            on_complete(tasks[index].name, output.raw)
+            # Sequential tasks start as soon as the previous one finishes
+            if index + 1 < len(tasks):
+                on_start(tasks[index + 1].name)
+        
+        for index, task in enumerate(tasks):
+            task.callback = lambda output, index=index: on_task_done(output, index)
         
         # Create crew
         crew = Crew(
-            agents=list(self.agents.values()),
+            agents=list(agents.values()),
             tasks=tasks,
             process=Process.sequential,
             verbose=True
         )
         
         # Execute crew
+        on_start(tasks[0].name)
         log_progress("Executing crew.kickoff()...")
         result = crew.kickoff()
         log_progress("crew.kickoff() finished successfully.")
@@ -302,9 +756,46 @@ class ContentGenerationCrew:
             "final_content": str(result),
             "topic": topic,
             "content_type": content_type,
-            "agents_used": len(self.agents),
+            "agents_used": len({id(task.agent) for task in tasks}),
             "tasks_completed": len(tasks)
         }
+    
+    def _generate_with_scheduler(
+        self,
+        topic: str,
+        content_type: str,
+        tasks: List["Task"],
+        max_workers: int,
+        completed: Dict[str, str],
+        on_start: Callable[[str], None],
+        on_complete: Callable[[str, str], None],
+        compactor: Optional[ContextCompactor] = None
+    ) -> Dict:
+        """Run the task graph concurrently, following each task's context edges"""
+        
+        scheduler = TaskGraphScheduler(max_workers=max_workers)
+        log_progress(f"Executing task graph with up to {max_workers} concurrent tasks...")
+        run = scheduler.run(
+            {task.name: task for task in tasks},
+            completed=completed,
+            on_complete=on_complete,
+            on_start=on_start,
+            context_builder=(lambda stage, parts: compactor.compact(stage, parts, CONTEXT_DIVIDER)) if compactor else None
+        )
+        log_progress(f"Task graph finished in {run['wall_time']:.1f}s. "
+                     f"Critical path: {' -> '.join(run['critical_path'])}")
+        
+        return {
+            "final_content": run["outputs"][tasks[-1].name],
+            "topic": topic,
+            "content_type": content_type,
+            "agents_used": len({id(task.agent) for task in tasks}),
+            "tasks_completed": len(run["outputs"]),
+            "task_timings": run["timings"],
+            "critical_path": run["critical_path"],
+            "resumed_stages": run["skipped"],
+            "wall_time": run["wall_time"]
+        }
 
 if __name__ == "__main__":
     content_crew = ContentGenerationCrew()
@@ -1,17 +1,85 @@
+import os
+import re
+import json
 import sqlite3
 import hashlib
-from datetime import datetime
-from typing import List, Dict
+import threading
+from contextlib import closing
+from datetime import datetime, timedelta
+from typing import List, Dict, Iterator, Optional
+from sqlite_pool import get_pool
+from version_storage import TextCache, apply_delta, decode_keyframe, encode_keyframe, make_delta
+
+# Intermediate stage outputs stored with each version so later runs can reuse them
+REUSABLE_STAGES = ("research", "outline")
+
+# Databases whose schema this process has already checked
+_initialized = set()
+_init_lock = threading.Lock()
+
+# Recently materialized texts, keyed by (database, content hash)
+_texts = TextCache(int(os.getenv("CONTENT_VERSIONS_CACHE_SIZE", "256")))
+
+# Columns and tokenizer of the full-text index, also used to build snippets
+_SEARCH_COLUMNS = "content_id, content, tokenize = 'porter unicode61'"
+_SEARCH_WORD = re.compile(r'\w+')
+# Characters the unicode61 tokenizer keeps in tokens (it splits on underscores)
+_TOPIC_WORD = re.compile(r'[^\W_]')
+_HEADING_MARK = re.compile(r'(?<!\S)#+\s+')
+
+
+def _match_query(query: str) -> str:
+    """FTS5 query matching every word of `query`, with no operators of its own"""
+    return " ".join(f'"{word}"' for word in _SEARCH_WORD.findall(query))
+
+
+def _topic_query(content_id: str) -> Optional[str]:
+    """FTS5 query for topics starting with the words of `content_id`, or None if it has none to match"""
+    if not _TOPIC_WORD.search(content_id):
+        return None
+    phrase = content_id.replace('"', '""')
+    return f'{{content_id}} : ^"{phrase}"'
+
+
+def _snippets(rows: List[tuple], match: str) -> Dict[int, str]:
+    """Snippets with matched words in bold for (id, topic, text) rows, via a throwaway in-memory index"""
+    with closing(sqlite3.connect(":memory:")) as conn:
+        conn.execute(f"CREATE VIRTUAL TABLE page USING fts5({_SEARCH_COLUMNS})")
+        conn.executemany("INSERT INTO page (rowid, content_id, content) VALUES (?, ?, ?)", rows)
+        return {
+            row_id: _HEADING_MARK.sub("", " ".join(snippet.split()))
+            for row_id, snippet in conn.execute(
+                "SELECT rowid, snippet(page, 1, '**', '**', '…', 24) FROM page WHERE page MATCH ?", (match,)
+            )
+        }
+
 
 class ContentVersionControl:
-    """Track content versions and changes using SQLite"""
+    """
+    Track content versions and changes using SQLite.
+    
+    Texts live in a content-addressed blob table keyed by their SHA-256, and
+    version rows reference a blob by `content_hash`, so saving content that was
+    produced before only inserts a pointer. Blobs are stored compressed: a full
+    keyframe, or a line delta against the topic's previous version. Delta
+    chains are at most `max_chain` long, so reading a version decodes at most
+    that many deltas, and recently read texts are served from an LRU cache.
+    Topics and texts are full-text indexed (FTS5) as versions are saved; the
+    index keeps no copy of the texts.
+    """
     
-    def __init__(self, db_path: str = "content_versions.db"):
-        self.db_path = db_path
-        self._create_tables()
+    def __init__(self, db_path: str = None, max_chain: int = None):
+        self.db_path = db_path or os.getenv("CONTENT_VERSIONS_DB", "content_versions.db")
+        self.max_chain = max_chain if max_chain is not None else int(os.getenv("CONTENT_VERSIONS_MAX_CHAIN", "10"))
+        self.pool = get_pool(self.db_path)
+        self._db_key = os.path.abspath(self.db_path)
+        with _init_lock:
+            if self._db_key not in _initialized:
+                self._create_tables()
+                _initialized.add(self._db_key)
     
     def _create_tables(self):
-        with sqlite3.connect(self.db_path) as conn:
+        with self.pool.transaction() as conn:
             cursor = conn.cursor()
             cursor.execute("""
             CREATE TABLE IF NOT EXISTS content_versions (
@@ -24,24 +92,431 @@ class ContentVersionControl:
                 word_count INTEGER
             )
             """)
-            conn.commit()
-    
-    def save_version(self, content_id: str, content: str) -> int:
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT MAX(version) FROM content_versions WHERE content_id = ?", (content_id,))
-            result = cursor.fetchone()
-            new_version = (result[0] or 0) + 1
-            content_hash = hashlib.md5(content.encode()).hexdigest()
+            has_blobs = cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'content_blobs'"
+            ).fetchone()
+            # Texts by SHA-256: a compressed keyframe, or a delta against `base_hash`
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS content_blobs (
+                hash TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                base_hash TEXT,
+                chain_length INTEGER NOT NULL DEFAULT 0,
+                size INTEGER NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """)
             cursor.execute("""
+            CREATE TABLE IF NOT EXISTS content_artifacts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                content_id TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                stage TEXT NOT NULL,
+                content_type TEXT,
+                content TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_lookup ON content_artifacts (content_id, stage, created_at)")
+            # Quality scores per version and scorer (rubric) version, filled by rescore_archive.py
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS content_scores (
+                version_id INTEGER NOT NULL,
+                scorer_version INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                overall_score REAL NOT NULL,
+                grade TEXT NOT NULL,
+                scores TEXT NOT NULL,
+                readability TEXT,
+                scored_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (version_id, scorer_version)
+            )
+            """)
+            has_unique_index = cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_versions_content'"
+            ).fetchone()
+            # Before saves were serialized, concurrent saves could get the same version
+            # number; renumber in insertion order so the unique index can be built
+            if not has_unique_index and cursor.execute(
+                "SELECT 1 FROM content_versions GROUP BY content_id, version HAVING COUNT(*) > 1 LIMIT 1"
+            ).fetchone():
+                cursor.execute("""
+                UPDATE content_versions SET version = numbered.version
+                FROM (
+                    SELECT id, ROW_NUMBER() OVER (PARTITION BY content_id ORDER BY id) AS version
+                    FROM content_versions
+                ) AS numbered
+                WHERE numbered.id = content_versions.id
+                """)
+            cursor.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_versions_content ON content_versions (content_id, version)"
+            )
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_versions_hash ON content_versions (content_hash)")
+            if not has_blobs:
+                self._move_texts_to_blobs(conn)
+            has_search = cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'content_search'"
+            ).fetchone()
+            # Contentless: rows are version ids, texts are read from the blob store
+            cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS content_search USING fts5({_SEARCH_COLUMNS}, content = '')")
+            if not has_search:
+                self._index_versions(conn)
+
+    def _move_texts_to_blobs(self, conn):
+        """Move the full texts of rows saved before the blob store into it"""
+        ids = [row[0] for row in conn.execute(
+            "SELECT id FROM content_versions WHERE content != '' ORDER BY content_id, version"
+        )]
+        previous: Dict[str, Dict] = {}
+        for version_id in ids:
+            content_id, content, old_hash = conn.execute(
+                "SELECT content_id, content, content_hash FROM content_versions WHERE id = ?", (version_id,)
+            ).fetchone()
+            blob = self._store_blob(conn, content, previous.get(content_id))
+            previous[content_id] = blob
+            conn.execute("UPDATE content_versions SET content = '', content_hash = ? WHERE id = ?",
+                         (blob["hash"], version_id))
+            # Scores of unchanged texts stay current under the new hash
+            conn.execute("UPDATE content_scores SET content_hash = ? WHERE version_id = ? AND content_hash = ?",
+                         (blob["hash"], version_id, old_hash))
+    
+    def _index_versions(self, conn):
+        """Add every saved version to a new full-text index, a topic at a time so delta bases stay cached"""
+        ids = [row[0] for row in conn.execute("SELECT id FROM content_versions ORDER BY content_id, version")]
+        for version_id in ids:
+            content_id, content, content_hash = conn.execute(
+                "SELECT content_id, content, content_hash FROM content_versions WHERE id = ?", (version_id,)
+            ).fetchone()
+            conn.execute("INSERT INTO content_search (rowid, content_id, content) VALUES (?, ?, ?)",
+                         (version_id, content_id, self._text(conn, content, content_hash)))
+
+    def save_version(
+        self,
+        content_id: str,
+        content: str,
+        artifacts: Optional[Dict[str, str]] = None,
+        content_type: Optional[str] = None
+    ) -> int:
+        """Save a new version; `artifacts` maps stage names (research, outline) to their outputs"""
+        return self.save_versions([
+            {"content_id": content_id, "content": content, "artifacts": artifacts, "content_type": content_type}
+        ])[0]
+
+    def save_versions(self, versions: List[Dict]) -> List[int]:
+        """
+        Save many versions in one transaction and return their version numbers.
+
+        Each item has `content_id` and `content`, and optionally `artifacts` and
+        `content_type` as for `save_version`. Version numbers are allocated
+        under the database write lock, so concurrent saves never collide.
+        """
+        numbers = []
+        saved = []
+        with self.pool.transaction() as conn:
+            latest: Dict[str, Optional[Dict]] = {}
+            rows = []
+            search_rows = []
+            artifact_rows = []
+            for item in versions:
+                content_id, content = item["content_id"], item["content"]
+                if content_id not in latest:
+                    row = conn.execute("""
+                    SELECT v.version, v.content_hash, b.chain_length
+                    FROM content_versions v LEFT JOIN content_blobs b ON b.hash = v.content_hash
+                    WHERE v.content_id = ? ORDER BY v.version DESC LIMIT 1
+                    """, (content_id,)).fetchone()
+                    latest[content_id] = {"version": row[0], "hash": row[1], "chain": row[2], "text": None} if row else None
+                previous = latest[content_id]
+                version = (previous["version"] if previous else 0) + 1
+                blob = self._store_blob(conn, content, previous)
+                latest[content_id] = {"version": version, **blob}
+                numbers.append(version)
+                saved.append(((self._db_key, blob["hash"]), content))
+                rows.append((content_id, version, "", blob["hash"], len(content.split())))
+                search_rows.append((content, content_id, version))
+                for stage, output in (item.get("artifacts") or {}).items():
+                    artifact_rows.append((content_id, version, stage, item.get("content_type"), output))
+            conn.executemany("""
             INSERT INTO content_versions (content_id, version, content, content_hash, word_count)
             VALUES (?, ?, ?, ?, ?)
-            """, (content_id, new_version, content, content_hash, len(content.split())))
-            conn.commit()
-        return new_version
+            """, rows)
+            conn.executemany("""
+            INSERT INTO content_search (rowid, content_id, content)
+            SELECT id, content_id, ? FROM content_versions WHERE content_id = ? AND version = ?
+            """, search_rows)
+            conn.executemany("""
+            INSERT INTO content_artifacts (content_id, version, stage, content_type, content)
+            VALUES (?, ?, ?, ?, ?)
+            """, artifact_rows)
+        # Cached only once committed, so a rolled back blob is never served
+        for key, content in saved:
+            _texts.put(key, content)
+        return numbers
 
-    def get_history(self, content_id: str) -> List[Dict]:
-        with sqlite3.connect(self.db_path) as conn:
+    def _store_blob(self, conn, content: str, previous: Optional[Dict]) -> Dict:
+        """Store `content` unless a blob with its hash exists; `previous` is the topic's last version"""
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        row = conn.execute("SELECT chain_length FROM content_blobs WHERE hash = ?", (content_hash,)).fetchone()
+        if row is not None:
+            return {"hash": content_hash, "chain": row[0], "text": content}
+        body, base_hash, chain = self._encode(conn, previous, content)
+        conn.execute("INSERT INTO content_blobs (hash, body, base_hash, chain_length, size) VALUES (?, ?, ?, ?, ?)",
+                     (content_hash, body, base_hash, chain, len(content.encode("utf-8"))))
+        return {"hash": content_hash, "chain": chain, "text": content}
+
+    def _encode(self, conn, previous: Optional[Dict], content: str):
+        """Body, base hash and chain length to store `content` with"""
+        keyframe = encode_keyframe(content)
+        # Rows saved by older processes have no blob to build on
+        if previous is None or previous["chain"] is None or previous["chain"] >= self.max_chain:
+            return keyframe, None, 0
+        base = previous["text"]
+        if base is None:
+            base = self._materialize(conn, previous["hash"])
+        delta = make_delta(base, content)
+        # A rewrite shares little with its base; start a new chain instead
+        if len(delta) * 2 > len(keyframe):
+            return keyframe, None, 0
+        return delta, previous["hash"], previous["chain"] + 1
+
+    def _materialize(self, conn, content_hash: str) -> Optional[str]:
+        """Text of a blob: from the cache, or decoded from its nearest keyframe or cached base"""
+        text = _texts.get((self._db_key, content_hash))
+        if text is not None:
+            return text
+        
+        # Walk back to a keyframe or an already materialized blob, then forwards
+        pending = []
+        base = None
+        link = content_hash
+        while True:
+            row = conn.execute("SELECT body, base_hash FROM content_blobs WHERE hash = ?", (link,)).fetchone()
+            if row is None:
+                return None
+            pending.append((link, row[0], row[1]))
+            if row[1] is None:
+                break
+            link = row[1]
+            base = _texts.get((self._db_key, link))
+            if base is not None:
+                break
+        for link, body, base_hash in reversed(pending):
+            base = decode_keyframe(body) if base_hash is None else apply_delta(base, body)
+            _texts.put((self._db_key, link), base)
+        return base
+
+    def _text(self, conn, content: str, content_hash: str) -> str:
+        """Text of a version row; rows written by older processes keep it in `content`"""
+        if content:
+            return content
+        text = self._materialize(conn, content_hash)
+        return content if text is None else text
+
+    def get_version(self, content_id: str, version: Optional[int] = None) -> Optional[str]:
+        """Text of a version of a topic, by default the latest"""
+        query = "SELECT content, content_hash FROM content_versions WHERE content_id = ?"
+        params = [content_id]
+        if version is None:
+            query += " ORDER BY version DESC LIMIT 1"
+        else:
+            query += " AND version = ?"
+            params.append(version)
+        with self.pool.connection() as conn:
+            row = conn.execute(query, params).fetchone()
+            return self._text(conn, *row) if row else None
+
+    def has_content(self, content: str) -> bool:
+        """Whether this exact text has been saved before, under any topic"""
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT 1 FROM content_blobs WHERE hash = ?", (content_hash,)).fetchone() is not None
+
+    def find_content(self, content: str) -> List[Dict]:
+        """Versions of any topic whose text is exactly `content`, oldest first"""
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT content_id, version, created_at FROM content_versions WHERE content_hash = ? ORDER BY id",
+                (content_hash,)
+            ).fetchall()
+        return [{"content_id": r[0], "version": r[1], "date": r[2]} for r in rows]
+
+    def storage_stats(self) -> Dict:
+        """How versions and their texts are stored, and the bytes the texts take"""
+        with self.pool.connection() as conn:
+            versions, full_copies, full_bytes = conn.execute(
+                "SELECT COUNT(*), SUM(content != ''), COALESCE(SUM(LENGTH(CAST(content AS BLOB))), 0) FROM content_versions"
+            ).fetchone()
+            blobs, keyframes, deltas, blob_bytes = conn.execute(
+                "SELECT COUNT(*), SUM(base_hash IS NULL), SUM(base_hash IS NOT NULL), COALESCE(SUM(LENGTH(body)), 0) "
+                "FROM content_blobs"
+            ).fetchone()
+        return {"versions": versions, "blobs": blobs, "keyframes": keyframes or 0, "deltas": deltas or 0,
+                "full_copies": full_copies or 0, "stored_bytes": blob_bytes + full_bytes}
+
+    def get_fresh_artifacts(
+        self,
+        content_id: str,
+        max_age: timedelta,
+        content_type: Optional[str] = None
+    ) -> Dict[str, str]:
+        """
+        Latest stored research/outline for a topic that is younger than `max_age`.
+
+        An outline is only reused for the same content type, since it is shaped by it.
+        """
+        cutoff = (datetime.utcnow() - max_age).strftime("%Y-%m-%d %H:%M:%S")
+        artifacts = {}
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT version, created_at, word_count FROM content_versions WHERE content_id = ? ORDER BY version DESC", (content_id,))
-            return [{"version": r[0], "date": r[1], "words": r[2]} for r in cursor.fetchall()]
+            for stage in REUSABLE_STAGES:
+                query = "SELECT content FROM content_artifacts WHERE content_id = ? AND stage = ? AND created_at >= ?"
+                params = [content_id, stage, cutoff]
+                if stage == "outline":
+                    query += " AND content_type IS ?"
+                    params.append(content_type)
+                cursor.execute(query + " ORDER BY created_at DESC, id DESC LIMIT 1", params)
+                row = cursor.fetchone()
+                if row:
+                    artifacts[stage] = row[0]
+        # Without research the outline has nothing fresh to stand on
+        if "research" not in artifacts:
+            return {}
+        return artifacts
+
+    def get_history(self, content_id: str) -> List[Dict]:
+        """Versions of a topic, newest first, with their stored quality score if any"""
+        with self.pool.connection() as conn:
+            return self._history(conn, content_id)
+
+    def get_history_page(self, content_id: str, limit: int = 50, cursor: Optional[str] = None) -> Dict:
+        """
+        One page of `get_history`. Pass the returned `next_cursor` back for the
+        following page; it is None on the last one. Pages are read from the
+        (content_id, version) index, so they cost the same however deep they are.
+        """
+        with self.pool.connection() as conn:
+            versions = self._history(conn, content_id, limit + 1, int(cursor) if cursor else None)
+        next_cursor = str(versions[limit - 1]["version"]) if len(versions) > limit else None
+        return {"items": versions[:limit], "next_cursor": next_cursor}
+
+    def _history(self, conn, content_id: str, limit: int = -1, before: Optional[int] = None) -> List[Dict]:
+        from quality_scorer import SCORER_VERSION
+        condition = "" if before is None else "AND v.version < ?"
+        params = [SCORER_VERSION, content_id] + ([] if before is None else [before]) + [limit]
+        rows = conn.execute(f"""
+        SELECT v.version, v.created_at, v.word_count, s.overall_score
+        FROM content_versions v
+        LEFT JOIN content_scores s
+            ON s.version_id = v.id AND s.scorer_version = ? AND s.content_hash = v.content_hash
+        WHERE v.content_id = ? {condition} ORDER BY v.version DESC LIMIT ?
+        """, params).fetchall()
+        return [{"version": r[0], "date": r[1], "words": r[2], "score": r[3]} for r in rows]
+
+    def search(self, query: str, content_id: Optional[str] = None, limit: int = 20,
+               cursor: Optional[str] = None) -> Dict:
+        """
+        Versions whose topic or text contain every word of `query` (stemmed),
+        best BM25 match first with topic hits weighted double, optionally only
+        within `content_id`. Each item has a snippet with the matches in bold.
+        Pass the returned `next_cursor` back for the following page.
+        """
+        match = _match_query(query)
+        if not match:
+            return {"items": [], "next_cursor": None}
+        ranked = match
+        conditions = []
+        params: List = []
+        if content_id is not None:
+            # Narrow the match to the topic inside the index, so only its versions are
+            # ranked; the exact comparison drops longer topics that start the same way
+            topic = _topic_query(content_id)
+            if topic:
+                ranked = f"{match} AND {topic}"
+            conditions.append("v.content_id = ?")
+            params.append(content_id)
+        if cursor:
+            rank, last_id = cursor.split(":")
+            conditions.append("(m.rank > ? OR (m.rank = ? AND m.id > ?))")
+            params += [float(rank), float(rank), int(last_id)]
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self.pool.connection() as conn:
+            rows = conn.execute(f"""
+            SELECT m.id, m.rank, v.content_id, v.version, v.created_at, v.word_count, v.content, v.content_hash
+            FROM (
+                SELECT rowid AS id, bm25(content_search, 2.0, 1.0) AS rank
+                FROM content_search WHERE content_search MATCH ?
+            ) AS m
+            JOIN content_versions v ON v.id = m.id
+            {where} ORDER BY m.rank, m.id LIMIT ?
+            """, [ranked] + params + [limit + 1]).fetchall()
+            page = rows[:limit]
+            texts = [(r[0], r[2], self._text(conn, r[6], r[7])) for r in page]
+        snippets = _snippets(texts, match)
+        items = [
+            {"content_id": r[2], "version": r[3], "date": r[4], "words": r[5], "rank": r[1],
+             "snippet": snippets.get(r[0], "")}
+            for r in page
+        ]
+        next_cursor = f"{page[-1][1]!r}:{page[-1][0]}" if len(rows) > limit else None
+        return {"items": items, "next_cursor": next_cursor}
+
+    def get_score(self, content_id: str, version: int, scorer_version: int) -> Optional[Dict]:
+        """
+        Stored score of a version from `scorer_version`, for its current content.
+        Score fields are None if it has none; None if the version doesn't exist.
+        """
+        with self.pool.connection() as conn:
+            row = conn.execute("""
+            SELECT v.id, v.content_hash, s.overall_score, s.grade, s.scores, s.readability
+            FROM content_versions v
+            LEFT JOIN content_scores s
+                ON s.version_id = v.id AND s.scorer_version = ? AND s.content_hash = v.content_hash
+            WHERE v.content_id = ? AND v.version = ?
+            """, (scorer_version, content_id, version)).fetchone()
+        if row is None:
+            return None
+        return {"version_id": row[0], "content_hash": row[1], "overall_score": row[2], "grade": row[3],
+                "scores": json.loads(row[4]) if row[4] else None, "readability": json.loads(row[5]) if row[5] else None}
+
+    def iter_unscored(self, scorer_version: int, chunk_size: int = 500, force: bool = False) -> Iterator[List[Dict]]:
+        """
+        Versions without a score from `scorer_version` for their current content,
+        in chunks of `chunk_size` rows. Rows are paged by id, so no read
+        transaction is held open while the scores are written back.
+        """
+        condition = "" if force else "AND (s.version_id IS NULL OR s.content_hash != v.content_hash)"
+        last_id = 0
+        while True:
+            with self.pool.connection() as conn:
+                rows = conn.execute(f"""
+                SELECT v.id, v.content_id, v.content, v.content_hash
+                FROM content_versions v
+                LEFT JOIN content_scores s ON s.version_id = v.id AND s.scorer_version = ?
+                WHERE v.id > ? {condition}
+                ORDER BY v.id LIMIT ?
+                """, (scorer_version, last_id, chunk_size)).fetchall()
+                chunk = [
+                    {"id": r[0], "content_id": r[1], "content": self._text(conn, r[2], r[3]), "content_hash": r[3]}
+                    for r in rows
+                ]
+            if not chunk:
+                return
+            last_id = chunk[-1]["id"]
+            yield chunk
+
+    def save_scores(self, scores: List[Dict]):
+        """Insert or replace scores keyed by (version_id, scorer_version)"""
+        with self.pool.transaction() as conn:
+            conn.executemany("""
+            INSERT INTO content_scores (version_id, scorer_version, content_hash, overall_score, grade, scores, readability)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (version_id, scorer_version) DO UPDATE SET
+                content_hash = excluded.content_hash, overall_score = excluded.overall_score,
+                grade = excluded.grade, scores = excluded.scores, readability = excluded.readability,
+                scored_at = CURRENT_TIMESTAMP
+            """, [
+                (s["version_id"], s["scorer_version"], s["content_hash"], s["overall_score"], s["grade"],
+                 json.dumps(s["scores"]), json.dumps(s.get("readability")))
+                for s in scores
+            ])
@@ -0,0 +1,173 @@
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+from logger import log_progress
+
+# The upstream output each stage works on directly; other context is supporting material
+PRIMARY_CONTEXT = {
+    "outline": "research",
+    "write": "outline",
+    "edit": "write",
+    "fact_check": "edit",
+    "seo_keywords": "edit",
+    "seo": "edit",
+    # Merged stages of the lite profile
+    "draft": "research",
+    "polish": "draft",
+}
+
+OMITTED = "[...]"
+
+# Blocks carrying these are what downstream agents most often need from supporting context
+_SIGNAL_PATTERNS = [
+    (re.compile(r"\d"), 1.0),
+    (re.compile(r"https?://|\bsource\b", re.IGNORECASE), 1.5),
+    (re.compile(r"\b(incorrect|inaccurate|false|misleading|unverified|correction|corrected|outdated)\b|❌|⚠",
+                re.IGNORECASE), 3.0),
+    (re.compile(r"\b(key|summary|finding|conclusion|recommend)", re.IGNORECASE), 1.0),
+]
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count (about four characters per token for English prose)"""
+    return (len(text) + 3) // 4
+
+
+def parse_budgets(spec: Optional[str]) -> Dict[str, int]:
+    """Parse "seo=3000,write=6000" into {"seo": 3000, "write": 6000}"""
+    budgets = {}
+    for item in (spec or "").split(","):
+        if "=" in item:
+            stage, value = item.split("=", 1)
+            budgets[stage.strip()] = int(value)
+    return budgets
+
+
+class ContextCompactor:
+    """
+    Keep the context handed to each stage within a per-stage token budget.
+
+    The stage's primary input (e.g. the edited article for SEO) is always kept
+    whole, since later stages turn it into the final content; supporting context
+    such as research or the fact-check report is shrunk by extracting its
+    headings and highest-signal blocks. A primary input that alone exceeds the
+    budget is passed through and reported under `over_budget_tokens`.
+    """
+
+    def __init__(self, budgets: Optional[Dict[str, int]] = None):
+        self.budgets = budgets if budgets is not None else parse_budgets(os.getenv("CONTEXT_TOKEN_BUDGETS"))
+        self.reports: Dict[str, Dict[str, int]] = {}
+
+    def compact(self, stage: str, parts: Dict[str, str], divider: str = "\n\n") -> str:
+        """Join upstream outputs for `stage`, compacting them if they exceed its budget"""
+        original = sum(estimate_tokens(text) for text in parts.values())
+        budget = self.budgets.get(stage)
+        if budget is None or original <= budget:
+            if budget is not None:
+                self._report(stage, budget, original, original)
+            return divider.join(parts.values())
+
+        primary = PRIMARY_CONTEXT.get(stage)
+        if primary not in parts:
+            primary = None
+        primary_tokens = estimate_tokens(parts[primary]) if primary else 0
+        supporting = [name for name in parts if name != primary]
+
+        compacted = dict(parts)
+        if primary and primary_tokens >= budget:
+            log_progress(f"Warning: {stage} input ({primary_tokens} tokens) exceeds its "
+                         f"{budget}-token context budget; passing it through uncompacted")
+            for name in supporting:
+                compacted[name] = ""
+        else:
+            remaining = budget - primary_tokens
+            supporting_tokens = {name: estimate_tokens(parts[name]) for name in supporting}
+            total_supporting = sum(supporting_tokens.values())
+            for name in supporting:
+                # Shrink each supporting part in proportion to its size
+                share = remaining * supporting_tokens[name] // max(1, total_supporting)
+                compacted[name] = extract(parts[name], share)
+
+        text = divider.join(part for part in compacted.values() if part)
+        self._report(stage, budget, original, estimate_tokens(text))
+        return text
+
+    def _report(self, stage: str, budget: int, original: int, compacted: int):
+        self.reports[stage] = {
+            "budget": budget,
+            "original_tokens": original,
+            "compacted_tokens": compacted,
+            "saved_tokens": original - compacted,
+            "over_budget_tokens": max(0, compacted - budget)
+        }
+
+    def summary(self) -> Dict:
+        return {
+            "stages": dict(self.reports),
+            "original_tokens": sum(r["original_tokens"] for r in self.reports.values()),
+            "saved_tokens": sum(r["saved_tokens"] for r in self.reports.values()),
+            "over_budget_stages": [stage for stage, r in self.reports.items() if r["over_budget_tokens"]]
+        }
+
+
+def _blocks(text: str) -> List[str]:
+    """Paragraph-level blocks, with markdown headings split off into blocks of their own"""
+    blocks = []
+    for block in re.split(r"\n\s*\n", text.strip()):
+        if not block.strip():
+            continue
+        first, _, rest = block.partition("\n")
+        if first.lstrip().startswith("#") and rest.strip():
+            blocks.extend([first, rest])
+        else:
+            blocks.append(block)
+    return blocks
+
+
+def _score(block: str, index: int) -> float:
+    score = sum(weight for pattern, weight in _SIGNAL_PATTERNS if pattern.search(block))
+    # Earlier blocks (summaries, intros) are usually more important
+    return score + 2.0 / (1 + index)
+
+
+def extract(text: str, budget: int) -> str:
+    """Extractive summary of `text` within `budget` tokens, preserving the original order"""
+    if estimate_tokens(text) <= budget:
+        return text
+    if budget <= 0:
+        return ""
+
+    blocks = _blocks(text)
+    headings = {i for i, block in enumerate(blocks) if block.lstrip().startswith("#")}
+    selected = set()
+    used = 0
+    for i in sorted(headings):
+        cost = estimate_tokens(blocks[i])
+        if used + cost <= budget:
+            selected.add(i)
+            used += cost
+
+    ranked: List[Tuple[float, int]] = sorted(
+        ((_score(block, i), i) for i, block in enumerate(blocks) if i not in headings),
+        reverse=True
+    )
+    for _, i in ranked:
+        cost = estimate_tokens(blocks[i])
+        if used + cost <= budget:
+            selected.add(i)
+            used += cost
+
+    output = []
+    skipped = False
+    for i, block in enumerate(blocks):
+        if i in selected:
+            if skipped:
+                output.append(OMITTED)
+                skipped = False
+            output.append(block)
+        else:
+            skipped = True
+    if skipped:
+        output.append(OMITTED)
+    return "\n\n".join(output)
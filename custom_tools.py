@@ -1,5 +1,139 @@
+import os
+import re
+import time
+import threading
+from concurrent.futures import Future
+from typing import Dict, Optional, Tuple
 from crewai.tools import tool
 from langchain_community.tools import DuckDuckGoSearchRun
+from disk_cache import DiskCache
+from metrics import record_tool_call
+
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "86400"))
+_MEMORY_CACHE_SIZE = 512
+
+
+class SearchService:
+    """Shared web search client with a normalized-query TTL cache and in-flight coalescing"""
+
+    def __init__(self, ttl_seconds: float = SEARCH_CACHE_TTL, disk_cache: Optional[DiskCache] = None, runner=None):
+        self.ttl_seconds = ttl_seconds
+        self.disk_cache = disk_cache
+        self._runner = runner
+        self._memory: Dict[str, Tuple[float, str]] = {}
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.search_count = 0
+        self.search_seconds = 0.0
+        self.max_search_seconds = 0.0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Case, punctuation and whitespace insensitive form of a query; word order still matters"""
+        words = re.sub(r"[^\w\s]", " ", query.lower()).split()
+        return " ".join(words)
+
+    def _client(self):
+        # One client for the whole process instead of one per call
+        with self._lock:
+            if self._runner is None:
+                self._runner = DuckDuckGoSearchRun()
+            return self._runner
+
+    def _cached(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and time.time() - entry[0] <= self.ttl_seconds:
+                self.memory_hits += 1
+                return entry[1]
+        if self.disk_cache is not None:
+            result = self.disk_cache.get(key)
+            if result is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._remember(key, result)
+                return result
+        return None
+
+    def _remember(self, key: str, result: str):
+        if len(self._memory) >= _MEMORY_CACHE_SIZE:
+            # Dicts keep insertion order, so this drops the oldest entry
+            self._memory.pop(next(iter(self._memory)))
+        self._memory[key] = (time.time(), result)
+
+    def search(self, query: str) -> str:
+        key = self.normalize(query)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            started = time.perf_counter()
+            result = self._client().run(query)
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.search_count += 1
+                self.search_seconds += elapsed
+                self.max_search_seconds = max(self.max_search_seconds, elapsed)
+                self._remember(key, result)
+            if self.disk_cache is not None:
+                self.disk_cache.set(key, result)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits + self.coalesced
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "coalesced": self.coalesced,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "searches": self.search_count,
+                "avg_search_seconds": round(self.search_seconds / self.search_count, 3) if self.search_count else 0.0,
+                "max_search_seconds": round(self.max_search_seconds, 3)
+            }
+
+
+search_service = SearchService(
+    disk_cache=DiskCache(
+        os.getenv("SEARCH_CACHE_DB", "search_cache.db"),
+        namespace="search",
+        ttl_seconds=SEARCH_CACHE_TTL,
+        max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000"))
+    )
+)
+
+
+def search_stats() -> Dict:
+    """Cache hit rate and search latency for tuning SEARCH_CACHE_TTL_SECONDS"""
+    return search_service.stats()
+
 
 @tool("search_tool")
 def search_tool(query: str) -> str:
@@ -7,9 +141,9 @@ def search_tool(query: str) -> str:
     from logger import log_progress
     log_progress(f"DEBUG: search_tool called with query: {query}")
     print(f"DEBUG: search_tool called with query: {query}")
+    started = time.perf_counter()
     try:
-        runner = DuckDuckGoSearchRun()
-        result = runner.run(query)
+        result = search_service.search(query)
         log_progress(f"DEBUG: search_tool returned {len(result)} characters")
         print(f"DEBUG: search_tool returned {len(result)} characters")
         return result
@@ -17,3 +151,5 @@ def search_tool(query: str) -> str:
         log_progress(f"DEBUG: search_tool error: {e}")
         print(f"DEBUG: search_tool error: {e}")
         return f"Error searching: {e}"
+    finally:
+        record_tool_call("search_tool", time.perf_counter() - started)
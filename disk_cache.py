@@ -0,0 +1,134 @@
+import time
+import sqlite3
+import threading
+from typing import Dict, Optional
+
+
+class DiskCache:
+    """Persistent key/value cache in SQLite with TTL expiry and size-bounded LRU eviction"""
+
+    def __init__(
+        self,
+        db_path: str,
+        namespace: str = "default",
+        ttl_seconds: Optional[float] = None,
+        max_entries: int = 10000,
+        max_bytes: Optional[int] = None
+    ):
+        self.db_path = db_path
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._create_tables()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _create_tables(self):
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_lru ON cache_entries (namespace, accessed_at)")
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached value, or None if it is missing or expired"""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, created_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+            if row is None:
+                self._count(hit=False)
+                return None
+            if self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+                self._count(hit=False)
+                return None
+            conn.execute("UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                         (now, self.namespace, key))
+        self._count(hit=True)
+        return row[0]
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("""
+            INSERT OR REPLACE INTO cache_entries (namespace, key, value, size, created_at, accessed_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """, (self.namespace, key, value, len(value.encode("utf-8")), now, now))
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """Drop expired entries, then least recently used ones until within the bounds"""
+        if self.ttl_seconds is not None:
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND created_at < ?",
+                         (self.namespace, now - self.ttl_seconds))
+
+        count, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?",
+            (self.namespace,)
+        ).fetchone()
+        if count > self.max_entries:
+            conn.execute("""
+            DELETE FROM cache_entries WHERE namespace = ? AND key IN (
+                SELECT key FROM cache_entries WHERE namespace = ? ORDER BY accessed_at LIMIT ?
+            )
+            """, (self.namespace, self.namespace, count - self.max_entries))
+        if self.max_bytes is not None and total > self.max_bytes:
+            excess = total - self.max_bytes
+            rows = conn.execute(
+                "SELECT key, size FROM cache_entries WHERE namespace = ? ORDER BY accessed_at",
+                (self.namespace,)
+            )
+            victims = []
+            for key, size in rows:
+                if excess <= 0:
+                    break
+                victims.append((self.namespace, key))
+                excess -= size
+            conn.executemany("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", victims)
+
+    def delete(self, key: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+
+    def stats(self) -> Dict:
+        with self._connect() as conn:
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?",
+                (self.namespace,)
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
@@ -0,0 +1,174 @@
+import os
+import time
+import queue
+import threading
+import contextvars
+from collections import deque
+from typing import Any, Callable, Dict, Iterator, Optional
+from metrics import registry
+
+_END = object()
+
+
+class HedgePolicy:
+    """
+    When to fire a duplicate of a streamed LLM call whose first token is late.
+
+    The hedge delay is the `percentile` of recently observed time-to-first-token,
+    clamped to [min_delay, max_delay] (`max_delay` until `min_samples` have been
+    seen). Hedges are capped at `max_extra` times the number of calls, which
+    bounds the extra spend.
+    """
+
+    def __init__(self, percentile: float = 95, min_delay: float = 2.0, max_delay: float = 30.0,
+                 max_extra: float = 0.1, window: int = 200, min_samples: int = 20):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.max_extra = max_extra
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.denied = 0
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < self.min_samples:
+            return self.max_delay
+        index = min(len(samples) - 1, int(len(samples) * self.percentile / 100))
+        return max(self.min_delay, min(self.max_delay, samples[index]))
+
+    def observe(self, first_token_seconds: float):
+        with self._lock:
+            self._samples.append(first_token_seconds)
+
+    def start_call(self):
+        with self._lock:
+            self.calls += 1
+
+    def try_hedge(self) -> bool:
+        """Reserve a hedge if the extra-spend cap allows one"""
+        with self._lock:
+            if self.hedged + 1 > self.max_extra * self.calls:
+                self.denied += 1
+                return False
+            self.hedged += 1
+        registry.inc("content_llm_hedges_total")
+        return True
+
+    def record_win(self, hedge_won: bool):
+        if hedge_won:
+            with self._lock:
+                self.hedge_wins += 1
+            registry.inc("content_llm_hedge_wins_total")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "denied": self.denied,
+                "hedge_rate": round(self.hedged / self.calls, 3) if self.calls else 0.0,
+                "win_rate": round(self.hedge_wins / self.hedged, 3) if self.hedged else 0.0
+            }
+
+
+def _pump(attempt: int, start: Callable[[], Iterator[Any]], out: "queue.Queue", cancelled: threading.Event):
+    stream = None
+    try:
+        stream = start()
+        for item in stream:
+            if cancelled.is_set():
+                break
+            out.put((attempt, item))
+        out.put((attempt, _END))
+    except Exception as e:
+        out.put((attempt, e))
+    finally:
+        if stream is not None and hasattr(stream, "close"):
+            # Closing the generator closes the HTTP response of an abandoned attempt
+            stream.close()
+
+
+def hedged_stream(start: Callable[[], Iterator[Any]], policy: HedgePolicy,
+                  can_send: Callable[[], bool] = lambda: True) -> Iterator[Any]:
+    """
+    Yield the items of `start()`, hedging with a second `start()` if the first
+    item is late. Whichever attempt produces an item first wins; the other is
+    abandoned and its items are never yielded. `can_send` is checked before
+    hedging, e.g. to avoid hedging while rate limited.
+    """
+    policy.start_call()
+    out: "queue.Queue" = queue.Queue()
+    cancelled = {0: threading.Event()}
+    started = {0: time.monotonic()}
+    threading.Thread(target=contextvars.copy_context().run, args=(_pump, 0, start, out, cancelled[0]), daemon=True).start()
+
+    winner = None
+    deadline = started[0] + policy.delay()
+    hedge_considered = False
+    finished = {}
+    while True:
+        timeout = None
+        if winner is None and not hedge_considered:
+            timeout = max(0.0, deadline - time.monotonic())
+        try:
+            attempt, item = out.get(timeout=timeout)
+        except queue.Empty:
+            hedge_considered = True
+            if can_send() and policy.try_hedge():
+                cancelled[1] = threading.Event()
+                started[1] = time.monotonic()
+                threading.Thread(target=contextvars.copy_context().run, args=(_pump, 1, start, out, cancelled[1]),
+                                 daemon=True).start()
+            continue
+
+        if winner is None:
+            if isinstance(item, Exception) or item is _END:
+                finished[attempt] = item
+                if len(finished) < len(started):
+                    # The other attempt may still succeed
+                    continue
+                # Every attempt finished without producing anything
+                if isinstance(finished[0], Exception):
+                    raise finished[0]
+                return
+            winner = attempt
+            policy.observe(time.monotonic() - started[attempt])
+            policy.record_win(hedge_won=attempt == 1)
+            for other, event in cancelled.items():
+                if other != winner:
+                    event.set()
+
+        if attempt != winner:
+            continue
+        if item is _END:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+_policy: Optional[HedgePolicy] = None
+_policy_lock = threading.Lock()
+
+
+def get_hedge_policy() -> Optional[HedgePolicy]:
+    """Process-wide hedge policy, or None unless LLM_HEDGE_ENABLED is set"""
+    global _policy
+    if os.getenv("LLM_HEDGE_ENABLED", "false").lower() != "true":
+        return None
+    with _policy_lock:
+        if _policy is None:
+            _policy = HedgePolicy(
+                percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "95")),
+                min_delay=float(os.getenv("LLM_HEDGE_MIN_DELAY", "2")),
+                max_delay=float(os.getenv("LLM_HEDGE_MAX_DELAY", "30")),
+                max_extra=float(os.getenv("LLM_HEDGE_MAX_EXTRA", "0.1"))
+            )
+        return _policy
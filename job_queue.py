@@ -0,0 +1,160 @@
+import os
+import json
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class JobQueue:
+    """Durable content generation job queue backed by SQLite"""
+
+    def __init__(self, db_path: str = None, max_attempts: int = 3):
+        self.db_path = db_path or os.getenv("JOB_QUEUE_DB", "jobs.db")
+        self.max_attempts = max_attempts
+        self._create_tables()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode so claims can take an explicit write lock with BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _create_tables(self):
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                topic TEXT NOT NULL,
+                content_type TEXT NOT NULL,
+                options TEXT NOT NULL DEFAULT '{}',
+                status TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker_id TEXT,
+                result TEXT,
+                error TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                started_at TIMESTAMP,
+                heartbeat_at TIMESTAMP,
+                finished_at TIMESTAMP,
+                progress TEXT
+            )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id)")
+            # Databases created before progress reporting lack the column
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "progress" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN progress TEXT")
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+
+    def _to_dict(self, row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        job["options"] = json.loads(job["options"] or "{}")
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["progress"] = json.loads(job["progress"]) if job.get("progress") else None
+        return job
+
+    def enqueue(self, topic: str, content_type: str, **options) -> int:
+        """Add a generation job and return its id"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (topic, content_type, options) VALUES (?, ?, ?)",
+                (topic, content_type, json.dumps(options))
+            )
+            return cursor.lastrowid
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        """Atomically take the oldest queued job, or return None if the queue is empty"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY id LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            now = self._now()
+            conn.execute("""
+            UPDATE jobs SET status = ?, worker_id = ?, attempts = attempts + 1,
+                started_at = ?, heartbeat_at = ?, error = NULL
+            WHERE id = ?
+            """, (RUNNING, worker_id, now, now, row["id"]))
+            job = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+            conn.execute("COMMIT")
+            return self._to_dict(job)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def heartbeat(self, job_id: int):
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = ?",
+                         (self._now(), job_id, RUNNING))
+
+    def update_progress(self, job_id: int, progress: Dict):
+        """Store the latest progress snapshot; doubles as a heartbeat"""
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET progress = ?, heartbeat_at = ? WHERE id = ? AND status = ?",
+                         (json.dumps(progress), self._now(), job_id, RUNNING))
+
+    def complete(self, job_id: int, result: Dict):
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET status = ?, result = ?, finished_at = ? WHERE id = ?",
+                         (SUCCEEDED, json.dumps(result), self._now(), job_id))
+
+    def fail(self, job_id: int, error: str, retry: bool = False):
+        """Mark a job failed, or put it back in the queue if `retry` and it has attempts left"""
+        with self._connect() as conn:
+            if retry:
+                cursor = conn.execute("""
+                UPDATE jobs SET status = ?, error = ?, worker_id = NULL
+                WHERE id = ? AND attempts < ?
+                """, (QUEUED, error, job_id, self.max_attempts))
+                if cursor.rowcount:
+                    return
+            conn.execute("UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                         (FAILED, error, self._now(), job_id))
+
+    def requeue_stale(self, lease_seconds: int = 120) -> int:
+        """
+        Recover jobs whose worker stopped sending heartbeats.
+
+        Jobs with attempts left go back to the queue; the rest are marked failed.
+        Returns the number of jobs recovered.
+        """
+        cutoff = (datetime.utcnow() - timedelta(seconds=lease_seconds)).strftime("%Y-%m-%d %H:%M:%S")
+        with self._connect() as conn:
+            conn.execute("""
+            UPDATE jobs SET status = ?, error = 'Worker lease expired', finished_at = ?
+            WHERE status = ? AND heartbeat_at < ? AND attempts >= ?
+            """, (FAILED, self._now(), RUNNING, cutoff, self.max_attempts))
+            cursor = conn.execute("""
+            UPDATE jobs SET status = ?, worker_id = NULL
+            WHERE status = ? AND heartbeat_at < ?
+            """, (QUEUED, RUNNING, cutoff))
+            return cursor.rowcount
+
+    def get(self, job_id: int) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return self._to_dict(row) if row else None
+
+    def list_jobs(self, status: str = None, limit: int = 50) -> List[Dict]:
+        with self._connect() as conn:
+            if status:
+                rows = conn.execute("SELECT * FROM jobs WHERE status = ? ORDER BY id DESC LIMIT ?",
+                                    (status, limit)).fetchall()
+            else:
+                rows = conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+            return [self._to_dict(r) for r in rows]
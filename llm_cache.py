@@ -0,0 +1,75 @@
+import os
+import hashlib
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Sequence
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from disk_cache import DiskCache
+
+_bypass = contextvars.ContextVar("llm_cache_bypass", default=False)
+
+
+class LLMResponseCache(BaseCache):
+    """
+    Content-addressed LangChain cache for LLM responses, stored on disk.
+
+    Keys are a SHA-256 of the model's parameter string (model name, temperature,
+    max_tokens, ...) and the serialized message list, so any change to the
+    prompt or configuration is a miss.
+    """
+
+    def __init__(self, store: DiskCache):
+        self.store = store
+        self.bypassed_lookups = 0
+
+    @staticmethod
+    def cache_key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Any]]:
+        if _bypass.get():
+            self.bypassed_lookups += 1
+            return None
+        value = self.store.get(self.cache_key(prompt, llm_string))
+        return loads(value) if value is not None else None
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Any]):
+        # Bypassed runs still store their fresh response, refreshing the entry
+        self.store.set(self.cache_key(prompt, llm_string), dumps(list(return_val)))
+
+    def clear(self, **kwargs: Any):
+        self.store.clear()
+
+    @contextmanager
+    def bypassed(self):
+        """Skip cache lookups for the duration of a run (responses are still stored)"""
+        token = _bypass.set(True)
+        try:
+            yield
+        finally:
+            _bypass.reset(token)
+
+    def stats(self) -> Dict:
+        stats = self.store.stats()
+        stats["bypassed"] = self.bypassed_lookups
+        return stats
+
+
+_response_cache: Optional[LLMResponseCache] = None
+
+
+def get_response_cache() -> LLMResponseCache:
+    """Process-wide response cache, configured from the LLM_CACHE_* environment variables"""
+    global _response_cache
+    if _response_cache is None:
+        ttl = os.getenv("LLM_CACHE_TTL_SECONDS")
+        max_bytes = os.getenv("LLM_CACHE_MAX_BYTES")
+        _response_cache = LLMResponseCache(DiskCache(
+            db_path=os.getenv("LLM_CACHE_DB", "llm_cache.db"),
+            namespace="llm",
+            ttl_seconds=float(ttl) if ttl else 7 * 24 * 3600,
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000")),
+            max_bytes=int(max_bytes) if max_bytes else 200 * 1024 * 1024
+        ))
+    return _response_cache
@@ -0,0 +1,277 @@
+import os
+import json
+import time
+import threading
+import contextvars
+from datetime import datetime
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from langchain_core.callbacks import BaseCallbackHandler
+
+# USD per million tokens (prompt, completion); override with LLM_PRICE_<MODEL>="in,out"
+PRICING = {
+    "deepseek-chat": (0.27, 1.10),
+    "deepseek-reasoner": (0.55, 2.19),
+}
+
+_run_metrics = contextvars.ContextVar("run_metrics", default=None)
+_stage = contextvars.ContextVar("metrics_stage", default=None)
+
+
+def price_for(model: str):
+    override = os.getenv(f"LLM_PRICE_{model.upper().replace('-', '_')}")
+    if override:
+        prompt, completion = (float(p) for p in override.split(","))
+        return prompt, completion
+    return PRICING.get(model, (0.0, 0.0))
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prompt_price, completion_price = price_for(model)
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+def _empty_stage() -> Dict:
+    return {
+        "wall_time": 0.0,
+        "llm_calls": 0,
+        "llm_seconds": 0.0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "cost_usd": 0.0,
+        "queue_wait_seconds": 0.0,
+        "tool_calls": defaultdict(lambda: {"count": 0, "seconds": 0.0})
+    }
+
+
+class RunMetrics:
+    """Wall time, LLM calls, tokens, cost and tool calls per stage for one generation run"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, Dict] = defaultdict(_empty_stage)
+        self._stage_started: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def activate(self):
+        """Bind this run to the current context; returns a token for `deactivate`"""
+        return _run_metrics.set(self)
+
+    @staticmethod
+    def deactivate(token):
+        _run_metrics.reset(token)
+
+    @staticmethod
+    def _current_stage() -> str:
+        return _stage.get() or "unattributed"
+
+    def stage_started(self, stage: str):
+        _stage.set(stage)
+        with self._lock:
+            self._stage_started[stage] = time.perf_counter()
+
+    def stage_finished(self, stage: str, output: str = None):
+        with self._lock:
+            started = self._stage_started.pop(stage, None)
+            if started is not None:
+                self.stages[stage]["wall_time"] += time.perf_counter() - started
+
+    def record_llm_call(self, model: str, seconds: float, prompt_tokens: int, completion_tokens: int):
+        stage = self._current_stage()
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            entry = self.stages[stage]
+            entry["llm_calls"] += 1
+            entry["llm_seconds"] += seconds
+            entry["prompt_tokens"] += prompt_tokens
+            entry["completion_tokens"] += completion_tokens
+            entry["cost_usd"] += cost
+        registry.record_llm_call(stage, model, seconds, prompt_tokens, completion_tokens, cost)
+
+    def record_tool_call(self, tool: str, seconds: float):
+        stage = self._current_stage()
+        with self._lock:
+            call = self.stages[stage]["tool_calls"][tool]
+            call["count"] += 1
+            call["seconds"] += seconds
+        registry.record_tool_call(tool, seconds)
+
+    def record_queue_wait(self, seconds: float):
+        with self._lock:
+            self.stages[self._current_stage()]["queue_wait_seconds"] += seconds
+
+    def summary(self) -> Dict:
+        with self._lock:
+            stages = {}
+            for name, entry in self.stages.items():
+                stages[name] = dict(
+                    entry,
+                    wall_time=round(entry["wall_time"], 3),
+                    llm_seconds=round(entry["llm_seconds"], 3),
+                    cost_usd=round(entry["cost_usd"], 6),
+                    queue_wait_seconds=round(entry["queue_wait_seconds"], 3),
+                    tool_calls={tool: dict(call, seconds=round(call["seconds"], 3))
+                                for tool, call in entry["tool_calls"].items()}
+                )
+        totals = {key: sum(s[key] for s in stages.values())
+                  for key in ("llm_calls", "prompt_tokens", "completion_tokens")}
+        totals["cost_usd"] = round(sum(s["cost_usd"] for s in stages.values()), 6)
+        totals["wall_time"] = round(time.perf_counter() - self.started, 3)
+        return {"stages": stages, "totals": totals}
+
+
+def current_run_metrics() -> Optional[RunMetrics]:
+    return _run_metrics.get()
+
+
+def record_tool_call(tool: str, seconds: float):
+    """Attribute a tool call to the current run and stage, if any"""
+    metrics = _run_metrics.get()
+    if metrics is not None:
+        metrics.record_tool_call(tool, seconds)
+    else:
+        registry.record_tool_call(tool, seconds)
+
+
+def record_queue_wait(seconds: float):
+    """Time an LLM call spent waiting for the rate limiter before it was sent"""
+    registry.inc("content_llm_queue_wait_seconds_total", seconds)
+    registry.inc("content_llm_queued_calls_total")
+    metrics = _run_metrics.get()
+    if metrics is not None:
+        metrics.record_queue_wait(seconds)
+
+
+class LLMMetricsRelay(BaseCallbackHandler):
+    """LangChain callback that times LLM calls and records their token usage"""
+
+    def __init__(self):
+        # Start time and requested model of each call in flight
+        self._started: Dict[Any, tuple] = {}
+
+    @staticmethod
+    def _requested_model(kwargs: Dict) -> Optional[str]:
+        params = kwargs.get("invocation_params") or {}
+        return params.get("model_name") or params.get("model")
+
+    def on_chat_model_start(self, serialized: Dict, messages: Any, *, run_id: Any, **kwargs: Any):
+        self._started[run_id] = (time.perf_counter(), self._requested_model(kwargs))
+
+    def on_llm_start(self, serialized: Dict, prompts: Any, *, run_id: Any, **kwargs: Any):
+        self._started[run_id] = (time.perf_counter(), self._requested_model(kwargs))
+
+    def on_llm_end(self, response: Any, *, run_id: Any, **kwargs: Any):
+        call = self._started.pop(run_id, None)
+        metrics = _run_metrics.get()
+        if metrics is None or call is None:
+            return
+        started, model = call
+        llm_output = response.llm_output or {}
+        usage = llm_output.get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        if not usage:
+            # Streamed responses carry usage on the message instead
+            for generations in response.generations:
+                for generation in generations:
+                    meta = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                    prompt_tokens += meta.get("input_tokens", 0)
+                    completion_tokens += meta.get("output_tokens", 0)
+        # Streamed responses report the model on the message, not in llm_output
+        for generations in response.generations:
+            for generation in generations:
+                meta = getattr(getattr(generation, "message", None), "response_metadata", None) or {}
+                model = meta.get("model_name") or (generation.generation_info or {}).get("model_name") or model
+        model = llm_output.get("model_name") or model or "unknown"
+        metrics.record_llm_call(model, time.perf_counter() - started, prompt_tokens, completion_tokens)
+
+    def on_llm_error(self, error: BaseException, *, run_id: Any, **kwargs: Any):
+        self._started.pop(run_id, None)
+
+
+class MetricsRegistry:
+    """Process-wide counters and gauges exposed in the Prometheus text format"""
+
+    def __init__(self):
+        self._counters: Dict[tuple, float] = defaultdict(float)
+        self._gauges: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    def set(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    def record_llm_call(self, stage, model, seconds, prompt_tokens, completion_tokens, cost):
+        self.inc("content_llm_calls_total", stage=stage, model=model)
+        self.inc("content_llm_seconds_total", seconds, stage=stage, model=model)
+        self.inc("content_llm_tokens_total", prompt_tokens, stage=stage, model=model, type="prompt")
+        self.inc("content_llm_tokens_total", completion_tokens, stage=stage, model=model, type="completion")
+        self.inc("content_llm_cost_usd_total", cost, stage=stage, model=model)
+
+    def record_tool_call(self, tool, seconds):
+        self.inc("content_tool_calls_total", tool=tool)
+        self.inc("content_tool_seconds_total", seconds, tool=tool)
+
+    def record_run(self, summary: Dict, status: str):
+        self.inc("content_runs_total", status=status)
+        for stage, entry in summary["stages"].items():
+            self.inc("content_stage_seconds_total", entry["wall_time"], stage=stage)
+
+    def render(self) -> str:
+        with self._lock:
+            items = [(key, value, "counter") for key, value in self._counters.items()]
+            items += [(key, value, "gauge") for key, value in self._gauges.items()]
+        lines = []
+        seen = set()
+        for (name, labels), value, kind in sorted(items):
+            if name not in seen:
+                lines.append(f"# TYPE {name} {kind}")
+                seen.add(name)
+            label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"{name}{{{label_text}}} {value:g}" if label_text else f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def render_prometheus() -> str:
+    return registry.render()
+
+
+def write_run_metrics(record: Dict, path: str = None):
+    """Append one run's metrics to the JSONL metrics file (METRICS_FILE)"""
+    path = path or os.getenv("METRICS_FILE", "metrics.jsonl")
+    record = dict(record, timestamp=datetime.utcnow().isoformat())
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve /metrics in a background thread"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
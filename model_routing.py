@@ -0,0 +1,127 @@
+import os
+import json
+import copy
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+DEFAULT = "default"
+FAST = "fast"
+
+# Per-agent LLM settings. "fast" overrides the settings when a run's latency
+# budget is tight; override any of it with LLM_AGENT_CONFIG (JSON, merged per agent).
+AGENT_LLM_CONFIG = {
+    "researcher": {"model": "deepseek-chat", "temperature": 0.7, "max_tokens": 4000, "timeout": 180,
+                   "fast": {"max_tokens": 2500}},
+    "writer": {"model": "deepseek-chat", "temperature": 0.7, "max_tokens": 4000, "timeout": 300,
+               "fast": {"max_tokens": 3000}},
+    "editor": {"model": "deepseek-chat", "temperature": 0.5, "max_tokens": 4000, "timeout": 300,
+               "fast": {"max_tokens": 3000}},
+    "fact_checker": {"model": "deepseek-chat", "temperature": 0.2, "max_tokens": 3000, "timeout": 180,
+                     "fast": {"max_tokens": 1500}},
+    "seo_specialist": {"model": "deepseek-chat", "temperature": 0.5, "max_tokens": 4000, "timeout": 180,
+                       "fast": {"max_tokens": 2500}},
+}
+
+# Assumed generation speed for agents without measurements yet
+_PRIOR_TOKENS_PER_SECOND = 50.0
+
+
+def _merge(base: Dict, overrides: Dict) -> Dict:
+    merged = copy.deepcopy(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_agent_llm_config(overrides: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
+    """AGENT_LLM_CONFIG merged with LLM_AGENT_CONFIG and then `overrides`"""
+    config = copy.deepcopy(AGENT_LLM_CONFIG)
+    env = os.getenv("LLM_AGENT_CONFIG")
+    for extra in (json.loads(env) if env else {}, overrides or {}):
+        for agent, settings in extra.items():
+            config[agent] = _merge(config.get(agent, {}), settings)
+    return config
+
+
+def resolve(config: Dict, variant: str = DEFAULT) -> Dict:
+    """Client settings for one variant of an agent's config"""
+    settings = {key: value for key, value in config.items() if key != FAST}
+    if variant == FAST:
+        settings.update(config.get(FAST) or {})
+    return settings
+
+
+def settings_key(settings: Dict) -> Tuple:
+    return tuple(sorted(settings.items()))
+
+
+class LatencyTracker:
+    """Moving average of LLM seconds per stage, by agent and client settings"""
+
+    def __init__(self, alpha: float = 0.3):
+        self.alpha = alpha
+        self._averages: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, agent: str, settings: Dict, seconds: float):
+        key = (agent, settings_key(settings))
+        with self._lock:
+            previous = self._averages.get(key)
+            self._averages[key] = seconds if previous is None else previous + self.alpha * (seconds - previous)
+
+    def estimate(self, agent: str, settings: Dict) -> float:
+        with self._lock:
+            measured = self._averages.get((agent, settings_key(settings)))
+        if measured is not None:
+            return measured
+        return settings.get("max_tokens", 4000) / _PRIOR_TOKENS_PER_SECOND
+
+
+class ModelRouter:
+    """
+    Pick each agent's LLM variant so a run fits its latency budget.
+
+    Stages are estimated from measured per-agent LLM latency (or a prior based
+    on `max_tokens`) and summed; tool and search time is left out, since the
+    variant doesn't change it. While the estimate exceeds the budget, the agent
+    whose switch to its "fast" variant saves the most time is switched.
+    """
+
+    def __init__(self, config: Dict[str, Dict], tracker: Optional[LatencyTracker] = None):
+        self.config = config
+        self.tracker = tracker or LatencyTracker()
+
+    def _estimate(self, agent: str, variant: str) -> float:
+        return self.tracker.estimate(agent, resolve(self.config[agent], variant))
+
+    def route(self, stage_agents: Iterable[str], latency_budget: Optional[float] = None) -> Dict:
+        stage_agents = list(stage_agents)
+        variants = {agent: DEFAULT for agent in stage_agents}
+
+        def total() -> float:
+            return sum(self._estimate(agent, variants[agent]) for agent in stage_agents)
+
+        if latency_budget is not None:
+            candidates = [agent for agent in variants if self.config[agent].get(FAST)]
+            while total() > latency_budget and candidates:
+                savings = {
+                    agent: stage_agents.count(agent) * (self._estimate(agent, DEFAULT) - self._estimate(agent, FAST))
+                    for agent in candidates
+                }
+                best = max(candidates, key=lambda agent: savings[agent])
+                if savings[best] <= 0:
+                    break
+                variants[best] = FAST
+                candidates.remove(best)
+
+        return {
+            "latency_budget": latency_budget,
+            "estimated_seconds": round(total(), 1),
+            "variants": variants
+        }
+
+    def observe(self, agent: str, variant: str, seconds: float):
+        self.tracker.record(agent, resolve(self.config[agent], variant), seconds)
@@ -0,0 +1,105 @@
+from typing import Dict, List, Optional, Tuple
+
+# Upstream stages each base stage reads as context
+STAGE_CONTEXT = {
+    "research": [],
+    "outline": ["research"],
+    "write": ["research", "outline"],
+    "edit": ["write"],
+    "fact_check": ["edit"],
+    "seo_keywords": ["edit"],
+    "seo": ["edit", "fact_check", "seo_keywords"],
+}
+
+# Agent that runs each base stage
+STAGE_AGENTS = {
+    "research": "researcher",
+    "outline": "writer",
+    "write": "writer",
+    "edit": "editor",
+    "fact_check": "fact_checker",
+    "seo_keywords": "seo_specialist",
+    "seo": "seo_specialist",
+}
+
+FULL_STAGES = ["research", "outline", "write", "edit", "fact_check", "seo"]
+
+# Outline+write and edit+SEO each run as a single LLM task; fact-checking is skipped
+LITE_STAGES = [
+    "research",
+    {"name": "draft", "merge": ["outline", "write"]},
+    {"name": "polish", "merge": ["edit", "seo"], "agent": "seo_specialist"},
+]
+
+# Profiles are keyed by normalized content type, plus generic ones selectable by name
+PROFILES = {
+    "blog_post": {"label": "Blog Post", "stages": FULL_STAGES, "length": (1500, 2000)},
+    "research_report": {"label": "Research Report", "stages": FULL_STAGES, "length": (2000, 3000)},
+    "technical_article": {"label": "Technical Article", "stages": FULL_STAGES, "length": (1500, 2500)},
+    "newsletter": {"label": "Newsletter", "stages": LITE_STAGES, "length": (400, 700)},
+    "full": {"label": "Full pipeline", "stages": FULL_STAGES, "length": (1500, 2000)},
+    "lite": {"label": "Lite (fast)", "stages": LITE_STAGES, "length": (600, 900)},
+}
+
+DEFAULT_PROFILE = "blog_post"
+
+
+def normalize_content_type(content_type: str) -> str:
+    """"Blog Post" -> "blog_post" """
+    return content_type.strip().lower().replace(" ", "_").replace("-", "_")
+
+
+def get_profile(content_type: str, profile: Optional[str] = None) -> Tuple[str, Dict]:
+    """Resolve an explicit profile name, else the profile for the content type, else the default"""
+    if profile is not None:
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown pipeline profile '{profile}'. Available: {', '.join(PROFILES)}")
+        return profile, PROFILES[profile]
+    name = normalize_content_type(content_type)
+    if name not in PROFILES:
+        name = DEFAULT_PROFILE
+    return name, PROFILES[name]
+
+
+def plan_stages(profile: Dict, parallel: bool = False) -> List[Dict]:
+    """
+    Expand a profile into an ordered list of {"name", "members", "agent", "context"}.
+
+    `members` are the base stages a task covers (several when merged), `agent`
+    runs the task (by default the last member's agent) and `context` names
+    earlier tasks in the plan. Dependencies on skipped stages
+    are replaced by those stages' own upstream stages.
+    """
+    stages = [{"name": s, "merge": [s]} if isinstance(s, str) else s for s in profile["stages"]]
+    if parallel and any(s["merge"] == ["seo"] for s in stages) and any(s["merge"] == ["fact_check"] for s in stages):
+        # Keyword research only needs the edited draft, so it can overlap fact-checking
+        seo_index = next(i for i, s in enumerate(stages) if s["merge"] == ["seo"])
+        stages.insert(seo_index, {"name": "seo_keywords", "merge": ["seo_keywords"]})
+
+    owner = {member: stage["name"] for stage in stages for member in stage["merge"]}
+
+    def resolve(base: str) -> List[str]:
+        if base in owner:
+            return [owner[base]]
+        return [name for upstream in STAGE_CONTEXT[base] for name in resolve(upstream)]
+
+    plan = []
+    seen = set()
+    for stage in stages:
+        context = []
+        for member in stage["merge"]:
+            for upstream in STAGE_CONTEXT[member]:
+                for name in resolve(upstream):
+                    if name != stage["name"] and name not in context:
+                        context.append(name)
+        missing = [name for name in context if name not in seen]
+        if missing:
+            raise ValueError(f"Stage '{stage['name']}' is ordered before its inputs: {', '.join(missing)}")
+        plan.append({
+            "name": stage["name"],
+            "members": list(stage["merge"]),
+            "agent": stage.get("agent") or STAGE_AGENTS[stage["merge"][-1]],
+            "context": context
+        })
+        seen.add(stage["name"])
+    return plan
@@ -0,0 +1,168 @@
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+from langchain_core.callbacks import BaseCallbackHandler
+
+_reporter = contextvars.ContextVar("progress_reporter", default=None)
+_stage = contextvars.ContextVar("progress_stage", default=None)
+
+
+class ProgressReporter:
+    """
+    Collects per-stage progress for one generation run and forwards it to a callback.
+
+    The callback receives `(event, snapshot)`: `event` describes what just happened
+    ("stage_started", "stage_finished", "step" or "token") and `snapshot` is the
+    full current state, ready to be rendered or stored. The snapshot includes
+    `draft_quality`, the quality score of the latest stage's output so far
+    (scored against `keyword`), kept up to date incrementally as tokens arrive.
+
+    A callback with a `wants(event)` method is asked first, and the snapshot
+    is only built for events it accepts, so throttled callbacks don't pay for
+    a snapshot per token.
+    """
+
+    def __init__(self, callback: Callable[[Dict, Dict], None], stages: List[str], agents: Dict[str, str],
+                 keyword: Optional[str] = None):
+        self.callback = callback
+        self.keyword = keyword
+        self.started = time.perf_counter()
+        self.stages = {
+            name: {"agent": agents.get(name), "status": "pending", "started": None, "finished": None}
+            for name in stages
+        }
+        # Output pieces of each stage, joined when a snapshot needs the draft
+        self.partial: Dict[str, List[str]] = {}
+        # Live quality score of each stage's output, updated per token
+        self.quality: Dict[str, Any] = {}
+        self._last_started: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self):
+        """Route LLM tokens from this context (and copies of it) to this reporter"""
+        token = _reporter.set(self)
+        try:
+            yield self
+        finally:
+            _reporter.reset(token)
+
+    def _elapsed(self) -> float:
+        return round(time.perf_counter() - self.started, 1)
+
+    def _emit(self, event: Dict):
+        event["elapsed"] = self._elapsed()
+        wants = getattr(self.callback, "wants", None)
+        if wants is not None and not wants(event):
+            return
+        self.callback(event, self.snapshot())
+
+    def stage_reused(self, stage: str):
+        """Mark a stage whose output comes from a checkpoint or an earlier version"""
+        with self._lock:
+            self.stages[stage]["status"] = "reused"
+
+    def stage_started(self, stage: str):
+        _stage.set(stage)
+        with self._lock:
+            self._last_started = stage
+            self.stages[stage].update(status="running", started=self._elapsed())
+        self._emit({"type": "stage_started", "stage": stage, "agent": self.stages[stage]["agent"]})
+
+    def stage_finished(self, stage: str, output: str):
+        with self._lock:
+            self.stages[stage].update(status="done", finished=self._elapsed())
+            self.partial[stage] = [output]
+            self.quality[stage] = self._scorer()
+            self.quality[stage].feed(output)
+        self._emit({"type": "stage_finished", "stage": stage, "agent": self.stages[stage]["agent"]})
+
+    def step(self, description: str):
+        stage = _stage.get() or self._last_started
+        self._emit({"type": "step", "stage": stage, "text": description})
+
+    def token(self, text: str):
+        stage = _stage.get() or self._last_started
+        if stage is None:
+            return
+        with self._lock:
+            self.partial.setdefault(stage, []).append(text)
+            if stage not in self.quality:
+                self.quality[stage] = self._scorer()
+            self.quality[stage].feed(text)
+        self._emit({"type": "token", "stage": stage, "text": text})
+
+    def _scorer(self):
+        # Imported on first use to keep NumPy out of the app's startup
+        from quality_scorer import IncrementalQualityScorer
+        return IncrementalQualityScorer(self.keyword)
+
+    def draft_quality(self, stage: str) -> Optional[Dict]:
+        """Overall score, grade and dimension scores of a stage's output so far"""
+        with self._lock:
+            scorer = self.quality.get(stage)
+            if scorer is None:
+                return None
+            result = scorer.score()
+        return {key: result[key] for key in ("overall_score", "grade", "scores")}
+
+    def _draft(self, stage: str) -> str:
+        pieces = self.partial.get(stage)
+        if not pieces:
+            return ""
+        if len(pieces) > 1:
+            # Joined once; later snapshots only join the pieces that arrived since
+            pieces[:] = ["".join(pieces)]
+        return pieces[0]
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            now = self._elapsed()
+            stages = {}
+            for name, info in self.stages.items():
+                end = info["finished"] if info["finished"] is not None else now
+                duration = round(end - info["started"], 1) if info["started"] is not None else None
+                stages[name] = dict(info, duration=duration)
+            active = [name for name, info in self.stages.items() if info["status"] == "running"]
+            latest = active[-1] if active else self._last_started
+            snapshot = {
+                "elapsed": now,
+                "active": active,
+                "active_agents": [self.stages[name]["agent"] for name in active],
+                "stages": stages,
+                "draft_stage": latest,
+                "draft": self._draft(latest) if latest else ""
+            }
+        snapshot["draft_quality"] = self.draft_quality(latest) if latest else None
+        return snapshot
+
+
+def current_reporter() -> Optional[ProgressReporter]:
+    return _reporter.get()
+
+
+class LLMStreamRelay(BaseCallbackHandler):
+    """LangChain callback that forwards streamed tokens to the active run's reporter"""
+
+    def on_llm_new_token(self, token: str, **kwargs: Any):
+        reporter = _reporter.get()
+        if reporter is not None and token:
+            reporter.token(token)
+
+
+def relay_step(step_output: Any):
+    """CrewAI agent step callback that forwards steps to the active run's reporter"""
+    reporter = _reporter.get()
+    if reporter is not None:
+        reporter.step(describe_step(step_output))
+
+
+def describe_step(step_output: Any) -> str:
+    """One-line summary of a CrewAI agent step for the progress panel"""
+    tool = getattr(step_output, "tool", None)
+    if tool:
+        return f"🔧 Using {tool}: {str(getattr(step_output, 'tool_input', ''))[:80]}"
+    thought = getattr(step_output, "thought", None) or getattr(step_output, "text", None) or str(step_output)
+    return f"💭 {str(thought).strip()[:120]}"
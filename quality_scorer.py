@@ -1,85 +1,124 @@
 import re
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+import numpy as np
+from readability import ReadabilityCounter, readability_metrics
+
+WEIGHTS = {
+    "readability": 0.25,
+    "structure": 0.20,
+    "engagement": 0.25,
+    "seo": 0.15,
+    "completeness": 0.15
+}
+
+# Bump whenever the rubric changes so `rescore_archive.py` recomputes stored scores
+SCORER_VERSION = 3
+
+CTA_PHRASES = ('learn more', 'get started', 'try', 'discover')
+
+# Heading markers: "#" runs followed by a space
+_HEADING = re.compile(r'#+ ')
+_DIGIT = re.compile(r'\d')
+# The unfinished word at the end of streamed text
+_PARTIAL_WORD = re.compile(r'\S*\Z')
 
 class ContentQualityScorer:
     """Score content quality across multiple dimensions"""
     
     def score_content(self, content: str, keyword: str = None) -> Dict:
         """Generate comprehensive quality score"""
+        return self.score_batch([content], [keyword])[0]
+    
+    def score_batch(self, contents: Iterable[str],
+                    keywords: Union[str, Sequence[Optional[str]], None] = None) -> List[Dict]:
+        """
+        Score many documents at once; results match `score_content` per document.
+        
+        Each document is scanned once by `analyze`, then every dimension is
+        scored for the whole batch on NumPy feature arrays. `keywords` is one
+        keyword for all documents or one per document.
+        """
+        contents = list(contents)
+        if keywords is None or isinstance(keywords, str):
+            keywords = [keywords] * len(contents)
+        features = [self.analyze(content, keyword) for content, keyword in zip(contents, keywords)]
+        return self.score_features(features)
+    
+    def score_features(self, features: List[Dict]) -> List[Dict]:
+        """Results for documents already reduced to `analyze` features"""
+        scores = self._score_features(features)
+        
+        # Summed in the same order as the per-document weighted average
+        overall = sum(scores[k] * WEIGHTS[k] for k in WEIGHTS)
         
-        scores = {
-            "readability": self._score_readability(content),
-            "structure": self._score_structure(content),
-            "engagement": self._score_engagement(content),
-            "seo": self._score_seo(content, keyword) if keyword else 0,
-            "completeness": self._score_completeness(content)
+        columns = {k: scores[k].tolist() for k in WEIGHTS}
+        results = []
+        for i, total in enumerate(overall.tolist()):
+            doc_scores = {k: columns[k][i] for k in WEIGHTS}
+            results.append({
+                "overall_score": round(total, 1),
+                "scores": doc_scores,
+                "grade": self._get_grade(total),
+                "recommendations": self._get_recommendations(doc_scores),
+                "readability_metrics": features[i]["readability"]
+            })
+        return results
+    
+    def from_stored(self, stored: Dict) -> Dict:
+        """A score saved in `content_scores`, in the shape `score_content` returns"""
+        return {
+            "overall_score": stored["overall_score"],
+            "scores": stored["scores"],
+            "grade": stored["grade"],
+            "recommendations": self._get_recommendations(stored["scores"]),
+            "readability_metrics": stored["readability"]
         }
+    
+    def analyze(self, content: str, keyword: str = None) -> Dict:
+        """Every feature the scores use; each pass over `content` is shared by all dimensions"""
+        lower = content.lower()
+        # Heading marker lengths; a marker of n "#"s counts towards levels 1..n
+        heading_levels = [len(mark) - 1 for mark in _HEADING.findall(content)]
         
-        # Overall score (weighted average)
-        weights = {
-            "readability": 0.25,
-            "structure": 0.20,
-            "engagement": 0.25,
-            "seo": 0.15,
-            "completeness": 0.15
+        return {
+            "words": len(content.split()),
+            "readability": readability_metrics(content),
+            "h1": len(heading_levels),
+            "h2": sum(level >= 2 for level in heading_levels),
+            "h3": sum(level >= 3 for level in heading_levels),
+            "has_list": '- ' in content or '1. ' in content,
+            "has_question": '?' in content,
+            "has_example": 'example' in lower,
+            "has_number": _DIGIT.search(content) is not None,
+            "has_quote": '"' in content,
+            "has_cta": any(phrase in lower for phrase in CTA_PHRASES),
+            "has_keyword": bool(keyword) and keyword.lower() in lower,
+            "keyword": bool(keyword)
         }
+    
+    def _score_features(self, features: List[Dict]) -> Dict[str, np.ndarray]:
+        def column(name: str) -> np.ndarray:
+            return np.array([f[name] for f in features], dtype=np.int64)
         
-        overall = sum(scores[k] * weights[k] for k in scores)
+        words = column("words")
+        prose_words = np.array([f["readability"]["words"] for f in features], dtype=np.int64)
+        reading_ease = np.array([f["readability"]["flesch_reading_ease"] for f in features], dtype=np.float64)
         
         return {
-            "overall_score": round(overall, 1),
-            "scores": scores,
-            "grade": self._get_grade(overall),
-            "recommendations": self._get_recommendations(scores)
+            # Flesch reading ease: 60+ is plain English, below 30 is academic
+            "readability": np.select(
+                [prose_words == 0, reading_ease >= 60, reading_ease >= 50, reading_ease >= 30],
+                [0, 100, 80, 60], 40),
+            "structure": np.minimum(
+                20 * (column("h1") == 1) + 30 * (column("h2") >= 3) + 20 * (column("h3") >= 2)
+                + 15 * column("has_list"), 100),
+            "engagement": np.minimum(
+                20 * column("has_question") + 20 * column("has_example") + 20 * column("has_number")
+                + 15 * column("has_quote") + 25 * column("has_cta"), 100),
+            "seo": np.where(column("keyword") == 1, 50 * column("has_keyword") + 50 * (words >= 1000), 0),
+            "completeness": np.select([words >= 1500, words >= 1000, words >= 500], [100, 80, 60], 40)
         }
     
-    def _score_readability(self, content: str) -> float:
-        sentences = len(re.findall(r'[.!?]+', content))
-        words = len(content.split())
-        if sentences == 0 or words == 0: return 0
-        avg_sentence_length = words / sentences
-        if avg_sentence_length <= 15: score = 100
-        elif avg_sentence_length <= 20: score = 80
-        elif avg_sentence_length <= 25: score = 60
-        else: score = 40
-        return score
-    
-    def _score_structure(self, content: str) -> float:
-        score = 0
-        h1_count = content.count('# ')
-        h2_count = content.count('## ')
-        h3_count = content.count('### ')
-        if h1_count == 1: score += 20
-        if h2_count >= 3: score += 30
-        if h3_count >= 2: score += 20
-        if '- ' in content or '1. ' in content: score += 15
-        return min(score, 100)
-    
-    def _score_engagement(self, content: str) -> float:
-        score = 0
-        if '?' in content: score += 20
-        if 'example' in content.lower(): score += 20
-        if re.search(r'\d+', content): score += 20
-        if '"' in content: score += 15
-        cta_phrases = ['learn more', 'get started', 'try', 'discover']
-        if any(phrase in content.lower() for phrase in cta_phrases): score += 25
-        return min(score, 100)
-    
-    def _score_seo(self, content: str, keyword: str) -> float:
-        if not keyword: return 0
-        score = 0
-        if keyword.lower() in content.lower(): score += 50
-        word_count = len(content.split())
-        if word_count >= 1000: score += 50
-        return min(score, 100)
-    
-    def _score_completeness(self, content: str) -> float:
-        word_count = len(content.split())
-        if word_count >= 1500: return 100
-        if word_count >= 1000: return 80
-        if word_count >= 500: return 60
-        return 40
-    
     def _get_grade(self, score: float) -> str:
         if score >= 90: return "A"
         elif score >= 80: return "B"
@@ -93,3 +132,90 @@ class ContentQualityScorer:
         if scores["structure"] < 70: recommendations.append("Add more headers.")
         if not recommendations: recommendations.append("Content looks great!")
         return recommendations
+
+
+class IncrementalQualityScorer:
+    """
+    Quality score of text that arrives in chunks, such as a streamed draft.
+    
+    `feed` updates running counters (words, headings, lists, keyword and CTA
+    hits, readability counts) in time proportional to the chunk, and `score`
+    returns what `score_content` would return for the text so far without
+    rescanning it; only the unfinished last line is looked at again.
+    """
+    
+    def __init__(self, keyword: str = None, scorer: ContentQualityScorer = None):
+        self.keyword = keyword
+        self.scorer = scorer or ContentQualityScorer()
+        self.phrases = tuple(dict.fromkeys(('example',) + CTA_PHRASES + ((keyword.lower(),) if keyword else ())))
+        self.phrase_hits = dict.fromkeys(self.phrases, 0)
+        self.counts = {"words": 0, "h1": 0, "h2": 0, "h3": 0}
+        self.flags = {"has_list": False, "has_question": False, "has_number": False, "has_quote": False}
+        self.readability = ReadabilityCounter()
+        # Counted text always ends at whitespace (words) or a line break (readability)
+        self._word_tail = ""
+        self._line_parts: List[str] = []
+        # End of the counted lowercase text, for phrases that span chunks
+        self._overlap = max(len(phrase) for phrase in self.phrases) - 1
+        self._lower_tail = ""
+    
+    def feed(self, chunk: str):
+        if not chunk:
+            return
+        flags = self.flags
+        flags["has_question"] = flags["has_question"] or '?' in chunk
+        flags["has_quote"] = flags["has_quote"] or '"' in chunk
+        flags["has_number"] = flags["has_number"] or _DIGIT.search(chunk) is not None
+        
+        text = self._word_tail + chunk
+        cut = _PARTIAL_WORD.search(text).start()
+        self._word_tail = text[cut:]
+        if cut:
+            self._count_words(text[:cut])
+        
+        line_end = chunk.rfind('\n') + 1
+        if line_end:
+            self.readability.add("".join(self._line_parts) + chunk[:line_end])
+            self._line_parts = [chunk[line_end:]]
+        else:
+            self._line_parts.append(chunk)
+    
+    def _count_words(self, text: str):
+        counts = self.counts
+        counts["words"] += len(text.split())
+        for mark in _HEADING.findall(text):
+            level = len(mark) - 1
+            counts["h1"] += 1
+            counts["h2"] += level >= 2
+            counts["h3"] += level >= 3
+        self.flags["has_list"] = self.flags["has_list"] or '- ' in text or '1. ' in text
+        
+        tail = self._lower_tail
+        window = tail + text.lower()
+        for phrase, hits in self._phrase_hits(window, tail).items():
+            self.phrase_hits[phrase] += hits
+        self._lower_tail = window[-self._overlap:] if self._overlap else ""
+    
+    def _phrase_hits(self, window: str, tail: str) -> Dict[str, int]:
+        """Occurrences in `window` that end after the already counted `tail`"""
+        return {phrase: window.count(phrase) - tail.count(phrase) for phrase in self.phrases}
+    
+    def features(self) -> Dict:
+        """`analyze` features of the text fed so far"""
+        pending = self._phrase_hits(self._lower_tail + self._word_tail.lower(), self._lower_tail)
+        hits = {phrase: self.phrase_hits[phrase] + pending[phrase] for phrase in self.phrases}
+        return dict(
+            self.counts,
+            **self.flags,
+            # The unfinished word has no whitespace, so it is exactly one word
+            words=self.counts["words"] + bool(self._word_tail),
+            readability=self.readability.metrics("".join(self._line_parts)),
+            has_example=hits['example'] > 0,
+            has_cta=any(hits[phrase] for phrase in CTA_PHRASES),
+            has_keyword=bool(self.keyword) and hits[self.keyword.lower()] > 0,
+            keyword=bool(self.keyword)
+        )
+    
+    def score(self) -> Dict:
+        """Same result as `score_content` on the concatenated chunks"""
+        return self.scorer.score_features([self.features()])[0]
@@ -0,0 +1,366 @@
+import os
+import time
+import random
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_openai import ChatOpenAI
+from context_compactor import estimate_tokens
+from hedging import get_hedge_policy, hedged_stream
+from logger import log_progress
+from metrics import record_queue_wait, registry
+
+# Statuses that mean "slow down"; the limiter backs off and shrinks concurrency on them
+_OVERLOAD_STATUS = {429, 503}
+_RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """In-process token bucket refilled continuously at `rate_per_minute`"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_take(self, amount: float, force: bool = False) -> float:
+        """Take `amount` if available and return 0, else the seconds until it will be"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            return self._settle(amount, force)
+
+    def _settle(self, amount: float, force: bool) -> float:
+        # A request larger than the bucket would never fit; let it through when the bucket is full
+        amount = min(amount, self.capacity)
+        if force or self._tokens >= amount:
+            self._tokens -= amount
+            return 0.0
+        return (amount - self._tokens) / self.rate
+
+    def take(self, amount: float) -> float:
+        """Block until `amount` is available; returns the seconds waited"""
+        waited = 0.0
+        while True:
+            wait = self.try_take(amount)
+            if wait <= 0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+
+class SQLiteTokenBucket(TokenBucket):
+    """Token bucket shared by every process using the same database file"""
+
+    def __init__(self, db_path: str, name: str, rate_per_minute: float, capacity: Optional[float] = None):
+        super().__init__(rate_per_minute, capacity)
+        self.db_path = db_path
+        self.name = name
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+
+    def try_take(self, amount: float, force: bool = False) -> float:
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # Wall-clock time, since monotonic clocks are not comparable across processes
+            now = time.time()
+            row = conn.execute("SELECT tokens, updated FROM rate_buckets WHERE name = ?", (self.name,)).fetchone()
+            tokens, updated = row if row else (self.capacity, now)
+            self._tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+            wait = self._settle(amount, force)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                (self.name, self._tokens, now)
+            )
+            conn.execute("COMMIT")
+            return wait
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency limit: +1 slot per `limit` successful calls, halved on overload.
+
+    Decreases are applied at most once per `cooldown` seconds so a burst of
+    429s from calls that were already in flight counts as a single signal.
+    """
+
+    def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = 32,
+                 decrease_factor: float = 0.5, cooldown: float = 2.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(max(minimum, min(initial, maximum)))
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> float:
+        """Wait for a free slot; returns the seconds waited"""
+        started = time.monotonic()
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+        return time.monotonic() - started
+
+    def release(self, outcome: str = "success"):
+        with self._condition:
+            self.in_flight -= 1
+            if outcome == "success":
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            elif outcome == "overload" and time.monotonic() - self._last_decrease >= self.cooldown:
+                self.limit = max(self.minimum, self.limit * self.decrease_factor)
+                self._last_decrease = time.monotonic()
+            self._condition.notify_all()
+        registry.set("content_llm_concurrency_limit", int(self.limit))
+
+
+def _status_of(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def is_overload(error: BaseException) -> bool:
+    return _status_of(error) in _OVERLOAD_STATUS or "timeout" in type(error).__name__.lower()
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Rate limits, server errors, timeouts and dropped connections are worth retrying"""
+    if _status_of(error) in _RETRY_STATUS:
+        return True
+    name = type(error).__name__.lower()
+    return "timeout" in name or "connection" in name
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0, error: BaseException = None) -> float:
+    """Exponential backoff with full jitter, or the server's Retry-After if it sent one"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    retry_after = headers.get("retry-after") if hasattr(headers, "get") else None
+    if retry_after:
+        try:
+            return min(cap, float(retry_after))
+        except ValueError:
+            pass
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class RateLimiter:
+    """
+    Coordinates LLM calls: request and token budgets per minute, adaptive
+    concurrency, and retries with backoff on 429s, 5xx and timeouts.
+
+    With `db_path` the per-minute budgets are shared by all processes using the
+    file (e.g. several queue workers); the concurrency limit is per process.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 max_concurrency: int = 16, initial_concurrency: int = 4, max_retries: int = 5,
+                 backoff_base: float = 1.0, backoff_cap: float = 60.0, db_path: Optional[str] = None):
+        def bucket(name: str, rate: Optional[float]) -> Optional[TokenBucket]:
+            if not rate:
+                return None
+            return SQLiteTokenBucket(db_path, name, rate) if db_path else TokenBucket(rate)
+
+        self.requests = bucket("requests", requests_per_minute)
+        self.tokens = bucket("tokens", tokens_per_minute)
+        self.concurrency = AdaptiveConcurrency(initial=initial_concurrency, maximum=max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.stats: Dict[str, float] = {"calls": 0, "retries": 0, "overloads": 0, "failures": 0, "queue_wait": 0.0}
+        self._lock = threading.Lock()
+
+    def _count(self, name: str, value: float = 1):
+        with self._lock:
+            self.stats[name] += value
+
+    def _wait_for_budget(self, prompt_tokens: int) -> float:
+        waited = 0.0
+        if self.requests:
+            waited += self.requests.take(1)
+        if self.tokens:
+            waited += self.tokens.take(prompt_tokens)
+        return waited
+
+    @contextmanager
+    def _slot(self, prompt_tokens: int):
+        waited = self._wait_for_budget(prompt_tokens) + self.concurrency.acquire()
+        self._count("queue_wait", waited)
+        record_queue_wait(waited)
+        outcome = "error"
+        try:
+            yield
+            outcome = "success"
+        except BaseException as e:
+            if is_overload(e):
+                outcome = "overload"
+            raise
+        finally:
+            self.concurrency.release(outcome)
+
+    def call(self, fn: Callable[[], Any], prompt_tokens: int = 0,
+             completion_tokens: Callable[[Any], int] = None) -> Any:
+        """Run `fn` within the limits, retrying transient failures"""
+        self._count("calls")
+        attempt = 0
+        while True:
+            try:
+                with self._slot(prompt_tokens):
+                    result = fn()
+                if self.tokens and completion_tokens:
+                    # Charge what the completion actually used; later calls wait for it
+                    self.tokens.try_take(completion_tokens(result), force=True)
+                return result
+            except Exception as e:
+                if not self._back_off(e, attempt):
+                    raise
+                attempt += 1
+
+    def stream(self, fn: Callable[[], Iterator[Any]], prompt_tokens: int = 0,
+               chunk_tokens: Callable[[Any], int] = None) -> Iterator[Any]:
+        """
+        Yield the items of the stream `fn()` as they arrive, within the limits.
+
+        The stream holds its concurrency slot until it ends. Transient failures
+        are retried only before the first item, since items already yielded
+        can't be taken back; the completion tokens are charged when it ends.
+        """
+        self._count("calls")
+        attempt = 0
+        while True:
+            started = False
+            try:
+                with self._slot(prompt_tokens):
+                    used = 0
+                    try:
+                        for item in fn():
+                            started = True
+                            if chunk_tokens:
+                                used += chunk_tokens(item)
+                            yield item
+                    finally:
+                        if self.tokens and used:
+                            self.tokens.try_take(used, force=True)
+                return
+            except Exception as e:
+                if started or not self._back_off(e, attempt):
+                    if started:
+                        self._count("failures")
+                    raise
+                attempt += 1
+
+    def _back_off(self, error: Exception, attempt: int) -> bool:
+        """Count a failed attempt and sleep before retrying it; False if it should not be retried"""
+        if is_overload(error):
+            self._count("overloads")
+        if attempt >= self.max_retries or not is_retryable(error):
+            self._count("failures")
+            return False
+        delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap, error)
+        self._count("retries")
+        registry.inc("content_llm_retries_total", reason=str(_status_of(error) or type(error).__name__))
+        log_progress(f"LLM call failed ({type(error).__name__}); retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+        time.sleep(delay)
+        return True
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats, queue_wait=round(self.stats["queue_wait"], 3))
+        stats["concurrency_limit"] = int(self.concurrency.limit)
+        stats["in_flight"] = self.concurrency.in_flight
+        return stats
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide limiter configured from LLM_* environment variables"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter(
+                # Empty values, as in .env.example, mean the default
+                requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE") or 0) or None,
+                tokens_per_minute=float(os.getenv("LLM_TOKENS_PER_MINUTE") or 0) or None,
+                max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY") or 16),
+                initial_concurrency=int(os.getenv("LLM_INITIAL_CONCURRENCY") or 4),
+                max_retries=int(os.getenv("LLM_MAX_RETRIES") or 5),
+                db_path=os.getenv("LLM_RATE_LIMIT_DB") or None
+            )
+        return _limiter
+
+
+def _prompt_tokens(messages: List[BaseMessage]) -> int:
+    return sum(estimate_tokens(str(message.content)) for message in messages)
+
+
+class RateLimitedChatOpenAI(ChatOpenAI):
+    """
+    ChatOpenAI whose calls go through the process-wide `RateLimiter`.
+
+    Set `max_retries=0` so retries are left to the limiter's backoff. Streamed
+    tokens reach callbacks as they arrive; a stream is only retried if it fails
+    before its first token. Streams are hedged when a `HedgePolicy` is enabled
+    (LLM_HEDGE_ENABLED).
+    """
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        return get_rate_limiter().call(
+            lambda: super(RateLimitedChatOpenAI, self)._generate(messages, stop, run_manager, **kwargs),
+            _prompt_tokens(messages),
+            lambda result: ((result.llm_output or {}).get("token_usage") or {}).get("completion_tokens", 0)
+        )
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        limiter = get_rate_limiter()
+        hedge = get_hedge_policy()
+
+        def attempt() -> Iterator[ChatGenerationChunk]:
+            # Tokens are forwarded below, so only the winning attempt's reach callbacks
+            return super(RateLimitedChatOpenAI, self)._stream(messages, stop, None, **kwargs)
+
+        def source() -> Iterator[ChatGenerationChunk]:
+            if hedge is None:
+                return attempt()
+            # Don't add duplicate requests while the request budget is exhausted
+            can_send = (lambda: limiter.requests.try_take(1) == 0) if limiter.requests else (lambda: True)
+            return hedged_stream(attempt, hedge, can_send)
+
+        # The whole stream counts as one call for retries and concurrency
+        for chunk in limiter.stream(
+            source,
+            _prompt_tokens(messages),
+            lambda chunk: (getattr(chunk.message, "usage_metadata", None) or {}).get("output_tokens", 0)
+        ):
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
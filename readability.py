@@ -0,0 +1,133 @@
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Dict
+
+# Markdown that isn't prose: fenced code, inline code, link targets, bare URLs
+_FENCE = re.compile(r'^[ \t]*(?:```|~~~).*$\n?', re.M)
+_INLINE_CODE = re.compile(r'`[^`\n]*`')
+_LINK = re.compile(r'!?\[([^\]\n]*)\]\([^)\n]*\)')
+_URL = re.compile(r'\b(?:https?://|www\.)\S+')
+# Headings, list items and quotes end at their line, punctuated or not
+_BLOCK_LINE = re.compile(r'^[ \t]*(?:#{1,6}|[-*+]|\d+[.)]|>)[ \t]+(.*?)[.!?:;]*[ \t]*$', re.M)
+# A run of terminators followed by whitespace, so "3.5" and "v1.2.0" don't split;
+# the period of a common abbreviation ("Dr.", "e.g.") is matched as `abbreviation`
+_SENTENCE_END = re.compile(
+    r'(?P<abbreviation>\b(?:mrs?|ms|dr|prof|sr|jr|st|vs|etc|e\.g|i\.e)\.(?=\s))|[.!?]+(?=[\s"\')\]]|$)',
+    re.IGNORECASE
+)
+# Whitespace and closing quotes or brackets after a sentence's terminator
+_CLOSERS = " \t\r\n\f\v\"')]"
+_WORD = re.compile(r"[a-z]+(?:['’][a-z]+)*")
+_VOWEL_GROUPS = re.compile(r'[aeiouy]+')
+_SILENT_ENDING = re.compile(r'(?:[^laeiouy]es|[^laeiouydt]ed|[^laeiouy]e)$')
+
+
+@lru_cache(maxsize=50000)
+def count_syllables(word: str) -> int:
+    """Heuristic syllable count of a lowercase word (vowel groups minus silent endings)"""
+    if len(word) <= 3:
+        return 1
+    word = _SILENT_ENDING.sub(lambda m: m.group()[0], word)
+    if word.startswith("y"):
+        word = word[1:]
+    return max(1, len(_VOWEL_GROUPS.findall(word)))
+
+
+def _strip_inline(text: str) -> str:
+    text = _INLINE_CODE.sub(" ", text)
+    text = _LINK.sub(r"\1", text)
+    text = _URL.sub(" ", text)
+    return _BLOCK_LINE.sub(r"\1.", text)
+
+
+class ReadabilityCounter:
+    """
+    Running word, sentence and syllable counts of markdown fed as complete lines.
+
+    Everything the indices need is additive per line, so text can be added as
+    it streams in; `metrics(tail)` includes a not yet finished last line
+    without consuming it. Fenced code is tracked across calls.
+    """
+
+    def __init__(self):
+        self.words = 0
+        self.sentences = 0
+        self.syllables = 0
+        self.complex_words = 0
+        self._in_code = False
+        # Last non-blank character of the prose so far
+        self._last = ""
+
+    def prose(self, text: str) -> str:
+        """`text` without code, URLs and markdown block markers; updates the fence state"""
+        segments = []
+        position = 0
+        for fence in _FENCE.finditer(text):
+            if not self._in_code:
+                segments.append(text[position:fence.start()])
+            self._in_code = not self._in_code
+            position = fence.end()
+        if not self._in_code:
+            segments.append(text[position:])
+        return _strip_inline("".join(segments))
+
+    def add(self, text: str):
+        """Count `text`, which must end at a line break (or the end of the document)"""
+        text = self.prose(text)
+        words = Counter(_WORD.findall(text.lower()))
+        self.words += sum(words.values())
+        self.sentences += sum(1 for end in _SENTENCE_END.finditer(text) if not end.group("abbreviation"))
+        for word, n in words.items():
+            count = count_syllables(word)
+            self.syllables += count * n
+            if count >= 3:
+                self.complex_words += n
+        self._last = text.rstrip(_CLOSERS)[-1:] or self._last
+
+    def copy(self) -> "ReadabilityCounter":
+        counter = ReadabilityCounter.__new__(ReadabilityCounter)
+        counter.__dict__.update(self.__dict__)
+        return counter
+
+    def metrics(self, tail: str = "") -> Dict:
+        """Flesch reading ease, Flesch-Kincaid grade and Gunning fog, including `tail`"""
+        counter = self
+        if tail:
+            counter = self.copy()
+            counter.add(tail)
+        if not counter.words:
+            return {"words": 0, "sentences": 0, "syllables": 0, "complex_words": 0,
+                    "flesch_reading_ease": 0.0, "flesch_kincaid_grade": 0.0, "gunning_fog": 0.0}
+
+        sentences = counter.sentences
+        # Trailing text without a terminator is a sentence too
+        if counter._last not in (".", "!", "?"):
+            sentences += 1
+        words_per_sentence = counter.words / sentences
+        syllables_per_word = counter.syllables / counter.words
+        return {
+            "words": counter.words,
+            "sentences": sentences,
+            "syllables": counter.syllables,
+            "complex_words": counter.complex_words,
+            "flesch_reading_ease": round(206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word, 1),
+            "flesch_kincaid_grade": round(0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59, 1),
+            "gunning_fog": round(0.4 * (words_per_sentence + 100 * counter.complex_words / counter.words), 1)
+        }
+
+
+def prose(content: str) -> str:
+    """`content` without code, URLs and markdown block markers"""
+    return ReadabilityCounter().prose(content)
+
+
+def readability_metrics(content: str) -> Dict:
+    """
+    Flesch reading ease, Flesch-Kincaid grade and Gunning fog of the prose in
+    `content`. Syllables are counted once per distinct word and memoized, so
+    the cost is dominated by a few regex passes over the text.
+    """
+    counter = ReadabilityCounter()
+    counter.add(content)
+    return counter.metrics()
@@ -0,0 +1,272 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from logger import log_progress
+
+RECORD = "record"
+REPLAY = "replay"
+
+DEFAULT_UPSTREAM = "https://api.deepseek.com/v1"
+
+# Request fields that change the response; `stream` only changes its framing
+_KEY_FIELDS = ("model", "messages", "temperature", "top_p", "max_tokens", "stop", "tools", "tool_choice")
+
+
+def request_key(body: Dict) -> str:
+    """Stable key for a chat-completions request"""
+    canonical = json.dumps({field: body.get(field) for field in _KEY_FIELDS}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class RecordingStore:
+    """One JSON file per recorded request, named by its request key"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._keys: Optional[List[str]] = None
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def save(self, key: str, recording: Dict):
+        tmp = self._path(key) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(recording, f)
+        os.replace(tmp, self._path(key))
+        with self._lock:
+            self._keys = None
+
+    def load(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            if self._keys is None:
+                self._keys = sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith(".json"))
+            return self._keys
+
+    def substitute(self, key: str) -> Optional[Dict]:
+        """A deterministic stand-in recording for an unrecorded request"""
+        keys = self.keys()
+        if not keys:
+            return None
+        return self.load(keys[int(key[:8], 16) % len(keys)])
+
+
+def _content_from_chunks(chunks: List[Dict]) -> str:
+    parts = []
+    for chunk in chunks:
+        if chunk["data"] == "[DONE]":
+            continue
+        for choice in json.loads(chunk["data"]).get("choices", []):
+            parts.append((choice.get("delta") or {}).get("content") or "")
+    return "".join(parts)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "ReplayServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if self.server.mode == RECORD:
+            self._record(body)
+        else:
+            self._replay(body)
+
+    def _start(self, status: int, stream: bool, length: int = None):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/event-stream" if stream else "application/json")
+        if length is not None:
+            self.send_header("Content-Length", str(length))
+        self.end_headers()
+
+    def _send_json(self, status: int, payload: Dict):
+        data = json.dumps(payload).encode("utf-8")
+        self._start(status, stream=False, length=len(data))
+        self.wfile.write(data)
+
+    def _record(self, body: Dict):
+        server = self.server
+        api_key = self.headers.get("Authorization") or f"Bearer {os.getenv('DEEPSEEK_API_KEY', '')}"
+        upstream = urllib.request.Request(
+            server.upstream.rstrip("/") + "/chat/completions",
+            data=json.dumps(body).encode("utf-8"),
+            headers={"Content-Type": "application/json", "Authorization": api_key}
+        )
+        started = time.perf_counter()
+        try:
+            response = urllib.request.urlopen(upstream, timeout=server.upstream_timeout)
+        except urllib.error.HTTPError as e:
+            # Errors are passed through but not recorded
+            data = e.read()
+            self._start(e.code, stream=False, length=len(data))
+            self.wfile.write(data)
+            return
+
+        stream = bool(body.get("stream"))
+        recording = {"request": {"model": body.get("model"), "messages": len(body.get("messages") or [])},
+                     "stream": stream}
+        with response:
+            if stream:
+                self._start(200, stream=True)
+                chunks = []
+                for line in response:
+                    line = line.decode("utf-8").strip()
+                    if not line.startswith("data:"):
+                        continue
+                    chunks.append({"t": round(time.perf_counter() - started, 4), "data": line[5:].strip()})
+                    # Pass chunks through as they arrive so recording a run doesn't slow it down
+                    self.wfile.write(f"{line}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                recording["chunks"] = chunks
+            else:
+                data = response.read()
+                recording["body"] = json.loads(data)
+                self._start(200, stream=False, length=len(data))
+                self.wfile.write(data)
+        recording["duration"] = round(time.perf_counter() - started, 4)
+        server.store.save(request_key(body), recording)
+        server.count("recorded")
+
+    def _replay(self, body: Dict):
+        server = self.server
+        key = request_key(body)
+        recording = server.store.load(key)
+        if recording is None and server.on_miss == "cycle":
+            recording = server.store.substitute(key)
+            server.count("substituted")
+        elif recording is not None:
+            server.count("replayed")
+        if recording is None:
+            server.count("missed")
+            self._send_json(404, {"error": {"message": f"No recording for request {key[:12]}", "type": "replay_miss"}})
+            return
+
+        scale = server.latency_scale
+        if body.get("stream"):
+            chunks = recording.get("chunks") or self._as_chunks(recording)
+            self._start(200, stream=True)
+            started = time.perf_counter()
+            for chunk in chunks:
+                # Keep the original spacing between chunks, scaled
+                delay = chunk["t"] * scale - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+                self.wfile.write(f"data: {chunk['data']}\n\n".encode("utf-8"))
+                self.wfile.flush()
+        else:
+            time.sleep(recording["duration"] * scale)
+            self._send_json(200, recording.get("body") or self._as_body(recording))
+
+    @staticmethod
+    def _as_chunks(recording: Dict) -> List[Dict]:
+        """Stream a recorded non-streaming response as one content chunk"""
+        body = recording["body"]
+        message = body["choices"][0]["message"]
+        chunk = {
+            "id": body.get("id"), "object": "chat.completion.chunk", "model": body.get("model"),
+            "choices": [{"index": 0, "delta": {"role": "assistant", "content": message.get("content")},
+                         "finish_reason": "stop"}],
+            "usage": body.get("usage")
+        }
+        return [{"t": recording["duration"], "data": json.dumps(chunk)}, {"t": recording["duration"], "data": "[DONE]"}]
+
+    @staticmethod
+    def _as_body(recording: Dict) -> Dict:
+        """Assemble a recorded stream into a single chat-completion response"""
+        last = json.loads(next(c["data"] for c in reversed(recording["chunks"]) if c["data"] != "[DONE]"))
+        return {
+            "id": last.get("id"), "object": "chat.completion", "model": last.get("model"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": _content_from_chunks(recording["chunks"])}}],
+            "usage": last.get("usage")
+        }
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """
+    OpenAI-compatible chat-completions server for load tests.
+
+    In `record` mode requests are forwarded to `upstream` (DeepSeek by default)
+    and each response is saved with the arrival time of every streamed chunk.
+    In `replay` mode recorded responses are served with their original timing
+    multiplied by `latency_scale`. Requests that were never recorded get a 404,
+    or with `on_miss="cycle"` a deterministic substitute from the recordings,
+    so arbitrary topics can be load tested from a small recording set.
+    """
+
+    daemon_threads = True
+    # Room for hundreds of concurrent generations
+    request_queue_size = 1024
+
+    def __init__(self, address, mode: str, directory: str, upstream: str = DEFAULT_UPSTREAM,
+                 latency_scale: float = 1.0, on_miss: str = "error", upstream_timeout: float = 600):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"mode must be '{RECORD}' or '{REPLAY}'")
+        super().__init__(address, _Handler)
+        self.mode = mode
+        self.store = RecordingStore(directory)
+        self.upstream = upstream
+        self.latency_scale = latency_scale
+        self.on_miss = on_miss
+        self.upstream_timeout = upstream_timeout
+        self.stats: Dict[str, int] = {"recorded": 0, "replayed": 0, "substituted": 0, "missed": 0}
+        self._stats_lock = threading.Lock()
+
+    def count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+def start_replay_server(mode: str, directory: str, port: int = 0, host: str = "127.0.0.1", **options) -> ReplayServer:
+    """Serve in a background thread; point DEEPSEEK_API_BASE at `server.base_url`"""
+    server = ReplayServer((host, port), mode, directory, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record or replay DeepSeek chat completions")
+    parser.add_argument("mode", choices=[RECORD, REPLAY])
+    parser.add_argument("--dir", default="recordings", help="Recording directory")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--upstream", default=DEFAULT_UPSTREAM, help="API base to record from")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Replay timing multiplier (0: no delay)")
+    parser.add_argument("--on-miss", choices=["error", "cycle"], default="error",
+                        help="Unrecorded requests: return 404, or replay a substitute recording")
+    args = parser.parse_args()
+
+    server = ReplayServer((args.host, args.port), args.mode, args.dir, upstream=args.upstream,
+                          latency_scale=args.latency_scale, on_miss=args.on_miss)
+    log_progress(f"Replay server ({args.mode}) on {server.base_url}; set DEEPSEEK_API_BASE to this URL")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        log_progress(f"Replay server stats: {server.stats}")
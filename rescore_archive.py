@@ -0,0 +1,99 @@
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from logger import log_progress
+from content_versioning import ContentVersionControl
+from quality_scorer import SCORER_VERSION, ContentQualityScorer
+
+
+def score_rows(rows: List[Dict]) -> List[Dict]:
+    """Score one chunk of version rows; the topic is the SEO keyword, as in the app"""
+    results = ContentQualityScorer().score_batch([row["content"] for row in rows],
+                                                 [row["content_id"] for row in rows])
+    return [
+        {
+            "version_id": row["id"],
+            "scorer_version": SCORER_VERSION,
+            "content_hash": row["content_hash"],
+            "overall_score": result["overall_score"],
+            "grade": result["grade"],
+            "scores": result["scores"],
+            "readability": result["readability_metrics"]
+        }
+        for row, result in zip(rows, results)
+    ]
+
+
+def score_version(vc: ContentVersionControl, content_id: str, version: int) -> Optional[Dict]:
+    """
+    Score of one version with the current rubric, as `score_content` returns it.
+    The stored score is used if there is one; otherwise it is computed and saved.
+    """
+    stored = vc.get_score(content_id, version, SCORER_VERSION)
+    if stored is None:
+        return None
+    if stored["overall_score"] is None:
+        row = {"id": stored["version_id"], "content_id": content_id, "content_hash": stored["content_hash"],
+               "content": vc.get_version(content_id, version)}
+        stored = score_rows([row])[0]
+        vc.save_scores([stored])
+    return ContentQualityScorer().from_stored(stored)
+
+
+def rescore_archive(vc: ContentVersionControl = None, workers: int = None, chunk_size: int = 500,
+                    force: bool = False) -> Dict:
+    """
+    Score every version that has no score from the current `SCORER_VERSION`
+    for its current content, and upsert the results into `content_scores`.
+
+    Rows are streamed from the database in chunks and scored across a process
+    pool (`workers=0` scores in this process). At most two chunks per worker
+    are in flight, so memory stays bounded however large the archive is.
+    """
+    vc = vc or ContentVersionControl()
+    if workers is None:
+        workers = os.cpu_count() or 1
+    started = time.perf_counter()
+    scored = 0
+
+    def save(scores: List[Dict]):
+        nonlocal scored
+        vc.save_scores(scores)
+        scored += len(scores)
+
+    chunks = vc.iter_unscored(SCORER_VERSION, chunk_size, force)
+    if workers == 0:
+        for rows in chunks:
+            save(score_rows(rows))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = []
+            for rows in chunks:
+                pending.append(pool.submit(score_rows, rows))
+                if len(pending) >= 2 * workers:
+                    save(pending.pop(0).result())
+            for future in pending:
+                save(future.result())
+
+    seconds = time.perf_counter() - started
+    return {
+        "scorer_version": SCORER_VERSION,
+        "scored": scored,
+        "seconds": round(seconds, 2),
+        "rows_per_second": round(scored / seconds, 1) if seconds else 0.0
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score archived content versions with the current rubric")
+    parser.add_argument("--db", default=None, help="Versions database (default: CONTENT_VERSIONS_DB)")
+    parser.add_argument("--workers", type=int, default=None, help="Scoring processes (default: CPU count, 0: inline)")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--force", action="store_true", help="Rescore versions that already have a current score")
+    args = parser.parse_args()
+
+    stats = rescore_archive(ContentVersionControl(args.db), args.workers, args.chunk_size, args.force)
+    log_progress(f"Scored {stats['scored']} version(s) with scorer v{stats['scorer_version']} "
+                 f"in {stats['seconds']}s ({stats['rows_per_second']} rows/s)")
@@ -0,0 +1,118 @@
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, List, Optional
+from logger import log_progress
+
+# Separator CrewAI uses when it aggregates upstream task outputs into context
+CONTEXT_DIVIDER = "\n\n----------\n\n"
+
+
+def _run_crewai_task(name: str, task: Any, context: str) -> str:
+    """Execute a single CrewAI task with an explicit context string"""
+    output = task.execute_sync(agent=task.agent, context=context or None)
+    return output.raw
+
+
+class TaskGraphScheduler:
+    """Run tasks concurrently as soon as the tasks in their `context` have finished"""
+
+    def __init__(self, max_workers: int = 4, executor: Callable[[str, Any, str], str] = None):
+        self.max_workers = max(1, max_workers)
+        self.execute = executor or _run_crewai_task
+
+    def _dependencies(self, tasks: Dict[str, Any]) -> Dict[str, List[str]]:
+        names = {id(task): name for name, task in tasks.items()}
+        deps = {}
+        for name, task in tasks.items():
+            deps[name] = []
+            for upstream in getattr(task, "context", None) or []:
+                if id(upstream) not in names:
+                    raise ValueError(f"Task '{name}' depends on a task outside the graph")
+                deps[name].append(names[id(upstream)])
+        return deps
+
+    def run(
+        self,
+        tasks: Dict[str, Any],
+        completed: Optional[Dict[str, str]] = None,
+        on_complete: Optional[Callable[[str, str], None]] = None,
+        on_start: Optional[Callable[[str], None]] = None,
+        context_builder: Optional[Callable[[str, Dict[str, str]], str]] = None
+    ) -> Dict:
+        """
+        Execute a task graph and return outputs, timings and the critical path.
+
+        `tasks` maps a stage name to a task; edges are read from each task's
+        `context` list. Timings are seconds relative to the start of the run.
+        Stages in `completed` are not executed; their stored output is used as
+        context for downstream stages. `on_start(name)` is called in the worker
+        thread before a stage runs and `on_complete(name, output)` as each
+        executed stage finishes. `context_builder(name, upstream_outputs)` turns
+        the upstream outputs into the stage's context string; by default they are
+        joined the way CrewAI does.
+        """
+        deps = self._dependencies(tasks)
+        outputs: Dict[str, str] = {name: output for name, output in (completed or {}).items() if name in tasks}
+        timings: Dict[str, Dict[str, float]] = {}
+        pending = {name: upstream for name, upstream in deps.items() if name not in outputs}
+        running = {}
+        run_start = time.perf_counter()
+
+        def timed(name: str, context: str) -> str:
+            start = time.perf_counter() - run_start
+            log_progress(f"▶ Stage '{name}' started at +{start:.1f}s")
+            if on_start:
+                on_start(name)
+            try:
+                return self.execute(name, tasks[name], context)
+            finally:
+                end = time.perf_counter() - run_start
+                timings[name] = {"start": round(start, 3), "end": round(end, 3),
+                                 "duration": round(end - start, 3)}
+                log_progress(f"■ Stage '{name}' finished at +{end:.1f}s")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                ready = [name for name, upstream in pending.items()
+                         if all(u in outputs for u in upstream)]
+                for name in ready:
+                    upstream = {u: outputs[u] for u in pending.pop(name)}
+                    if context_builder:
+                        context = context_builder(name, upstream)
+                    else:
+                        context = CONTEXT_DIVIDER.join(upstream.values())
+                    # Carry run-scoped context variables (e.g. cache bypass) into the worker thread
+                    running[pool.submit(contextvars.copy_context().run, timed, name, context)] = name
+
+                if not running:
+                    raise ValueError(f"Task graph has a cycle: {sorted(pending)}")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    # Re-raise the first failure once the stages already running have finished
+                    outputs[name] = future.result()
+                    if on_complete:
+                        on_complete(name, outputs[name])
+
+        return {
+            "outputs": outputs,
+            "timings": timings,
+            "critical_path": self.critical_path(deps, timings),
+            "skipped": sorted(name for name in outputs if name not in timings),
+            "wall_time": round(time.perf_counter() - run_start, 3)
+        }
+
+    @staticmethod
+    def critical_path(deps: Dict[str, List[str]], timings: Dict[str, Dict[str, float]]) -> List[str]:
+        """Walk back from the last task to finish through the upstream task that gated each start"""
+        if not timings:
+            return []
+        node: Optional[str] = max(timings, key=lambda n: timings[n]["end"])
+        path = []
+        while node is not None:
+            path.append(node)
+            upstream = [u for u in deps.get(node, []) if u in timings]
+            node = max(upstream, key=lambda u: timings[u]["end"]) if upstream else None
+        return list(reversed(path))
@@ -20,3 +20,856 @@ def test_agent_roles():
     roles = [agent.role for agent in crew.agents.values()]
     assert "Senior Research Analyst" in roles
     assert "Expert Content Writer" in roles
+
+def test_task_graph_scheduler_runs_independent_tasks_concurrently():
+    import time
+    from types import SimpleNamespace
+    from task_scheduler import TaskGraphScheduler
+
+    edit = SimpleNamespace(context=[])
+    fact_check = SimpleNamespace(context=[edit])
+    seo_keywords = SimpleNamespace(context=[edit])
+    seo = SimpleNamespace(context=[edit, fact_check, seo_keywords])
+
+    def execute(name, task, context):
+        time.sleep(0.2 if name == "fact_check" else 0.05)
+        return f"{name}({context})"
+
+    run = TaskGraphScheduler(max_workers=4, executor=execute).run(
+        {"edit": edit, "fact_check": fact_check, "seo_keywords": seo_keywords, "seo": seo}
+    )
+    timings = run["timings"]
+    assert timings["seo_keywords"]["start"] < timings["fact_check"]["end"]
+    assert timings["seo"]["start"] >= timings["fact_check"]["end"]
+    assert run["critical_path"] == ["edit", "fact_check", "seo"]
+    assert run["outputs"]["seo"].startswith("seo(edit()")
+
+def test_generate_batch_yields_results_as_jobs_complete(monkeypatch):
+    import time
+    import custom_tools  # generate_content imports it; keep that out of the timing
+
+    def fake_generate(self, topic, content_type, agents, parallel, max_workers, run_id=None, resume=False,
+                      reuse=None, progress_callback=None, context_budgets=None, profile=None):
+        time.sleep(0.3 if topic == "slow" else 0.05)
+        return {"final_content": topic, "topic": topic, "content_type": content_type, "profile": profile,
+                "max_workers": max_workers, "metrics": {"stages": {}}}
+
+    monkeypatch.setattr(ContentGenerationCrew, "_create_agents", lambda self, variants=None: {})
+    monkeypatch.setattr(ContentGenerationCrew, "_generate", fake_generate)
+    monkeypatch.setenv("PIPELINE_MAX_WORKERS", "3")
+    crew = ContentGenerationCrew()
+
+    jobs = [("slow", "Blog Post"), ("fast", "Newsletter"), ("fast-2", "Newsletter")]
+    started = time.perf_counter()
+    results = list(crew.generate_batch(jobs, max_concurrency=3, profile="lite", latency_budget=600))
+    assert time.perf_counter() - started < 0.6
+    assert [r["topic"] for r in results][-1] == "slow"
+    assert sorted(r["job_index"] for r in results) == [0, 1, 2]
+    # Jobs run through generate_content with the batch's options, as single runs do
+    assert all("error" not in r and "routing" in r for r in results)
+    assert {(r["profile"], r["max_workers"]) for r in results} == {("lite", 3)}
+
+def test_job_queue_claims_each_job_once_and_requeues_stale_jobs(tmp_path):
+    from job_queue import JobQueue, QUEUED, RUNNING, SUCCEEDED
+
+    queue = JobQueue(db_path=str(tmp_path / "jobs.db"))
+    first = queue.enqueue("Topic A", "Blog Post")
+    second = queue.enqueue("Topic B", "Newsletter", parallel=True)
+
+    job = queue.claim("worker-1")
+    assert job["id"] == first and job["status"] == RUNNING
+    assert queue.claim("worker-2")["options"] == {"parallel": True}
+    assert queue.claim("worker-3") is None
+
+    queue.complete(first, {"final_content": "done"})
+    assert queue.get(first)["status"] == SUCCEEDED
+    assert queue.get(first)["result"] == {"final_content": "done"}
+
+    assert queue.requeue_stale(lease_seconds=-1) == 1
+    assert queue.get(second)["status"] == QUEUED
+
+def test_llm_response_cache_hits_evicts_and_bypasses(tmp_path):
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+    from disk_cache import DiskCache
+    from llm_cache import LLMResponseCache
+
+    cache = LLMResponseCache(DiskCache(str(tmp_path / "llm.db"), namespace="llm", max_entries=2))
+    llm = FakeListChatModel(responses=["first", "second", "third", "fourth"], cache=cache)
+
+    assert llm.invoke("hello").content == "first"
+    assert llm.invoke("hello").content == "first"
+    with cache.bypassed():
+        assert llm.invoke("hello").content == "second"
+    assert llm.invoke("hello").content == "second"
+
+    llm.invoke("prompt two")
+    llm.invoke("prompt three")
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["hits"] == 2 and stats["bypassed"] == 1
+
+def test_search_service_caches_normalized_queries_and_coalesces_in_flight(tmp_path):
+    import time
+    import threading
+    from disk_cache import DiskCache
+    from custom_tools import SearchService
+
+    class SlowRunner:
+        calls = 0
+
+        def run(self, query):
+            SlowRunner.calls += 1
+            time.sleep(0.2)
+            return f"results for {query}"
+
+    service = SearchService(disk_cache=DiskCache(str(tmp_path / "search.db"), namespace="search"), runner=SlowRunner())
+    threads = [threading.Thread(target=service.search, args=("AI in Healthcare",)) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    service.search("  ai, in HEALTHCARE!")
+    assert SlowRunner.calls == 1
+    # Reordered words can mean something else and are searched separately
+    assert SearchService.normalize("Python to Rust migration") != SearchService.normalize("rust to python migration")
+
+    stats = service.stats()
+    assert stats["coalesced"] == 2 and stats["memory_hits"] == 1 and stats["misses"] == 1
+    assert stats["avg_search_seconds"] >= 0.2
+
+    fresh = SearchService(disk_cache=DiskCache(str(tmp_path / "search.db"), namespace="search"), runner=SlowRunner())
+    assert fresh.search("ai in healthcare") == "results for AI in Healthcare"
+    assert fresh.stats()["disk_hits"] == 1 and SlowRunner.calls == 1
+
+def test_scheduler_resumes_from_checkpointed_stages(tmp_path):
+    from types import SimpleNamespace
+    from checkpoints import CheckpointStore
+    from task_scheduler import TaskGraphScheduler
+
+    research = SimpleNamespace(context=[])
+    write = SimpleNamespace(context=[research])
+    seo = SimpleNamespace(context=[write])
+    tasks = {"research": research, "write": write, "seo": seo}
+    store = CheckpointStore(db_path=str(tmp_path / "checkpoints.db"))
+    executed = []
+
+    def flaky(name, task, context):
+        executed.append(name)
+        if name == "seo":
+            raise RuntimeError("SEO stage timed out")
+        return f"{name} output"
+
+    save = lambda stage, output: store.save("run-1", stage, output)
+    with pytest.raises(RuntimeError):
+        TaskGraphScheduler(executor=flaky).run(tasks, on_complete=save)
+    assert store.load("run-1") == {"research": "research output", "write": "write output"}
+
+    executed.clear()
+    contexts = {}
+
+    def recovered(name, task, context):
+        executed.append(name)
+        contexts[name] = context
+        return f"{name} output"
+
+    run = TaskGraphScheduler(executor=recovered).run(tasks, completed=store.load("run-1"), on_complete=save)
+    assert executed == ["seo"]
+    assert contexts["seo"] == "write output"
+    assert run["skipped"] == ["research", "write"]
+
+def test_worker_scopes_checkpoints_to_the_job_and_retries_only_transient_errors(tmp_path, monkeypatch):
+    from checkpoints import CheckpointStore
+    from job_queue import JobQueue
+    from worker import process_job
+
+    monkeypatch.setenv("CONTENT_VERSIONS_DB", str(tmp_path / "versions.db"))
+    store = CheckpointStore(db_path=str(tmp_path / "checkpoints.db"))
+    solar = store.fingerprint("Solar", "Blog Post", "standard")
+    store.save("job-1", "research", "Solar research", solar)
+    # A different topic under the same run id sees none of its stages
+    assert store.load("job-1", store.fingerprint("Wind", "Blog Post", "standard")) == {}
+    assert store.load("job-1", solar) == {"research": "Solar research"}
+
+    calls = []
+
+    class Crew:
+        checkpoints = store
+
+        def generate_content(self, topic, content_type, run_id, resume, **kwargs):
+            calls.append((run_id, resume))
+            store.save(run_id, "research", "notes", solar)
+            if len(calls) == 1:
+                raise TimeoutError("LLM timed out")
+            return {"final_content": "# Solar\nDone.", "artifacts": {"research": "notes"}}
+
+    queue = JobQueue(db_path=str(tmp_path / "jobs.db"))
+    job_id = queue.enqueue("Solar", "Blog Post")
+    process_job(Crew(), queue, queue.claim("w1"))
+    process_job(Crew(), queue, queue.claim("w1"))
+    # Only the retry resumes, and its checkpoints go once the version is saved
+    assert [resume for _, resume in calls] == [False, True]
+    assert calls[0][0] == calls[1][0] != f"job-{job_id}"
+    assert store.load(calls[0][0], solar) == {}
+    assert queue.get(job_id)["result"]["version"] == 1
+
+    class BadProfile(Crew):
+        def generate_content(self, topic, content_type, **kwargs):
+            raise ValueError("Unknown profile: 'huge'")
+
+    # Errors that will fail every time are not retried
+    job_id = queue.enqueue("Solar", "Blog Post", profile="huge")
+    process_job(BadProfile(), queue, queue.claim("w1"))
+    assert queue.get(job_id)["status"] == "failed" and queue.get(job_id)["attempts"] == 1
+
+def test_fresh_artifacts_reuse_research_within_window(tmp_path):
+    from datetime import timedelta
+    from content_versioning import ContentVersionControl
+
+    vc = ContentVersionControl(db_path=str(tmp_path / "versions.db"))
+    vc.save_version("Solar", "v1 text", artifacts={"research": "R1", "outline": "O1"}, content_type="Blog Post")
+
+    assert vc.get_fresh_artifacts("Solar", timedelta(hours=1), "Blog Post") == {"research": "R1", "outline": "O1"}
+    assert vc.get_fresh_artifacts("Solar", timedelta(hours=1), "Newsletter") == {"research": "R1"}
+    assert vc.get_fresh_artifacts("Solar", timedelta(seconds=-60), "Blog Post") == {}
+    assert vc.get_fresh_artifacts("Wind", timedelta(hours=1), "Blog Post") == {}
+
+def _stub_pipeline(monkeypatch, tmp_path, execute):
+    """Crew whose tasks call `execute(name, agent)` instead of an LLM, storing its data under tmp_path"""
+    from types import SimpleNamespace
+    from pipeline_profiles import get_profile, plan_stages
+
+    def create_tasks(self, topic, content_type, parallel=False, agents=None, profile=None):
+        tasks, roles = {}, {}
+        for stage in plan_stages(get_profile(content_type, profile)[1], parallel=parallel):
+            def execute_sync(agent=None, context=None, name=stage["name"]):
+                return SimpleNamespace(raw=execute(name, agent))
+            agent = roles.setdefault(stage["agent"], SimpleNamespace(role=stage["agent"]))
+            tasks[stage["name"]] = SimpleNamespace(
+                name=stage["name"], context=[tasks[dep] for dep in stage["context"]],
+                agent=agent, execute_sync=execute_sync
+            )
+        return list(tasks.values())
+
+    for name in ("CONTENT_VERSIONS_DB", "CHECKPOINT_DB", "METRICS_FILE"):
+        monkeypatch.setenv(name, str(tmp_path / name.lower()))
+    monkeypatch.setattr(ContentGenerationCrew, "_create_agents", lambda self, variants=None: {})
+    monkeypatch.setattr(ContentGenerationCrew, "_create_tasks", create_tasks)
+    return ContentGenerationCrew()
+
+def test_reused_research_expires_at_its_original_age(tmp_path, monkeypatch):
+    import sqlite3
+    from content_versioning import ContentVersionControl
+
+    executed = []
+
+    def execute(name, agent):
+        executed.append(name)
+        return f"{name} #{len(executed)}"
+
+    crew = _stub_pipeline(monkeypatch, tmp_path, execute)
+    vc = ContentVersionControl()
+
+    def regenerate():
+        executed.clear()
+        result = crew.generate_content("Solar", "Blog Post", parallel=True, refresh=True, research_max_age_hours=2)
+        vc.save_version("Solar", result["final_content"], artifacts=result["artifacts"], content_type="Blog Post")
+        return result
+
+    assert "research" in regenerate()["artifacts"]
+    with sqlite3.connect(vc.db_path) as conn:
+        conn.execute("UPDATE content_artifacts SET created_at = datetime('now', '-90 minutes')")
+
+    # Within the window the research is reused and not stored again...
+    result = regenerate()
+    assert result["reused_stages"] == ["outline", "research"] and result["artifacts"] == {}
+    assert "research" not in executed
+    # ...so it still expires 2h after it was produced
+    with sqlite3.connect(vc.db_path) as conn:
+        conn.execute("UPDATE content_artifacts SET created_at = datetime(created_at, '-1 hour')")
+    result = regenerate()
+    assert "research" in executed and result["reused_stages"] == []
+    assert result["artifacts"]["research"].startswith("research #")
+
+def test_parallel_runs_report_agent_steps_and_the_agents_used(tmp_path, monkeypatch):
+    from types import SimpleNamespace
+
+    def execute(name, agent):
+        agent.step_callback(SimpleNamespace(tool="search", tool_input=name))
+        return f"{name} output"
+
+    crew = _stub_pipeline(monkeypatch, tmp_path, execute)
+    events = []
+    result = crew.generate_content("Solar", "Blog Post", parallel=True,
+                                   progress_callback=lambda event, snapshot: events.append(event))
+    steps = {event["stage"]: event["text"] for event in events if event["type"] == "step"}
+    assert steps["fact_check"] == "🔧 Using search: fact_check"
+    assert set(steps) == {"research", "outline", "write", "edit", "fact_check", "seo_keywords", "seo"}
+    # Counts the agents the run's tasks used, not the crew's default set
+    assert result["agents_used"] == 5
+    assert crew.generate_content("Solar", "Newsletter", parallel=True)["agents_used"] == 3
+
+def test_progress_reporter_streams_tokens_to_the_active_stage():
+    from progress import ProgressReporter, LLMStreamRelay
+
+    events = []
+    reporter = ProgressReporter(lambda event, snapshot: events.append((event, snapshot)),
+                                stages=["research", "write"],
+                                agents={"research": "Senior Research Analyst", "write": "Expert Content Writer"})
+    relay = LLMStreamRelay()
+    relay.on_llm_new_token("ignored outside a run")
+    with reporter.activate():
+        reporter.stage_reused("research")
+        reporter.stage_started("write")
+        relay.on_llm_new_token("# Draft")
+        relay.on_llm_new_token(" title")
+
+    event, snapshot = events[-1]
+    assert event == {"type": "token", "stage": "write", "text": " title", "elapsed": event["elapsed"]}
+    assert snapshot["active_agents"] == ["Expert Content Writer"]
+    assert snapshot["draft"] == "# Draft title"
+    assert snapshot["stages"]["research"]["status"] == "reused"
+
+def test_run_metrics_attribute_llm_and_tool_calls_to_stages():
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+    from langchain_core.messages import AIMessage
+    from langchain_core.outputs import ChatGeneration, LLMResult
+    from metrics import RunMetrics, LLMMetricsRelay, estimate_cost, record_tool_call, render_prometheus
+
+    llm = FakeListChatModel(responses=["draft"], callbacks=[LLMMetricsRelay()])
+    metrics = RunMetrics()
+    token = metrics.activate()
+    try:
+        metrics.stage_started("write")
+        llm.invoke("Write the article")
+        record_tool_call("search_tool", 0.25)
+        metrics.stage_finished("write")
+    finally:
+        metrics.deactivate(token)
+
+    summary = metrics.summary()
+    assert summary["stages"]["write"]["llm_calls"] == 1
+    assert summary["stages"]["write"]["tool_calls"]["search_tool"] == {"count": 1, "seconds": 0.25}
+    assert summary["totals"]["llm_calls"] == 1
+    # The fake model names no model anywhere
+    assert 'content_llm_calls_total{model="unknown",stage="write"}' in render_prometheus()
+
+    # Streamed responses carry the model only on the message
+    streamed = LLMMetricsRelay()
+    streamed.on_chat_model_start({}, [], run_id="run", invocation_params={"model": "deepseek-chat"})
+    message = AIMessage(content="draft", response_metadata={"model_name": "deepseek-reasoner"},
+                        usage_metadata={"input_tokens": 1000, "output_tokens": 1000, "total_tokens": 2000})
+    token = metrics.activate()
+    try:
+        metrics.stage_started("seo")
+        streamed.on_llm_end(LLMResult(generations=[[ChatGeneration(message=message)]]), run_id="run")
+    finally:
+        metrics.deactivate(token)
+    assert metrics.summary()["stages"]["seo"]["cost_usd"] == round(estimate_cost("deepseek-reasoner", 1000, 1000), 6)
+
+def test_context_compactor_keeps_primary_input_and_shrinks_supporting_context():
+    from context_compactor import ContextCompactor, estimate_tokens
+
+    article = "# Solar Power\n\n" + "Solar adoption keeps growing across regions. " * 40
+    filler = "\n\n".join(f"Claim {i} was checked and is accurate as stated in the article." for i in range(60))
+    report = "# Fact-Check Report\n\n" + filler + "\n\n❌ Incorrect: the 2023 capacity figure should be 1.6 TW (source: IEA)."
+    budget = estimate_tokens(article) + 150
+
+    compactor = ContextCompactor({"seo": budget})
+    context = compactor.compact("seo", {"edit": article, "fact_check": report})
+
+    assert context.startswith(article)
+    assert "Incorrect: the 2023 capacity figure" in context
+    assert estimate_tokens(context) <= budget
+    stats = compactor.summary()["stages"]["seo"]
+    assert stats["saved_tokens"] == stats["original_tokens"] - stats["compacted_tokens"] > 0
+
+    # A primary input larger than the budget is never cut; only supporting context goes
+    tight = ContextCompactor({"seo": 50})
+    assert tight.compact("seo", {"edit": article, "fact_check": report}) == article
+    assert tight.summary()["over_budget_stages"] == ["seo"]
+
+def test_pipeline_profiles_merge_and_skip_stages():
+    from pipeline_profiles import PROFILES, get_profile, plan_stages
+
+    assert get_profile("Newsletter")[0] == "newsletter"
+    assert get_profile("Unknown Type")[0] == "blog_post"
+    with pytest.raises(ValueError):
+        get_profile("Blog Post", profile="turbo")
+
+    lite = plan_stages(PROFILES["lite"])
+    assert [(s["name"], s["context"]) for s in lite] == [
+        ("research", []), ("draft", ["research"]), ("polish", ["draft"])
+    ]
+    assert lite[1]["members"] == ["outline", "write"]
+    assert lite[2]["agent"] == "seo_specialist"
+
+    full = {s["name"]: s["context"] for s in plan_stages(PROFILES["full"], parallel=True)}
+    assert full["seo_keywords"] == ["edit"]
+    assert full["seo"] == ["edit", "fact_check", "seo_keywords"]
+    sequential = {s["name"]: s["context"] for s in plan_stages(PROFILES["full"])}
+    assert sequential["seo"] == ["edit", "fact_check"]
+
+def test_crew_module_defers_heavy_imports():
+    import subprocess
+    import sys
+
+    script = (
+        "import sys\n"
+        "from content_generation_crew import ContentGenerationCrew\n"
+        "ContentGenerationCrew()\n"
+        "print(sorted(m for m in ('crewai', 'langchain_openai', 'custom_tools') if m in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+def test_benchmark_stubs_are_deterministic_and_report_usage():
+    from benchmarks.stubs import StubChatModel, StubSearch
+    from benchmarks.pipeline_benchmark import stage_overhead
+    from metrics import RunMetrics, LLMMetricsRelay
+
+    llm = StubChatModel(response_words=50, callbacks=[LLMMetricsRelay()])
+    metrics = RunMetrics()
+    token = metrics.activate()
+    try:
+        metrics.stage_started("write")
+        first = llm.invoke("Write about solar").content
+        assert llm.invoke("Write about solar").content == first
+        metrics.stage_finished("write")
+    finally:
+        metrics.deactivate(token)
+
+    assert first.startswith("Thought: I now know the final answer\nFinal Answer:")
+    assert len(first.split("Final Answer:")[1].split()) >= 50
+    assert "Action: search_tool" in llm.invoke("Tools: search_tool. Research topic: solar").content
+    write = metrics.summary()["stages"]["write"]
+    assert write["llm_calls"] == 2 and write["completion_tokens"] > 0
+    assert stage_overhead(metrics.summary())["write"] <= write["wall_time"]
+    assert StubSearch(result_words=20).run("solar").startswith("Results for solar")
+
+def test_replay_server_records_and_replays_streamed_completions(tmp_path):
+    import json
+    import time
+    from langchain_openai import ChatOpenAI
+    from replay_server import RECORD, REPLAY, RecordingStore, start_replay_server
+
+    def chunk(content, usage=None):
+        return json.dumps({"id": "c1", "object": "chat.completion.chunk", "created": 0, "model": "deepseek-chat",
+                           "choices": [{"index": 0, "delta": {"content": content}, "finish_reason": None}],
+                           "usage": usage})
+
+    # Stands in for DeepSeek: replays a canned stream for any request
+    RecordingStore(str(tmp_path / "upstream")).save("canned", {"stream": True, "duration": 0.2, "chunks": [
+        {"t": 0.0, "data": chunk("Hello")}, {"t": 0.2, "data": chunk(" world")}, {"t": 0.2, "data": "[DONE]"}
+    ]})
+    upstream = start_replay_server(REPLAY, str(tmp_path / "upstream"), on_miss="cycle")
+    recorder = start_replay_server(RECORD, str(tmp_path / "recorded"), upstream=upstream.base_url)
+    replayer = start_replay_server(REPLAY, str(tmp_path / "recorded"), latency_scale=0.0)
+    try:
+        def llm(server, streaming):
+            return ChatOpenAI(model="deepseek-chat", api_key="sk-test", base_url=server.base_url,
+                              streaming=streaming, max_retries=0)
+
+        assert llm(recorder, True).invoke("Say hello").content == "Hello world"
+        recording = RecordingStore(str(tmp_path / "recorded"))
+        saved = recording.load(recording.keys()[0])
+        assert saved["stream"] and saved["chunks"][-1]["t"] >= 0.15
+
+        started = time.perf_counter()
+        assert llm(replayer, True).invoke("Say hello").content == "Hello world"
+        assert llm(replayer, False).invoke("Say hello").content == "Hello world"
+        # Two calls at the recorded timing would take at least 0.4s
+        assert time.perf_counter() - started < 0.3
+        assert replayer.stats["replayed"] == 2
+    finally:
+        for server in (upstream, recorder, replayer):
+            server.shutdown()
+
+def test_rate_limiter_backs_off_adapts_concurrency_and_shares_budgets(tmp_path):
+    import time
+    from rate_limiter import RateLimiter, SQLiteTokenBucket
+    from metrics import RunMetrics
+
+    class RateLimited(Exception):
+        status_code = 429
+
+    limiter = RateLimiter(requests_per_minute=600, initial_concurrency=8, max_retries=3, backoff_base=0.01)
+    limiter.requests.capacity = 1
+    attempts = []
+
+    def flaky():
+        attempts.append(time.perf_counter())
+        if len(attempts) < 3:
+            raise RateLimited()
+        return "ok"
+
+    metrics = RunMetrics()
+    token = metrics.activate()
+    try:
+        metrics.stage_started("write")
+        assert limiter.call(flaky) == "ok"
+    finally:
+        metrics.deactivate(token)
+
+    stats = limiter.snapshot()
+    assert stats["retries"] == 2 and stats["overloads"] == 2
+    # Both 429s arrived within the cooldown, so the limit is halved once
+    assert stats["concurrency_limit"] == 4
+    assert metrics.summary()["stages"]["write"]["queue_wait_seconds"] > 0
+    with pytest.raises(ValueError):
+        limiter.call(lambda: (_ for _ in ()).throw(ValueError("bad request")))
+    assert limiter.snapshot()["retries"] == 2
+
+    first = SQLiteTokenBucket(str(tmp_path / "limits.db"), "requests", 60)
+    second = SQLiteTokenBucket(str(tmp_path / "limits.db"), "requests", 60)
+    assert first.try_take(60) == 0
+    assert second.try_take(1) > 0
+
+def test_rate_limited_llm_streams_tokens_as_they_arrive(monkeypatch):
+    from langchain_core.callbacks import BaseCallbackHandler
+    from langchain_core.messages import AIMessageChunk
+    from langchain_core.outputs import ChatGenerationChunk
+    from langchain_openai import ChatOpenAI
+    import rate_limiter
+
+    # Empty values, as copied from .env.example, fall back to the defaults
+    for name in ("LLM_REQUESTS_PER_MINUTE", "LLM_TOKENS_PER_MINUTE", "LLM_MAX_CONCURRENCY",
+                 "LLM_INITIAL_CONCURRENCY", "LLM_MAX_RETRIES", "LLM_RATE_LIMIT_DB"):
+        monkeypatch.setenv(name, "")
+    monkeypatch.setattr(rate_limiter, "_limiter", None)
+    limiter = rate_limiter.get_rate_limiter()
+    assert limiter.requests is None and limiter.tokens is None and limiter.max_retries == 5
+
+    received = []
+    delivered_before_next = []
+
+    def upstream(self, messages, stop=None, run_manager=None, **kwargs):
+        for text in ("Hello", " streamed", " world"):
+            delivered_before_next.append(len(received))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+
+    class Callback(BaseCallbackHandler):
+        def on_llm_new_token(self, token, **kwargs):
+            received.append(token)
+
+    monkeypatch.setattr(ChatOpenAI, "_stream", upstream)
+    llm = rate_limiter.RateLimitedChatOpenAI(model="deepseek-chat", api_key="sk-dummy", max_retries=0)
+    chunks = []
+    for chunk in llm.stream("Hi", config={"callbacks": [Callback()]}):
+        if chunk.content:
+            chunks.append(chunk.content)
+            # The slot is held until the stream ends
+            assert limiter.concurrency.in_flight == 1
+    # Each token reached the callback before the next one was produced
+    assert delivered_before_next == [0, 1, 2]
+    assert received[:3] == chunks == ["Hello", " streamed", " world"]
+    assert limiter.concurrency.in_flight == 0
+
+def test_hedged_stream_races_a_stalled_first_token_within_the_spend_cap():
+    import time
+    from hedging import HedgePolicy, hedged_stream
+
+    starts = []
+
+    def start():
+        attempt = len(starts)
+        starts.append(attempt)
+
+        def stream():
+            # Attempts 1 and 3 stall before their first token
+            time.sleep(0.5 if attempt in (1, 3) else 0.01)
+            yield f"attempt-{attempt}"
+            yield "done"
+        return stream()
+
+    policy = HedgePolicy(min_delay=0.05, max_delay=0.05, max_extra=0.5)
+    assert list(hedged_stream(start, policy)) == ["attempt-0", "done"]
+
+    started = time.perf_counter()
+    assert list(hedged_stream(start, policy)) == ["attempt-2", "done"]
+    assert time.perf_counter() - started < 0.3
+
+    # A second hedge would exceed half a request per call, so the slow call runs alone
+    assert list(hedged_stream(start, policy)) == ["attempt-3", "done"]
+    assert policy.stats() == {"calls": 3, "hedged": 1, "hedge_wins": 1, "denied": 1,
+                              "hedge_rate": 0.333, "win_rate": 1.0}
+
+def test_model_router_switches_agents_to_fast_settings_under_a_latency_budget():
+    from model_routing import FAST, ModelRouter, load_agent_llm_config, resolve
+
+    config = load_agent_llm_config({
+        "writer": {"model": "deepseek-reasoner", "fast": {"model": "deepseek-chat", "max_tokens": 2000}}
+    })
+    assert resolve(config["writer"], FAST) == dict(resolve(config["writer"]), model="deepseek-chat", max_tokens=2000)
+
+    router = ModelRouter(config)
+    stages = ["researcher", "writer", "writer", "editor", "fact_checker", "seo_specialist"]
+    assert set(router.route(stages)["variants"].values()) == {"default"}
+
+    router.observe("writer", "default", 120)
+    router.observe("writer", FAST, 30)
+    unconstrained = router.route(stages)["estimated_seconds"]
+    routed = router.route(stages, latency_budget=unconstrained - 100)
+    # The writer runs two stages, so switching it saves the most
+    assert [agent for agent, variant in routed["variants"].items() if variant == FAST] == ["writer"]
+    assert routed["estimated_seconds"] == unconstrained - 180
+
+    crew = ContentGenerationCrew(agent_llm_config={"writer": {"model": "deepseek-reasoner"}})
+    assert crew._llm_for("writer").model_name == "deepseek-reasoner"
+    assert crew._llm_for("writer", FAST).max_tokens == 3000
+    # Only LLM time is learned; search time within the stage doesn't depend on the variant
+    crew._agent_latency({"stages": {"edit": {"llm_calls": 2, "llm_seconds": 12.0, "wall_time": 40.0}}},
+                        {"edit": "editor"}, {})
+    assert crew.router._estimate("editor", "default") == 12.0
+
+def test_quality_scorer_batch_matches_single_document_scores():
+    scorer = ContentQualityScorer()
+    docs = [
+        "# Guide\n## One\n## Two\n## Three\n### A\n### B\n- point\nIs it fast? Try it. An example with 42 \"quotes\".",
+        "word " * 1200 + "python.",
+        "",
+        "#### Deep heading\nNo sentence ends here"
+    ]
+    keywords = ["guide", "Python", None, ""]
+    batch = scorer.score_batch(docs, keywords)
+    assert batch == [scorer.score_content(doc, keyword) for doc, keyword in zip(docs, keywords)]
+
+    assert batch[0]["scores"] == {"readability": 100, "structure": 65, "engagement": 100, "seo": 50, "completeness": 40}
+    assert batch[0]["grade"] == "C"
+    assert batch[1]["scores"]["seo"] == 100 and batch[1]["scores"]["readability"] == 40
+    assert batch[2]["overall_score"] == 6.0
+    # A "####" marker counts towards every heading level, as with `count('# ')`
+    features = scorer.analyze(docs[3])
+    assert features["h1"] == features["h2"] == features["h3"] == 1
+
+def test_readability_metrics_ignore_markdown_code_and_urls():
+    from readability import count_syllables, readability_metrics
+
+    assert [count_syllables(w) for w in ["the", "makes", "wanted", "table", "pipeline", "beautiful"]] == [1, 1, 2, 2, 3, 3]
+    plain = readability_metrics("The cat sat on the mat. The dog ran to the park.")
+    assert (plain["words"], plain["sentences"], plain["syllables"]) == (12, 2, 12)
+    assert plain["flesch_reading_ease"] == round(206.835 - 1.015 * 6 - 84.6, 1)
+
+    markdown = (
+        "# The Cat\n\nThe cat sat on the mat at 3.5 m. See https://example.com/a.b for more.\n\n"
+        "```python\nx = 1. ; y = 2.\n```\n\n- The dog ran\n- Use `os.path.join()` here\n"
+    )
+    metrics = readability_metrics(markdown)
+    # Heading, two prose sentences and two list items; the decimal, URL and code don't split
+    assert metrics["sentences"] == 5
+    assert metrics["words"] == 18
+    assert ContentQualityScorer().score_content(markdown)["readability_metrics"] == metrics
+    # Common abbreviations don't end sentences
+    assert readability_metrics("Dr. Smith went home. Mr. Jones stayed.")["sentences"] == 2
+    assert readability_metrics("Bring tools, e.g. a saw, etc. and wait, i.e. rest.")["sentences"] == 1
+
+def test_incremental_quality_scorer_matches_full_score_at_every_chunk():
+    from quality_scorer import IncrementalQualityScorer
+    from progress import ProgressReporter
+
+    content = (
+        "# Solar Guide\n\nWhy does storage matter? Learn more about it. Prices fell 3.5 percent.\n\n"
+        "```python\nprint('not prose.')\n```\n\n## Options\n- Batteries get started fast\n- Pumped hydro\n"
+        "See https://example.com/a.b for an example of \"grid\" solar"
+    )
+    scorer = ContentQualityScorer()
+    incremental = IncrementalQualityScorer("solar")
+    # Chunks split words, phrases ("learn more"), URLs, fences and lines
+    for end in range(7, len(content) + 7, 7):
+        incremental.feed(content[end - 7:end])
+        assert incremental.score() == scorer.score_content(content[:end], "solar")
+
+    snapshots = []
+    reporter = ProgressReporter(lambda event, snapshot: snapshots.append(snapshot),
+                                stages=["write"], agents={"write": "Expert Content Writer"}, keyword="solar")
+    reporter.stage_started("write")
+    reporter.token(content[:60])
+    assert snapshots[-1]["draft_quality"]["overall_score"] == scorer.score_content(content[:60], "solar")["overall_score"]
+    reporter.stage_finished("write", content)
+    assert snapshots[-1]["draft_quality"]["scores"] == scorer.score_content(content, "solar")["scores"]
+
+    class EveryHundredthToken:
+        def __init__(self):
+            self.tokens = 0
+            self.snapshots = []
+
+        def wants(self, event):
+            self.tokens += event["type"] == "token"
+            return event["type"] != "token" or self.tokens % 100 == 0
+
+        def __call__(self, event, snapshot):
+            self.snapshots.append(snapshot)
+
+    callback = EveryHundredthToken()
+    reporter = ProgressReporter(callback, stages=["write"], agents={"write": "Expert Content Writer"}, keyword="solar")
+    reporter.stage_started("write")
+    for i in range(1000):
+        reporter.token(f"word{i} ")
+    # Snapshots are only built for the events the callback keeps
+    assert len(callback.snapshots) == 11
+    assert callback.snapshots[-1]["draft"] == "".join(f"word{i} " for i in range(1000))
+
+def test_rescore_archive_scores_only_new_or_changed_versions(tmp_path, monkeypatch):
+    import sqlite3
+    import rescore_archive
+    from content_versioning import ContentVersionControl
+
+    vc = ContentVersionControl(db_path=str(tmp_path / "versions.db"))
+    for i in range(5):
+        vc.save_version("Solar", f"# Solar {i}\nSolar panels are cheap. Try one?")
+    vc.save_version("Wind", "Wind turbines spin.")
+
+    assert rescore_archive.rescore_archive(vc, workers=2, chunk_size=2)["scored"] == 6
+    assert rescore_archive.rescore_archive(vc, workers=0)["scored"] == 0
+    expected = ContentQualityScorer().score_content("# Solar 4\nSolar panels are cheap. Try one?", "Solar")
+    assert vc.get_history("Solar")[0]["score"] == expected["overall_score"]
+
+    with sqlite3.connect(vc.db_path) as conn:
+        conn.execute("UPDATE content_versions SET content = 'Edited.', content_hash = 'changed' WHERE content_id = 'Wind'")
+    # Until it is rescored, a changed version has no current score
+    assert vc.get_history("Wind")[0]["score"] is None
+    assert rescore_archive.rescore_archive(vc, workers=0)["scored"] == 1
+    assert vc.get_history("Wind")[0]["score"] == ContentQualityScorer().score_content("Edited.", "Wind")["overall_score"]
+
+    rescore_archive.SCORER_VERSION += 1
+    try:
+        assert rescore_archive.rescore_archive(vc, workers=0, chunk_size=4)["scored"] == 6
+    finally:
+        rescore_archive.SCORER_VERSION -= 1
+
+    # The app reads a version's stored score and only scores versions that have none
+    vc.save_version("Tidal", "# Tides\nTidal power is steady.")
+    fresh = rescore_archive.score_version(vc, "Tidal", 1)
+    assert fresh == ContentQualityScorer().score_content("# Tides\nTidal power is steady.", "Tidal")
+    assert vc.get_history("Tidal")[0]["score"] == fresh["overall_score"]
+    monkeypatch.setattr(ContentQualityScorer, "score_batch", lambda *args: pytest.fail("rescored a stored score"))
+    assert rescore_archive.score_version(vc, "Tidal", 1) == fresh
+    assert rescore_archive.score_version(vc, "Tidal", 2) is None
+
+def test_content_versions_are_allocated_atomically_and_saved_in_bulk(tmp_path):
+    import sqlite3
+    from concurrent.futures import ThreadPoolExecutor
+    from content_versioning import ContentVersionControl
+
+    legacy = str(tmp_path / "legacy.db")
+    with sqlite3.connect(legacy) as conn:
+        conn.execute("""CREATE TABLE content_versions (id INTEGER PRIMARY KEY AUTOINCREMENT, content_id TEXT NOT NULL,
+                        version INTEGER NOT NULL, content TEXT NOT NULL, content_hash TEXT NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, word_count INTEGER)""")
+        # Two saves that raced to the same version number
+        conn.executemany("INSERT INTO content_versions (content_id, version, content, content_hash) VALUES (?, ?, ?, '')",
+                         [("Solar", 1, "a"), ("Solar", 1, "b"), ("Wind", 1, "c")])
+    vc = ContentVersionControl(db_path=legacy)
+    assert [h["version"] for h in vc.get_history("Solar")] == [2, 1]
+    with sqlite3.connect(legacy) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        versions = list(pool.map(lambda i: ContentVersionControl(db_path=legacy).save_version("Solar", f"text {i}"), range(20)))
+    assert sorted(versions) == list(range(3, 23))
+
+    assert vc.save_versions([
+        {"content_id": "Wind", "content": "second"},
+        {"content_id": "Tidal", "content": "first", "artifacts": {"research": "R"}, "content_type": "Blog Post"},
+        {"content_id": "Wind", "content": "third"}
+    ]) == [2, 1, 3]
+    assert [h["version"] for h in vc.get_history("Wind")] == [3, 2, 1]
+    with sqlite3.connect(legacy) as conn, pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO content_versions (content_id, version, content, content_hash) VALUES ('Wind', 3, 'x', '')")
+
+def test_versions_are_stored_as_bounded_delta_chains(tmp_path):
+    import content_versioning
+    from content_versioning import ContentVersionControl
+
+    vc = ContentVersionControl(db_path=str(tmp_path / "versions.db"), max_chain=3)
+    paragraphs = [f"## Part {i}\n" + f"Paragraph {i} about solar storage and grid costs. " * 20 + "\n" for i in range(12)]
+    texts = []
+    for n in range(10):
+        paragraphs[n % 12] = f"## Part {n}\nRewritten paragraph in version {n}.\n"
+        texts.append("\n".join(paragraphs))
+    assert vc.save_versions([{"content_id": "Solar", "content": text} for text in texts]) == list(range(1, 11))
+    # A rewrite shares nothing with its base and starts a new chain
+    vc.save_version("Solar", "Completely different text.")
+
+    stats = vc.storage_stats()
+    assert (stats["keyframes"], stats["deltas"], stats["full_copies"]) == (4, 7, 0)
+    assert stats["stored_bytes"] < sum(len(text) for text in texts) / 5
+
+    content_versioning._texts.clear()
+    assert vc.get_version("Solar", 7) == texts[6]
+    assert [vc.get_version("Solar", n) for n in range(1, 11)] == texts
+    assert vc.get_version("Solar") == "Completely different text."
+    assert vc.get_version("Solar", 99) is None and vc.get_version("Wind") is None
+
+def test_identical_content_is_stored_once_and_found_across_topics(tmp_path):
+    import sqlite3
+    from content_versioning import ContentVersionControl
+
+    db_path = str(tmp_path / "versions.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""CREATE TABLE content_versions (id INTEGER PRIMARY KEY AUTOINCREMENT, content_id TEXT NOT NULL,
+                        version INTEGER NOT NULL, content TEXT NOT NULL, content_hash TEXT NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, word_count INTEGER)""")
+        conn.executemany("INSERT INTO content_versions (content_id, version, content, content_hash) VALUES (?, ?, ?, 'md5')",
+                         [("Solar", 1, "Solar is cheap."), ("Solar", 2, "Solar is cheaper."), ("Wind", 1, "Solar is cheap.")])
+    vc = ContentVersionControl(db_path=db_path)
+    # Texts saved before the blob store are moved into it, once per distinct text
+    assert vc.storage_stats()["blobs"] == 2 and vc.storage_stats()["full_copies"] == 0
+    assert vc.get_version("Solar", 2) == "Solar is cheaper." and vc.get_version("Wind") == "Solar is cheap."
+
+    before = vc.storage_stats()["stored_bytes"]
+    assert vc.save_versions([{"content_id": "Tidal", "content": "Solar is cheaper."},
+                             {"content_id": "Solar", "content": "Solar is cheaper."}]) == [1, 3]
+    assert vc.storage_stats()["stored_bytes"] == before and vc.storage_stats()["versions"] == 5
+    assert vc.get_version("Tidal") == "Solar is cheaper."
+
+    assert vc.has_content("Solar is cheap.") and not vc.has_content("Solar is cheap")
+    assert [(m["content_id"], m["version"]) for m in vc.find_content("Solar is cheaper.")] == [
+        ("Solar", 2), ("Tidal", 1), ("Solar", 3)
+    ]
+
+def test_versions_are_searchable_and_history_is_paged(tmp_path):
+    import sqlite3
+    from content_versioning import ContentVersionControl
+
+    db_path = str(tmp_path / "versions.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""CREATE TABLE content_versions (id INTEGER PRIMARY KEY AUTOINCREMENT, content_id TEXT NOT NULL,
+                        version INTEGER NOT NULL, content TEXT NOT NULL, content_hash TEXT NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, word_count INTEGER)""")
+        conn.execute("INSERT INTO content_versions (content_id, version, content, content_hash) "
+                     "VALUES ('Wind Power', 1, 'Offshore turbines feed batteries.', '')")
+    vc = ContentVersionControl(db_path=db_path)
+    for i in range(1, 6):
+        vc.save_version("Solar Energy", f"# Draft {i}\nPanels charge batteries." + " Filler words." * i)
+
+    # Versions saved before the index existed are indexed when it is created
+    hit = vc.search("turbine")["items"][0]
+    assert (hit["content_id"], hit["version"]) == ("Wind Power", 1)
+    assert hit["snippet"] == "Offshore **turbines** feed batteries."
+    # Every word must match, in the topic or the text
+    assert [h["content_id"] for h in vc.search("energy batteries")["items"]] == ["Solar Energy"] * 5
+    assert vc.search("batteries", content_id="Wind Power")["items"][0]["version"] == 1
+    # Topic-scoped searches are narrowed inside the index, but still match the topic exactly
+    vc.save_version("Solar Energy Storage", "Batteries store solar energy.")
+    vc.save_version('"Quoted" Solar', "Batteries again.")
+    vc.save_version("___", "Batteries without topic words.")
+    assert {h["content_id"] for h in vc.search("batteries", content_id="Solar Energy")["items"]} == {"Solar Energy"}
+    assert len(vc.search("batteries", content_id="Solar Energy", limit=10)["items"]) == 5
+    assert vc.search("batteries", content_id='"Quoted" Solar')["items"][0]["content_id"] == '"Quoted" Solar'
+    assert vc.search("batteries", content_id="___")["items"][0]["content_id"] == "___"
+    assert vc.search("") == {"items": [], "next_cursor": None}
+
+    seen, cursor = [], None
+    while True:
+        page = vc.search("batteries", limit=2, cursor=cursor)
+        seen += [(h["content_id"], h["version"]) for h in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == 9
+
+    first = vc.get_history_page("Solar Energy", limit=2)
+    assert [h["version"] for h in first["items"]] == [5, 4]
+    second = vc.get_history_page("Solar Energy", limit=2, cursor=first["next_cursor"])
+    last = vc.get_history_page("Solar Energy", limit=2, cursor=second["next_cursor"])
+    assert [h["version"] for h in second["items"] + last["items"]] == [3, 2, 1] and last["next_cursor"] is None
@@ -0,0 +1,73 @@
+import json
+import zlib
+import difflib
+import threading
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Union
+
+
+def encode_keyframe(text: str) -> bytes:
+    return zlib.compress(text.encode("utf-8"), 6)
+
+
+def decode_keyframe(body: bytes) -> str:
+    return zlib.decompress(body).decode("utf-8")
+
+
+def make_delta(base: str, text: str) -> bytes:
+    """
+    Compressed line delta turning `base` into `text`: a JSON list whose items
+    are either [start, end] (copy those lines of `base`) or a string of new text.
+    """
+    base_lines = base.splitlines(keepends=True)
+    lines = text.splitlines(keepends=True)
+    ops: List[Union[List[int], str]] = []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, base_lines, lines).get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append("".join(lines[j1:j2]))
+    return zlib.compress(json.dumps(ops, separators=(",", ":")).encode("utf-8"), 6)
+
+
+def apply_delta(base: str, delta: bytes) -> str:
+    base_lines = base.splitlines(keepends=True)
+    parts = []
+    for op in json.loads(zlib.decompress(delta)):
+        if isinstance(op, list):
+            parts.extend(base_lines[op[0]:op[1]])
+        else:
+            parts.append(op)
+    return "".join(parts)
+
+
+class TextCache:
+    """Thread-safe LRU cache of materialized version texts"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            text = self._entries.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def put(self, key: Hashable, text: str):
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,146 @@
+import os
+import time
+import socket
+import argparse
+import threading
+from datetime import timedelta
+from job_queue import JobQueue
+from logger import log_progress
+
+
+class _Heartbeat:
+    """Refresh a job's lease in the background while the crew is running"""
+
+    def __init__(self, queue: JobQueue, job_id: int, interval: float):
+        self.queue = queue
+        self.job_id = job_id
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.queue.heartbeat(self.job_id)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+class _ProgressWriter:
+    """Write progress snapshots to the job row, at most once per `interval` seconds"""
+
+    def __init__(self, queue: JobQueue, job_id: int, interval: float = 1.0):
+        self.queue = queue
+        self.job_id = job_id
+        self.interval = interval
+        self._last_write = 0.0
+        self._lock = threading.Lock()
+
+    def wants(self, event: dict) -> bool:
+        """Checked by the reporter before it builds a snapshot for `event`"""
+        # Stage transitions are always written; token and step events are throttled
+        now = time.monotonic()
+        with self._lock:
+            if event["type"] in ("token", "step") and now - self._last_write < self.interval:
+                return False
+            self._last_write = now
+            return True
+
+    def __call__(self, event: dict, snapshot: dict):
+        self.queue.update_progress(self.job_id, snapshot)
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether a failed job is worth retrying: rate limits, timeouts and network errors, even when wrapped"""
+    from rate_limiter import is_retryable
+
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if is_retryable(error):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def process_job(crew, queue: JobQueue, job: dict, heartbeat_interval: float = 15):
+    """
+    Run one claimed job and record its result or error.
+
+    Transient failures put the job back in the queue while it has attempts
+    left; anything else (e.g. an unknown profile) fails it straight away.
+    """
+    from content_versioning import ContentVersionControl
+
+    log_progress(f"👷 Job {job['id']} started: {job['topic']} ({job['content_type']})")
+    # The creation time keeps run ids unique even if a recreated queue reuses job ids
+    run_id = f"job-{job['id']}-{job['created_at']}"
+    try:
+        with _Heartbeat(queue, job["id"], heartbeat_interval):
+            # A retried job resumes from the stages checkpointed by its previous attempts
+            result = crew.generate_content(
+                job["topic"], job["content_type"], run_id=run_id, resume=job["attempts"] > 1,
+                progress_callback=_ProgressWriter(queue, job["id"]), **job["options"]
+            )
+        # Persist the version here so the output survives even if no browser is waiting
+        result["version"] = ContentVersionControl().save_version(
+            job["topic"], result["final_content"], artifacts=result.get("artifacts"), content_type=job["content_type"]
+        )
+        crew.checkpoints.delete(run_id)
+        queue.complete(job["id"], result)
+        log_progress(f"✅ Job {job['id']} finished.")
+    except Exception as e:
+        retry = is_transient(e)
+        queue.fail(job["id"], str(e), retry=retry)
+        log_progress(f"❌ Job {job['id']} failed{' (will retry)' if retry else ''}: {e}")
+
+
+def run_worker(queue: JobQueue = None, poll_interval: float = 2.0, lease_seconds: int = 120, once: bool = False):
+    """Poll the job queue and execute jobs until interrupted"""
+    from content_generation_crew import ContentGenerationCrew
+
+    queue = queue or JobQueue()
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    crew = ContentGenerationCrew()
+    metrics_port = os.getenv("METRICS_PORT")
+    if metrics_port:
+        from metrics import start_metrics_server
+        start_metrics_server(int(metrics_port))
+        log_progress(f"Serving Prometheus metrics on :{metrics_port}/metrics")
+    log_progress(f"Worker {worker_id} polling {queue.db_path}")
+    # Checkpoints of jobs that never finished are dropped after CHECKPOINT_MAX_AGE_HOURS
+    max_age = timedelta(hours=float(os.getenv("CHECKPOINT_MAX_AGE_HOURS") or 168))
+    last_purge = 0.0
+
+    while True:
+        if time.monotonic() - last_purge >= 3600:
+            purged = crew.checkpoints.purge(max_age)
+            if purged:
+                log_progress(f"Purged {purged} stale stage checkpoint(s)")
+            last_purge = time.monotonic()
+
+        recovered = queue.requeue_stale(lease_seconds)
+        if recovered:
+            log_progress(f"Requeued {recovered} job(s) with expired leases")
+
+        job = queue.claim(worker_id)
+        if job is None:
+            if once:
+                return
+            time.sleep(poll_interval)
+            continue
+        process_job(crew, queue, job, heartbeat_interval=lease_seconds / 4)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Content generation job worker")
+    parser.add_argument("--poll-interval", type=float, default=2.0)
+    parser.add_argument("--lease-seconds", type=int, default=120)
+    parser.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+    args = parser.parse_args()
+    run_worker(poll_interval=args.poll_interval, lease_seconds=args.lease_seconds, once=args.once)